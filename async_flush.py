@@ -0,0 +1,196 @@
+# async_flush.py
+# ST7789 的后台发送线程：绘制代码把像素写入一条 strip 缓冲区，工作线程同时发送另一条。
+# 在 ESP32 上使用 MicroPython 的 _thread；在电脑上同样可以配合模拟 SPI 对象运行。
+import time
+
+try:
+    import _thread
+except ImportError:
+    import thread as _thread
+
+try:
+    _sleep_ms = time.sleep_ms
+    _ticks_ms = time.ticks_ms
+    _ticks_diff = time.ticks_diff
+except AttributeError:  # CPython
+    def _sleep_ms(ms):
+        time.sleep(ms / 1000)
+
+    def _ticks_ms():
+        return int(time.monotonic() * 1000)
+
+    def _ticks_diff(a, b):
+        return a - b
+
+
+def _signal(lock):
+    """释放作为信号量的锁；已经处于释放状态时忽略"""
+    try:
+        lock.release()
+    except RuntimeError:
+        pass
+
+
+class _PinProxy:
+    """把引脚电平变化也放进发送队列，保证它与前后的 SPI 数据保持顺序"""
+
+    def __init__(self, flusher, pin):
+        self._flusher = flusher
+        self.pin = pin
+
+    def __call__(self, value=None):
+        if value is None:
+            return self.pin()
+        self._flusher._queue_pin(self.pin, value)
+
+
+class AsyncFlusher:
+    """
+    以 SPI 对象的形式接在 ST7789 驱动和真正的 SPI 总线之间。
+    write() 只把数据拷进当前 strip 缓冲区；strip 写满、引脚电平变化或 commit() 时
+    整条 strip 交给工作线程发送，生产者随即切换到另一条空闲 strip 继续绘制。
+    """
+
+    def __init__(self, spi, strip_bytes=4096, strips=2):
+        """
+        Args:
+            spi: 真正执行传输的 SPI 对象 (需要 write 方法)。
+            strip_bytes (int): 每条 strip 缓冲区的字节数。
+            strips (int): strip 数量，2 即双缓冲。
+        """
+        self.spi = spi
+        self.strip_bytes = strip_bytes
+        self._strips = [memoryview(bytearray(strip_bytes)) for _ in range(strips)]
+        self._free = list(range(strips))
+        self._cur = None  # 生产者正在填充的 strip 序号
+        self._fill = 0    # 当前 strip 已填充的字节数
+        self._queue = []  # ('w', strip, nbytes) 或 ('p', pin, value)
+        self._lock = _thread.allocate_lock()
+        # 三把锁都当作二值信号量使用，等待时阻塞而不是空转，避免与工作线程争抢 CPU
+        self._work = _thread.allocate_lock()   # 唤醒工作线程
+        self._space = _thread.allocate_lock()  # 通知生产者有 strip 被释放
+        self._idle = _thread.allocate_lock()   # 通知 wait_idle 队列已清空
+        self._work.acquire()
+        self._space.acquire()
+        self._idle.acquire()
+        self._busy = False
+        self._running = True
+        self._stopped = False
+        self.stats = {
+            'queued': 0,      # 入队的操作数
+            'sent_bytes': 0,  # 工作线程已发送的字节数
+            'max_depth': 0,   # 队列最大深度
+            'stalls': 0,      # 生产者等待空闲 strip 的次数
+            'stall_ms': 0,    # 生产者等待的总时长
+            'overlapped': 0,  # 提交时工作线程仍在发送上一条 strip 的次数 (绘制与传输重叠)
+        }
+        _thread.start_new_thread(self._run, ())
+
+    # --- 生产者侧 (绘制代码所在线程) ---
+    def write(self, data):
+        """拷贝数据到 strip 缓冲区，写满的 strip 立即交给工作线程"""
+        src = memoryview(data)
+        size = len(src)
+        pos = 0
+        while pos < size:
+            if self._cur is None:
+                self._cur = self._take_strip()
+                self._fill = 0
+            n = min(self.strip_bytes - self._fill, size - pos)
+            self._strips[self._cur][self._fill:self._fill + n] = src[pos:pos + n]
+            self._fill += n
+            pos += n
+            if self._fill == self.strip_bytes:
+                self.commit()
+
+    def commit(self):
+        """把当前部分填充的 strip 交给工作线程"""
+        if self._cur is not None:
+            if self._fill:
+                self._push(('w', self._cur, self._fill))
+            else:
+                with self._lock:
+                    self._free.append(self._cur)
+            self._cur = None
+            self._fill = 0
+
+    def _queue_pin(self, pin, value):
+        self.commit()
+        self._push(('p', pin, value))
+
+    def _push(self, item):
+        with self._lock:
+            self._queue.append(item)
+            depth = len(self._queue)
+            busy = self._busy
+        stats = self.stats
+        stats['queued'] += 1
+        if busy and item[0] == 'w':
+            stats['overlapped'] += 1
+        if depth > stats['max_depth']:
+            stats['max_depth'] = depth
+        _signal(self._work)
+
+    def _take_strip(self):
+        start = None
+        while True:
+            with self._lock:
+                if self._free:
+                    index = self._free.pop(0)
+                    break
+            if start is None:
+                start = _ticks_ms()
+                self.stats['stalls'] += 1
+            self._space.acquire() # 阻塞直到工作线程释放一条 strip
+        if start is not None:
+            self.stats['stall_ms'] += _ticks_diff(_ticks_ms(), start)
+        return index
+
+    def queue_depth(self):
+        """当前排队等待发送的操作数"""
+        with self._lock:
+            return len(self._queue)
+
+    def wait_idle(self):
+        """提交当前 strip 并等待工作线程发送完所有数据 (屏障)"""
+        self.commit()
+        while True:
+            with self._lock:
+                if not self._queue and not self._busy:
+                    return
+            self._idle.acquire()
+
+    def stop(self):
+        """发送剩余数据并结束工作线程"""
+        self.wait_idle()
+        self._running = False
+        _signal(self._work)
+        while not self._stopped:
+            _sleep_ms(1)
+
+    def pin(self, pin):
+        """返回经过发送队列的引脚代理"""
+        return _PinProxy(self, pin) if pin else pin
+
+    # --- 工作线程 ---
+    def _run(self):
+        while self._running:
+            self._work.acquire()
+            while True:
+                with self._lock:
+                    if not self._queue:
+                        self._busy = False
+                        _signal(self._idle)
+                        break
+                    item = self._queue.pop(0)
+                    self._busy = True
+                if item[0] == 'w':
+                    _, index, nbytes = item
+                    self.spi.write(self._strips[index][:nbytes])
+                    self.stats['sent_bytes'] += nbytes
+                    with self._lock:
+                        self._free.append(index)
+                    _signal(self._space)
+                else:
+                    item[1](item[2])
+        self._stopped = True
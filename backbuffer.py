@@ -0,0 +1,556 @@
+# backbuffer.py
+# ST7789 的内存后备缓冲区：绘制先写入 RAM，记录脏矩形，flush() 时合并后一次性发送。
+
+from rgb565 import fill565
+
+class Surface565:
+    """
+    RGB565 (大端) 内存画布，按行主序存储。
+    y0 为画布第一行在屏幕上的纵坐标，便于把多个分带画布拼成整屏。
+    """
+
+    def __init__(self, width, height, y0=0, buf=None):
+        self.width = width
+        self.height = height
+        self.y0 = y0
+        self.stride = width * 2
+        self.buf = buf if buf is not None else bytearray(self.stride * height)
+        self._mv = memoryview(self.buf)
+
+    def fill_rect(self, x, y, w, h, color):
+        """填充矩形 (屏幕坐标)，超出画布的部分被裁掉。"""
+        x0 = max(x, 0)
+        y0 = max(y, self.y0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.y0 + self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        mv = self._mv
+        stride = self.stride
+        start = (y0 - self.y0) * stride + x0 * 2
+        span = (x1 - x0) * 2
+        fill565(mv, start, span, color)
+        # 其余行直接拷贝第一行
+        row = mv[start:start + span]
+        for r in range(1, y1 - y0):
+            offset = start + r * stride
+            mv[offset:offset + span] = row
+
+    def blit(self, buf, x, y, w, h):
+        """把 w*h 的 RGB565 像素块拷贝到 (x, y)，超出画布的部分被裁掉。"""
+        x0 = max(x, 0)
+        y0 = max(y, self.y0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.y0 + self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        src = memoryview(buf)
+        mv = self._mv
+        span = (x1 - x0) * 2
+        src_stride = w * 2
+        src_off = (y0 - y) * src_stride + (x0 - x) * 2
+        dst_off = (y0 - self.y0) * self.stride + x0 * 2
+        for _ in range(y1 - y0):
+            mv[dst_off:dst_off + span] = src[src_off:src_off + span]
+            src_off += src_stride
+            dst_off += self.stride
+
+    def pixel(self, x, y, color):
+        """绘制单个像素 (屏幕坐标)。"""
+        if 0 <= x < self.width and self.y0 <= y < self.y0 + self.height:
+            i = (y - self.y0) * self.stride + x * 2
+            self.buf[i] = (color >> 8) & 0xFF
+            self.buf[i + 1] = color & 0xFF
+
+    def row(self, y, x0, x1):
+        """返回第 y 行 [x0, x1) 区间像素的 memoryview (屏幕坐标)。"""
+        start = (y - self.y0) * self.stride + x0 * 2
+        return self._mv[start:start + (x1 - x0) * 2]
+
+
+class Palette:
+    """
+    最多 16 种颜色的调色板。新颜色在有空位时自动加入，满了之后映射到最接近的已有颜色。
+    lut() 返回按字节展开的查找表：一个字节 (两个 4 位像素) 直接对应 4 个 RGB565 输出字节。
+    mono_table() 返回单色位图的打包表：一个单色字节 (8 个像素) 直接对应 4 个打包的序号字节。
+    """
+
+    MAX_MONO_TABLES = 4 # 缓存的 (前景, 背景) 打包表数量，每张 1 KB
+
+    SIZE = 16
+
+    def __init__(self, colors=()):
+        self.colors = []
+        self._index = {}
+        self._lut = None
+        self._mono = {} # (前景序号, 背景序号) -> 打包表
+        for color in colors:
+            self.index(color)
+
+    def index(self, color):
+        """返回颜色的调色板序号"""
+        i = self._index.get(color)
+        if i is not None:
+            return i
+        if len(self.colors) < self.SIZE:
+            i = len(self.colors)
+            self.colors.append(color)
+            self._lut = None # 新颜色加入，查找表需要重建
+        else:
+            i = self._nearest(color)
+        self._index[color] = i
+        return i
+
+    def _nearest(self, color):
+        r, g, b = color >> 11, (color >> 5) & 0x3F, color & 0x1F
+        best = 0
+        best_dist = None
+        for i, c in enumerate(self.colors):
+            dr = (c >> 11) - r
+            dg = ((c >> 5) & 0x3F) - g
+            db = (c & 0x1F) - b
+            dist = 4 * dr * dr + dg * dg + 4 * db * db # 绿色分量多 1 位，其余按比例放大
+            if best_dist is None or dist < best_dist:
+                best, best_dist = i, dist
+        return best
+
+    def lut(self):
+        """256*4 字节的展开表，条目 b 为 (高 4 位像素, 低 4 位像素) 的大端 RGB565"""
+        if self._lut is None:
+            pairs = []
+            for i in range(self.SIZE):
+                c = self.colors[i] if i < len(self.colors) else 0
+                pairs.append(((c >> 8) & 0xFF, c & 0xFF))
+            lut = bytearray(256 * 4)
+            for b in range(256):
+                hi = pairs[b >> 4]
+                lo = pairs[b & 0x0F]
+                lut[b * 4:b * 4 + 4] = bytes((hi[0], hi[1], lo[0], lo[1]))
+            self._lut = memoryview(lut)
+        return self._lut
+
+    def mono_table(self, fg, bg):
+        """
+        256*4 字节的打包表：条目 b 为单色字节 b 的 8 个像素 (置位为 fg，清零为 bg 的调色板序号)
+        按每字节两个像素打包后的 4 个字节。
+        """
+        key = (fg << 4) | bg
+        table = self._mono.get(key)
+        if table is None:
+            # 两个像素 (高位在左) -> 一个打包字节
+            pairs = (bg * 0x11, (bg << 4) | fg, (fg << 4) | bg, fg * 0x11)
+            table = bytearray(256 * 4)
+            for b in range(256):
+                i = b * 4
+                table[i] = pairs[b >> 6]
+                table[i + 1] = pairs[(b >> 4) & 3]
+                table[i + 2] = pairs[(b >> 2) & 3]
+                table[i + 3] = pairs[b & 3]
+            if len(self._mono) >= self.MAX_MONO_TABLES:
+                del self._mono[next(iter(self._mono))]
+            table = memoryview(table)
+            self._mono[key] = table
+        return table
+
+
+class Surface4:
+    """
+    4 位调色板索引画布 (每字节两个像素，高 4 位为左边的像素)，240x320 只需 38 KB。
+    接口与 Surface565 相同，颜色参数仍为 RGB565，写入时转换为调色板序号。
+    """
+
+    def __init__(self, width, height, y0=0, palette=None):
+        self.width = width
+        self.height = height
+        self.y0 = y0
+        self.stride = (width + 1) // 2
+        self.palette = palette if palette is not None else Palette()
+        self.buf = bytearray(self.stride * height)
+        self._mv = memoryview(self.buf)
+        self._row = None # blit_mono 的行缓冲区，第一次使用时分配
+
+    def _clip(self, x, y, w, h):
+        x0 = max(x, 0)
+        y0 = max(y, self.y0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.y0 + self.height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return x0, y0, x1, y1
+
+    def fill_rect(self, x, y, w, h, color):
+        """填充矩形 (屏幕坐标)，超出画布的部分被裁掉。"""
+        clipped = self._clip(x, y, w, h)
+        if clipped is None:
+            return
+        x0, y0, x1, y1 = clipped
+        idx = self.palette.index(color)
+        mv = self._mv
+        stride = self.stride
+        # 中间完整的字节 [b0, b1) 可以整段拷贝，两端落在半个字节上的像素单独处理
+        b0 = (x0 + 1) >> 1
+        b1 = x1 >> 1
+        start = (y0 - self.y0) * stride
+        if b1 > b0:
+            mv[start + b0] = idx * 0x11
+            filled = 1
+            span = b1 - b0
+            while filled < span:
+                n = min(filled, span - filled)
+                mv[start + b0 + filled:start + b0 + filled + n] = mv[start + b0:start + b0 + n]
+                filled += n
+        for r in range(y1 - y0):
+            row = start + r * stride
+            if r and b1 > b0:
+                mv[row + b0:row + b1] = mv[start + b0:start + b1]
+            if x0 & 1:
+                i = row + (x0 >> 1)
+                mv[i] = (mv[i] & 0xF0) | idx
+            if x1 & 1:
+                i = row + (x1 >> 1)
+                mv[i] = (mv[i] & 0x0F) | (idx << 4)
+
+    def blit(self, buf, x, y, w, h):
+        """把 w*h 的 RGB565 像素块按调色板转换后拷贝到 (x, y)，超出画布的部分被裁掉。"""
+        clipped = self._clip(x, y, w, h)
+        if clipped is None:
+            return
+        x0, y0, x1, y1 = clipped
+        src = memoryview(buf)
+        mv = self._mv
+        index = self.palette.index
+        last_color = last_idx = None # 文字块中相邻像素大多同色，跳过重复查找
+        for yy in range(y0, y1):
+            s = ((yy - y) * w + (x0 - x)) * 2
+            row = (yy - self.y0) * self.stride
+            for xx in range(x0, x1):
+                color = (src[s] << 8) | src[s + 1]
+                s += 2
+                if color != last_color:
+                    last_color = color
+                    last_idx = index(color)
+                i = row + (xx >> 1)
+                if xx & 1:
+                    mv[i] = (mv[i] & 0xF0) | last_idx
+                else:
+                    mv[i] = (mv[i] & 0x0F) | (last_idx << 4)
+
+    def blit_mono(self, src, src_stride, x, y, w, h, fg, bg):
+        """
+        把 w*h 的单色位图 (MONO_HLSB，每行 src_stride 字节) 直接写成调色板序号，置位像素为 fg，
+        其余为 bg (均为 RGB565)。每个源字节经 mono_table 一次切片得到 4 个打包字节，
+        不经过 RGB565 中间结果；超出画布的部分被裁掉。
+        """
+        clipped = self._clip(x, y, w, h)
+        if clipped is None:
+            return
+        x0, y0, x1, y1 = clipped
+        palette = self.palette
+        table = palette.mono_table(palette.index(fg), palette.index(bg))
+        row_buf = self._row
+        if row_buf is None:
+            row_buf = self._row = bytearray(self.stride + 8)
+        src = memoryview(src)
+        mv = self._mv
+        xa = x0 & ~1 # 从偶数列开始按整字节生成
+        out_bytes = (((x1 + 1) & ~1) - xa) >> 1
+        nbytes = (out_bytes + 3) >> 2 # 需要的源字节数
+        phase = xa - x # xa 对应的源像素序号 (x0 为奇数且左边没有裁剪时为 -1)
+        aligned = phase >= 0 and not phase & 7
+        total_bits = src_stride * 8
+        shift = total_bits - phase - nbytes * 8
+        mask = (1 << (nbytes * 8)) - 1
+        for yy in range(y0, y1):
+            s = (yy - y) * src_stride
+            if aligned:
+                bits = src[s + (phase >> 3):s + (phase >> 3) + nbytes]
+            else:
+                # 源像素与目标字节边界错开：整行转成整数后移位对齐
+                v = int.from_bytes(bytes(src[s:s + src_stride]), 'big')
+                v = v >> shift if shift >= 0 else v << -shift
+                bits = (v & mask).to_bytes(nbytes, 'big')
+            d = 0
+            for b in bits:
+                b <<= 2
+                row_buf[d:d + 4] = table[b:b + 4]
+                d += 4
+            row = (yy - self.y0) * self.stride + (xa >> 1)
+            a = 0
+            e = out_bytes
+            if x0 & 1: # 第一个字节的高 4 位不属于本次绘制
+                mv[row] = (mv[row] & 0xF0) | (row_buf[0] & 0x0F)
+                a = 1
+            if x1 & 1: # 最后一个字节的低 4 位不属于本次绘制
+                i = row + e - 1
+                mv[i] = (mv[i] & 0x0F) | (row_buf[e - 1] & 0xF0)
+                e -= 1
+            if e > a:
+                mv[row + a:row + e] = row_buf[a:e]
+
+    def pixel(self, x, y, color):
+        """绘制单个像素 (屏幕坐标)。"""
+        if 0 <= x < self.width and self.y0 <= y < self.y0 + self.height:
+            idx = self.palette.index(color)
+            i = (y - self.y0) * self.stride + (x >> 1)
+            if x & 1:
+                self.buf[i] = (self.buf[i] & 0xF0) | idx
+            else:
+                self.buf[i] = (self.buf[i] & 0x0F) | (idx << 4)
+
+    def expand_row(self, y, x0, x1, out, offset=0):
+        """把第 y 行 [x0, x1) 区间展开为 RGB565 写入 out[offset:]，返回写入的字节数。"""
+        lut = self.palette.lut()
+        mv = self._mv
+        base = (y - self.y0) * self.stride
+        d = offset
+        x = x0
+        if x & 1: # 起点落在字节的低 4 位
+            j = mv[base + (x >> 1)] << 2
+            out[d:d + 2] = lut[j + 2:j + 4]
+            d += 2
+            x += 1
+        end = x1 & ~1
+        for i in range(base + (x >> 1), base + (end >> 1)):
+            j = mv[i] << 2
+            out[d:d + 4] = lut[j:j + 4]
+            d += 4
+        if x1 & 1 and x1 > x:
+            j = mv[base + (x1 >> 1)] << 2
+            out[d:d + 2] = lut[j:j + 2]
+            d += 2
+        return d - offset
+
+
+class BackBuffer:
+    """
+    整屏或分带的 RGB565 后备缓冲区，带脏矩形跟踪。
+    band_height 为 None 时分配整帧 (240x320 需要 150 KB，适合带 PSRAM 的板子)；
+    否则按 band_height 行分带，只在某一带第一次被绘制时才分配内存。
+    指定 palette 时使用 4 位调色板索引的分带 (整帧 38 KB)，flush 时逐行经查找表展开为 RGB565。
+    max_bands 限制常驻内存的分带数量，超出时先 flush 再释放已刷新的分带。
+    缓冲区假定屏幕在启用时已被清成 clear_color；被释放后重新分配的分带内容未知，
+    直到被整带填充之前，脏矩形合并不会把未绘制的像素带进发送窗口。
+    """
+
+    MAX_DIRTY = 8    # 脏矩形列表上限，超出时合并代价最小的一对
+    MERGE_SLACK = 64 # 合并后允许多发送的像素数
+
+    EXPAND_ROWS = 4  # 调色板模式下每次展开并发送的行数
+
+    def __init__(self, driver, width, height, band_height=None, max_bands=None, clear_color=0, palette=None):
+        """
+        Args:
+            driver: 提供 set_window(x0, y0, x1, y1)、_write_data(data) 和 _end() 的屏幕驱动。
+            width, height (int): 屏幕尺寸。
+            band_height (int, optional): 分带高度 (行)。
+            max_bands (int, optional): 最多同时驻留的分带数。
+            clear_color (int): 启用缓冲区时屏幕的底色 (RGB565)。
+            palette (Palette, optional): 指定时使用 4 位调色板索引的分带。
+        """
+        self.driver = driver
+        self.width = width
+        self.height = height
+        self.band_height = band_height if band_height else height
+        self.max_bands = max_bands
+        self.clear_color = clear_color
+        self.palette = palette
+        self._expand = None # 调色板模式的行展开缓冲区
+        count = (height + self.band_height - 1) // self.band_height
+        self.bands = [None] * count
+        self._valid = [True] * count  # 分带内容是否与屏幕一致
+        self._resident = 0
+        self.dirty = []
+        self.stats = {'flushes': 0, 'windows': 0, 'pixels': 0}
+
+    # --- 分带管理 ---
+    def _band(self, index):
+        band = self.bands[index]
+        if band is None:
+            if self.max_bands is not None and self._resident >= self.max_bands:
+                self.flush()
+                self._release_clean()
+            y0 = index * self.band_height
+            height = min(self.band_height, self.height - y0)
+            if self.palette is not None:
+                band = Surface4(self.width, height, y0, self.palette)
+            else:
+                band = Surface565(self.width, height, y0)
+            band.fill_rect(0, y0, self.width, band.height, self.clear_color)
+            self.bands[index] = band
+            self._resident += 1
+        return band
+
+    def _release_clean(self):
+        """释放所有分带 (仅在 flush 之后调用，此时没有未发送的像素)。"""
+        for i in range(len(self.bands)):
+            self.bands[i] = None
+            self._valid[i] = False
+        self._resident = 0
+
+    def _bands_for(self, y0, y1):
+        bh = self.band_height
+        return range(y0 // bh, (y1 - 1) // bh + 1)
+
+    def _clip(self, x, y, w, h):
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return x0, y0, x1, y1
+
+    # --- 绘制接口 (屏幕坐标) ---
+    def fill_rect(self, x, y, w, h, color):
+        clipped = self._clip(x, y, w, h)
+        if clipped is None:
+            return
+        for i in self._bands_for(clipped[1], clipped[3]):
+            band = self._band(i)
+            band.fill_rect(x, y, w, h, color)
+            if clipped[0] == 0 and clipped[2] == self.width and \
+                    clipped[1] <= band.y0 and clipped[3] >= band.y0 + band.height:
+                self._valid[i] = True
+            self._mark_band_dirty(band, clipped)
+
+    def blit(self, buf, x, y, w, h):
+        clipped = self._clip(x, y, w, h)
+        if clipped is None:
+            return
+        for i in self._bands_for(clipped[1], clipped[3]):
+            band = self._band(i)
+            band.blit(buf, x, y, w, h)
+            self._mark_band_dirty(band, clipped)
+
+    def blit_mono(self, src, src_stride, x, y, w, h, fg, bg):
+        """单色位图直接写入调色板分带 (仅调色板模式，见 Surface4.blit_mono)。"""
+        clipped = self._clip(x, y, w, h)
+        if clipped is None:
+            return
+        for i in self._bands_for(clipped[1], clipped[3]):
+            band = self._band(i)
+            band.blit_mono(src, src_stride, x, y, w, h, fg, bg)
+            self._mark_band_dirty(band, clipped)
+
+    def pixel(self, x, y, color):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self._band(y // self.band_height).pixel(x, y, color)
+            self.mark_dirty(x, y, x + 1, y + 1)
+
+    # --- 脏矩形 ---
+    def _mark_band_dirty(self, band, clipped):
+        # 逐带登记，保证分带被换出前其内容已在脏列表中；相邻的部分会被重新合并
+        self.mark_dirty(clipped[0], max(clipped[1], band.y0),
+                        clipped[2], min(clipped[3], band.y0 + band.height))
+
+    def mark_dirty(self, x0, y0, x1, y1):
+        """记录脏矩形 [x0, x1) x [y0, y1)，与已有矩形合并以减少窗口数量。"""
+        rect = [x0, y0, x1, y1]
+        merged = True
+        while merged:
+            merged = False
+            for i, other in enumerate(self.dirty):
+                if self._can_merge(rect, other, self.MERGE_SLACK):
+                    rect = self._union(rect, other)
+                    del self.dirty[i]
+                    merged = True
+                    break
+        self.dirty.append(rect)
+        while len(self.dirty) > self.MAX_DIRTY:
+            self._merge_cheapest()
+
+    @staticmethod
+    def _area(r):
+        return (r[2] - r[0]) * (r[3] - r[1])
+
+    @staticmethod
+    def _union(a, b):
+        return [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+
+    def _merge_cost(self, a, b):
+        """合并两个矩形后多发送的像素数 (重叠部分按节省计算)。"""
+        ix = min(a[2], b[2]) - max(a[0], b[0])
+        iy = min(a[3], b[3]) - max(a[1], b[1])
+        overlap = ix * iy if ix > 0 and iy > 0 else 0
+        return self._area(self._union(a, b)) - self._area(a) - self._area(b) + overlap
+
+    def _can_merge(self, a, b, slack):
+        cost = self._merge_cost(a, b)
+        if cost <= 0:
+            return True  # 并集恰好被两者覆盖，不会多发像素
+        if cost > slack:
+            return False
+        u = self._union(a, b)
+        for i in self._bands_for(u[1], u[3]):
+            if self.bands[i] is None or not self._valid[i]:
+                return False
+        return True
+
+    def _merge_cheapest(self):
+        best = None
+        for i in range(len(self.dirty)):
+            for j in range(i + 1, len(self.dirty)):
+                a, b = self.dirty[i], self.dirty[j]
+                cost = self._merge_cost(a, b)
+                if (best is None or cost < best[0]) and self._can_merge(a, b, cost):
+                    best = (cost, i, j)
+        if best is None:
+            # 没有可安全合并的矩形，直接发送
+            self.flush()
+            return
+        _, i, j = best
+        rect = self._union(self.dirty[i], self.dirty[j])
+        del self.dirty[j]
+        del self.dirty[i]
+        self.dirty.append(rect)
+
+    # --- 刷新 ---
+    def flush(self):
+        """把所有脏矩形发送到屏幕，每个矩形只设置一次窗口。返回发送的窗口数。"""
+        dirty = self.dirty
+        if not dirty:
+            return 0
+        self.dirty = []
+        driver = self.driver
+        bh = self.band_height
+        for x0, y0, x1, y1 in dirty:
+            driver.set_window(x0, y0, x1 - 1, y1 - 1)
+            if self.palette is not None:
+                self._flush_indexed(x0, y0, x1, y1)
+                continue
+            full_rows = x0 == 0 and x1 == self.width
+            y = y0
+            while y < y1:
+                band = self.bands[y // bh]
+                band_end = min(band.y0 + band.height, y1)
+                if full_rows:
+                    # 整行宽度的矩形在分带内是连续内存，一次发送
+                    start = (y - band.y0) * band.stride
+                    driver._write_data(band._mv[start:(band_end - band.y0) * band.stride])
+                else:
+                    for yy in range(y, band_end):
+                        driver._write_data(band.row(yy, x0, x1))
+                y = band_end
+            self.stats['windows'] += 1
+            self.stats['pixels'] += (x1 - x0) * (y1 - y0)
+        driver._end()
+        self.stats['flushes'] += 1
+        return len(dirty)
+
+    def _flush_indexed(self, x0, y0, x1, y1):
+        """在已打开的窗口中逐行展开调色板像素，每 EXPAND_ROWS 行发送一次"""
+        out = self._expand
+        if out is None:
+            out = self._expand = memoryview(bytearray(self.width * 2 * self.EXPAND_ROWS))
+        limit = (x1 - x0) * 2 * self.EXPAND_ROWS
+        bh = self.band_height
+        fill = 0
+        for y in range(y0, y1):
+            fill += self.bands[y // bh].expand_row(y, x0, x1, out, fill)
+            if fill >= limit:
+                self.driver._write_data(out[:fill])
+                fill = 0
+        if fill:
+            self.driver._write_data(out[:fill])
+        self.stats['windows'] += 1
+        self.stats['pixels'] += (x1 - x0) * (y1 - y0)
@@ -0,0 +1,249 @@
+# bench_display.py
+# 显示相关的性能基准，可在主机 (CPython) 或 ESP32 上直接运行:
+#     python bench_display.py
+# UI 界面基准使用 sim_display 的仿真面板，只在电脑上运行。
+import time
+
+from rgb565 import MonoExpander
+
+try:
+    _ticks_us = time.ticks_us
+    _ticks_diff = time.ticks_diff
+except AttributeError:  # CPython
+    def _ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def _ticks_diff(a, b):
+        return a - b
+
+
+def _make_mono(width, height, seed=12345):
+    """生成一块伪随机 MONO_HLSB 位图 (近似文字的稀疏像素)。"""
+    stride = (width + 7) // 8
+    buf = bytearray(stride * height)
+    state = seed
+    for i in range(len(buf)):
+        state = (state * 1103515245 + 12345) & 0x7FFFFFFF
+        buf[i] = (state >> 16) & (state >> 8) & 0xFF
+    return buf, stride
+
+
+def _expand_per_pixel(src, stride, width, height, fg, bg):
+    """旧实现：逐像素判断并手工写入两个字节 (等价于 fb.pixel 循环)。"""
+    out = bytearray(width * height * 2)
+    idx = 0
+    for py in range(height):
+        for px in range(width):
+            is_set = src[py * stride + (px >> 3)] & (0x80 >> (px & 7))
+            color = fg if is_set else bg
+            out[idx] = (color >> 8) & 0xFF
+            out[idx + 1] = color & 0xFF
+            idx += 2
+    return out
+
+
+def _timeit(fn, repeat):
+    start = _ticks_us()
+    for _ in range(repeat):
+        fn()
+    return max(1, _ticks_diff(_ticks_us(), start))
+
+
+def bench_text_expand(width=240, height=16, repeat=20):
+    """对比逐像素展开与查找表展开的像素吞吐量 (默认一行 30 个字符、16 像素高)。"""
+    fg, bg = 0x0000, 0xFFFF
+    src, stride = _make_mono(width, height)
+    expander = MonoExpander()
+    expander.table(fg, bg)  # 查找表只在首次使用时生成，不计入测量
+
+    assert _expand_per_pixel(src, stride, width, height, fg, bg) == \
+        expander.expand(src, stride, width, height, fg, bg)
+
+    pixels = width * height * repeat
+    old_us = _timeit(lambda: _expand_per_pixel(src, stride, width, height, fg, bg), repeat)
+    new_us = _timeit(lambda: expander.expand(src, stride, width, height, fg, bg), repeat)
+    old_rate = pixels * 1000000 // old_us
+    new_rate = pixels * 1000000 // new_us
+    print("文本展开 {}x{} x{}:".format(width, height, repeat))
+    print("  逐像素  : {:>10} px/s".format(old_rate))
+    print("  查找表  : {:>10} px/s  ({:.1f}x)".format(new_rate, new_rate / old_rate))
+    return old_rate, new_rate
+
+
+def _ui_screens(ui, menu_items):
+    """按玩家实际经过的顺序生成 (名称, 绘制函数)，覆盖主菜单和三个游戏的每个界面。"""
+    from game_trust_evolution import GameTrustEvolution
+    from game_points_showdown import GamePointsShowdown
+    from game_auction import AuctionGame
+
+    def state(game, value, **fields):
+        def draw():
+            game.current_game_state = value
+            for name, field in fields.items():
+                setattr(game, name, field)
+            game._update_display()
+        return draw
+
+    screens = [
+        ('welcome', ui.show_welcome_screen),
+        ('menu', lambda: ui.draw_menu(menu_items, 0, title="gambling bot")),
+        ('menu move', lambda: ui.draw_menu(menu_items, 1, title="gambling bot")),
+    ]
+
+    te = GameTrustEvolution(ui, None)
+    screens += [
+        ('te init', state(te, te.STATE_INIT)),
+        ('te choice', state(te, te.STATE_PLAYER_CHOICE)),
+        ('te choice move', state(te, te.STATE_PLAYER_CHOICE, player_current_selection=1)),
+        ('te result', state(te, te.STATE_SHOW_ROUND_RESULT, this_round_player_choice='C',
+                            this_round_comp_choice='D', this_round_computer_score_gain=5)),
+        ('te game over', state(te, te.STATE_GAME_OVER)),
+    ]
+
+    ps = GamePointsShowdown(ui, None)
+    screens += [
+        ('ps init', state(ps, ps.STATE_INIT)),
+        ('ps bet', state(ps, ps.STATE_PLAYER_BET, current_bet_selection=5)),
+        ('ps bet +1', state(ps, ps.STATE_PLAYER_BET, current_bet_selection=6)),
+        ('ps machine', state(ps, ps.STATE_MACHINE_BET, player_bet=6, machine_bet=4, round_result="You win!")),
+        ('ps result', state(ps, ps.STATE_SHOW_RESULT, current_round=1)),
+        ('ps game over', state(ps, ps.STATE_GAME_OVER)),
+    ]
+
+    au = AuctionGame(ui, None)
+    au._reset_game()
+    item = au.players[0]['items'][0]
+    screens += [
+        ('au init', state(au, au.STATE_INIT)),
+        ('au select', state(au, au.STATE_PLAYER_SELECT)),
+        ('au select move', state(au, au.STATE_PLAYER_SELECT, selected_item_idx=1)),
+        ('au confirm', state(au, au.STATE_ITEM_CONFIRM, selected_item_idx=0)),
+        ('au auction', state(au, au.STATE_AUCTION, auction_item=item, current_bidder_idx=0, current_bid=5)),
+        ('au auction +1', state(au, au.STATE_AUCTION, current_bid=6)),
+        ('au auction ai', state(au, au.STATE_AUCTION, current_bidder_idx=1, highest_bidder=0)),
+        ('au bid confirm', state(au, au.STATE_BID_CONFIRM, current_bidder_idx=0)),
+        ('au result', state(au, au.STATE_ROUND_RESULT)),
+        ('au game over', state(au, au.STATE_GAME_OVER)),
+    ]
+    return screens
+
+
+def bench_ui_screens(frames_dir=None, back_buffer=False, indexed=False):
+    """
+    在仿真面板上依次绘制每个 UI 界面，统计 SPI 事务数、字节数和按 main.SPI_BAUDRATE 估算的耗时。
+    Args:
+        frames_dir (str, optional): 指定时把每个界面导出为 PNG，便于对比画面。
+        back_buffer (bool): 是否启用整帧后备缓冲区 (对比直接写屏)。
+        indexed (bool): 后备缓冲区使用 4 位调色板模式。
+    Returns:
+        list: 每个界面一项 (名称, 统计 dict, 线上毫秒, 估算毫秒)。
+    """
+    from sim_display import make_display
+    st7789, panel = make_display()
+    import main
+    panel.spi.baudrate = main.SPI_BAUDRATE
+    from ui_manager import UIManager
+    if back_buffer:
+        st7789.enable_back_buffer(indexed=indexed)
+    ui = UIManager(st7789)
+
+    results = []
+    mode = ('调色板缓冲' if indexed else '后备缓冲') if back_buffer else '直接写屏'
+    print("UI 界面 ({}) @ {} MHz:".format(mode, panel.spi.baudrate // 1000000))
+    print("  {:<16}{:>6}{:>8}{:>9}{:>9}{:>9}".format('screen', 'cs', 'writes', 'bytes', 'wire ms', 'est ms'))
+    for name, draw in _ui_screens(ui, main.main_menu_items):
+        panel.reset_stats()
+        draw()
+        ui.present()
+        stats = panel.stats
+        wire = panel.wire_ms()
+        est = panel.latency_ms()
+        results.append((name, stats, wire, est))
+        print("  {:<16}{:>6}{:>8}{:>9}{:>9.2f}{:>9.2f}".format(
+            name, stats['transactions'], stats['writes'], stats['bytes'], wire, est))
+        if frames_dir:
+            panel.save_png("{}/{}.png".format(frames_dir, name.replace(' ', '_')))
+    cache = st7789.glyph_cache.stats()
+    if cache['hits'] + cache['misses']:
+        print("  字形缓存: 命中 {hits}, 未命中 {misses}, 淘汰 {evictions}, {bytes}/{max_bytes} 字节".format(**cache))
+    return results
+
+
+def bench_async_flush(strip_bytes=4096, baudrate=None):
+    """
+    后台发送的正确性和重叠测试：两块 write() 按波特率真正等待的仿真面板，一块同步发送，
+    一块 enable_async_flush()，依次绘制所有 UI 界面。每个界面之后两块面板必须逐像素一致，
+    且后台发送必须出现绘制与传输的重叠 (async_stats()['overlapped'] > 0)，否则抛出 AssertionError。
+    电脑上仿真面板的解码也在工作线程里执行、与绘制争抢 GIL，两个耗时只作参考，不代表设备上的加速。
+    Args:
+        baudrate (int, optional): 仿真 SPI 的波特率，默认 main.SPI_BAUDRATE。
+    Returns:
+        tuple: (同步总耗时 ms, 后台发送总耗时 ms, async_stats())，均为本机时间。
+    """
+    from sim_display import make_display
+    from input_replay import seed_rng
+    import main
+    from ui_manager import UIManager
+
+    baudrate = baudrate or main.SPI_BAUDRATE
+    sync_dev, sync_panel = make_display(baudrate=baudrate, spi_latency=True)
+    async_dev, async_panel = make_display(baudrate=baudrate, spi_latency=True)
+    async_dev.enable_async_flush(strip_bytes)
+    seed_rng(1) # 两组界面里的拍卖品要相同
+    sync_screens = _ui_screens(UIManager(sync_dev), main.main_menu_items)
+    seed_rng(1)
+    async_screens = _ui_screens(UIManager(async_dev), main.main_menu_items)
+
+    sync_us = async_us = 0
+    try:
+        for (name, draw_sync), (_, draw_async) in zip(sync_screens, async_screens):
+            start = _ticks_us()
+            draw_sync()
+            sync_us += _ticks_diff(_ticks_us(), start)
+            start = _ticks_us()
+            draw_async()
+            async_dev.wait_idle()
+            async_us += _ticks_diff(_ticks_us(), start)
+            assert async_panel.frame() == sync_panel.frame(), "后台发送的画面与同步发送不一致: " + name
+        stats = async_dev.async_stats()
+    finally:
+        async_dev.disable_async_flush()
+    assert stats['sent_bytes'] == async_panel.stats['bytes'], "后台线程发送的字节数与面板收到的不一致"
+    assert stats['overlapped'] > 0, "后台发送没有与绘制重叠"
+
+    print("后台发送 ({} 个界面 @ {} MHz, strip {} 字节):".format(
+        len(sync_screens), baudrate // 1000000, strip_bytes))
+    print("  同步 {:.1f} ms, 后台 {:.1f} ms (本机)；重叠 {} 次, 等待空闲 strip {} 次, 画面一致".format(
+        sync_us / 1000, async_us / 1000, stats['overlapped'], stats['stalls']))
+    return sync_us / 1000, async_us / 1000, stats
+
+
+def bench_splash(path='splash.rle', chunk_size=1024):
+    """在仿真面板上绘制启动图，统计解码耗时 (本机) 和 SPI 传输量、估算的线上时间。"""
+    from sim_display import make_display
+    st7789, panel = make_display()
+    start = _ticks_us()
+    w, h = st7789.draw_rle(path, 0, 0, chunk_size)
+    decode_us = _ticks_diff(_ticks_us(), start)
+    print("启动图 {} ({}x{}, chunk {}):".format(path, w, h, chunk_size))
+    print("  解码+模拟传输: {:.1f} ms (本机)  SPI: {} 字节, {} 次 write, 估算 {:.2f} ms".format(
+        decode_us / 1000, panel.stats['bytes'], panel.stats['writes'], panel.latency_ms()))
+    return decode_us, panel.stats
+
+
+def main():
+    bench_text_expand()
+    if hasattr(time, 'perf_counter'): # 仿真基准只在电脑上运行
+        bench_ui_screens()
+        bench_ui_screens(back_buffer=True)
+        bench_ui_screens(back_buffer=True, indexed=True)
+        bench_async_flush()
+        bench_async_flush(strip_bytes=512) # 小 strip：频繁复用，压力测试 strip 的交接
+        try:
+            bench_splash()
+        except OSError:
+            print("没有 splash.rle，跳过启动图基准 (用 convert_image.py 生成)")
+
+
+if __name__ == '__main__':
+    main()
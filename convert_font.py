@@ -0,0 +1,109 @@
+# convert_font.py
+# 在电脑上把 BDF 点阵字体 (如文泉驿 / GNU Unifont 的 16 像素版本) 转换为 flash_font 使用的 .fnt 文件：
+#     python convert_font.py wenquanyi_12pt.bdf cjk16.fnt --subset *.py
+#     python convert_font.py unifont.bdf cjk16.fnt --chars "你好再见"
+# 只收录非 ASCII 字符 (ASCII 使用内置字体)。--subset/--chars 只收录用到的字，可以把字库缩小到几 KB；
+# 都不指定时收录 BDF 中的全部字符。
+import argparse
+
+from flash_font import write_font
+
+
+def parse_bdf(path):
+    """
+    读取 BDF 字体。
+    Returns:
+        tuple: (FONTBOUNDINGBOX (w, h, xoff, yoff), {码位: (BBX (w, h, xoff, yoff), [每行的整数位图])})
+    """
+    font_box = None
+    glyphs = {}
+    code = None
+    box = None
+    rows = None
+    with open(path, encoding='latin-1') as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            key = parts[0]
+            if rows is not None:
+                if key == 'ENDCHAR':
+                    if code is not None and code >= 0 and box is not None:
+                        glyphs[code] = (box, rows)
+                    rows = None
+                else:
+                    rows.append(int(key, 16))
+            elif key == 'FONTBOUNDINGBOX':
+                font_box = tuple(int(v) for v in parts[1:5])
+            elif key == 'STARTCHAR':
+                code = None
+                box = None
+            elif key == 'ENCODING':
+                code = int(parts[1])
+            elif key == 'BBX':
+                box = tuple(int(v) for v in parts[1:5])
+            elif key == 'BITMAP':
+                rows = []
+    if font_box is None:
+        raise ValueError("不是有效的 BDF 文件: 缺少 FONTBOUNDINGBOX")
+    return font_box, glyphs
+
+
+def render_glyph(font_box, glyph, width, height):
+    """把 BDF 字形按基线对齐放进 width x height 的单元格，返回 MONO_HLSB 点阵"""
+    fw, fh, fx, fy = font_box
+    (gw, gh, gx, gy), rows = glyph
+    row_bytes = (width + 7) // 8
+    out = bytearray(row_bytes * height)
+    top = (fh + fy) - (gy + gh) # 字形顶部相对单元格顶部的行数
+    left = gx - fx
+    src_bits = ((gw + 7) // 8) * 8
+    for r, bits in enumerate(rows[:gh]):
+        y = top + r
+        if not 0 <= y < height:
+            continue
+        for c in range(gw):
+            if bits & (1 << (src_bits - 1 - c)):
+                x = left + c
+                if 0 <= x < width:
+                    out[y * row_bytes + (x >> 3)] |= 0x80 >> (x & 7)
+    return bytes(out)
+
+
+def collect_chars(paths):
+    """收集文本文件中出现的所有非 ASCII 字符"""
+    chars = set()
+    for path in paths:
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            chars.update(c for c in f.read() if ord(c) > 127)
+    return chars
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把 BDF 点阵字体转换为 flash_font 的 .fnt 文件")
+    parser.add_argument('source')
+    parser.add_argument('output')
+    parser.add_argument('--subset', nargs='+', metavar='FILE', help="只收录这些文本文件中出现的字符")
+    parser.add_argument('--chars', default='', help="额外收录的字符")
+    parser.add_argument('--width', type=int, help="单元格宽度，默认取 FONTBOUNDINGBOX")
+    parser.add_argument('--height', type=int, help="单元格高度，默认取 FONTBOUNDINGBOX")
+    args = parser.parse_args()
+
+    font_box, bdf = parse_bdf(args.source)
+    width = args.width or font_box[0]
+    height = args.height or font_box[1]
+    if args.subset or args.chars:
+        wanted = collect_chars(args.subset or ()) | set(c for c in args.chars if ord(c) > 127)
+        codes = sorted(ord(c) for c in wanted)
+    else:
+        codes = sorted(c for c in bdf if c > 127)
+    missing = [c for c in codes if c not in bdf]
+    glyphs = {c: render_glyph(font_box, bdf[c], width, height) for c in codes if c in bdf}
+    size = write_font(args.output, width, height, glyphs)
+    print("{}: {} 个字形 {}x{}, {} 字节".format(args.output, len(glyphs), width, height, size))
+    if missing:
+        print("字体中没有的字符 ({} 个): {}".format(len(missing), ''.join(chr(c) for c in missing[:50])))
+
+
+if __name__ == '__main__':
+    main()
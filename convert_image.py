@@ -0,0 +1,117 @@
+# convert_image.py
+# 在电脑上把图片 (PNG/JPEG 等) 转换为屏幕可以直接流式绘制的格式：
+#     python convert_image.py 项目主视觉图.png splash.rle
+#     python convert_image.py logo.png logo.rgb565 --width 64 --height 64
+# .rle 由 ST7789.draw_rle 绘制，.rgb565 由 ST7789.draw_sprite 绘制。需要 Pillow (pip install pillow)。
+import argparse
+import struct
+
+PANEL_WIDTH = 240
+PANEL_HEIGHT = 320
+MAX_PACKET = 128 # 每个数据包最多 128 个像素 (控制字节低 7 位 + 1)
+
+
+def rgb_to_565(r, g, b, invert=True):
+    """
+    RGB888 -> RGB565。
+    本项目的屏幕是反色显示的 (驱动里 WHITE = 0x0000)，默认把颜色取反后再存储。
+    """
+    value = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+    return value ^ 0xFFFF if invert else value
+
+
+def load_image(path, width=PANEL_WIDTH, height=PANEL_HEIGHT, rotate=True, fit='cover'):
+    """
+    读取图片并缩放到 width x height。
+    Args:
+        rotate (bool): 图片与屏幕横竖方向不一致时旋转 90 度以充分利用屏幕。
+        fit (str): 'cover' 裁掉多余部分填满屏幕；'contain' 完整显示并用黑色补边。
+    Returns:
+        list: 按行排列的 (r, g, b) 像素。
+    """
+    from PIL import Image
+    img = Image.open(path).convert('RGB')
+    if rotate and (img.width > img.height) != (width > height):
+        img = img.transpose(Image.Transpose.ROTATE_90)
+    scale = (max if fit == 'cover' else min)(width / img.width, height / img.height)
+    size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    img = img.resize(size, Image.Resampling.LANCZOS)
+    canvas = Image.new('RGB', (width, height))
+    canvas.paste(img, ((width - size[0]) // 2, (height - size[1]) // 2))
+    return list(canvas.getdata())
+
+
+def encode_rle(pixels):
+    """
+    把 RGB565 像素序列编码为 draw_rle 使用的数据包 (不含文件头)。
+    连续 3 个以上相同的像素编为重复包，其余像素合并为原样包。
+    """
+    out = bytearray()
+    literal = []
+
+    def flush_literal():
+        for start in range(0, len(literal), MAX_PACKET):
+            part = literal[start:start + MAX_PACKET]
+            out.append(len(part) - 1)
+            for value in part:
+                out.extend(struct.pack('>H', value))
+        del literal[:]
+
+    i = 0
+    count = len(pixels)
+    while i < count:
+        value = pixels[i]
+        run = 1
+        while i + run < count and run < MAX_PACKET and pixels[i + run] == value:
+            run += 1
+        if run >= 3:
+            flush_literal()
+            out.append(0x80 | (run - 1))
+            out.extend(struct.pack('>H', value))
+        else:
+            literal.extend(pixels[i:i + run])
+        i += run
+    flush_literal()
+    return bytes(out)
+
+
+def write_rle(path, width, height, pixels):
+    """写出 .rle 文件，返回文件大小"""
+    data = struct.pack('>2sHH', b'RL', width, height) + encode_rle(pixels)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def write_rgb565(path, width, height, pixels):
+    """写出未压缩的 .rgb565 文件，返回文件大小"""
+    data = struct.pack('>HH', width, height) + b''.join(struct.pack('>H', v) for v in pixels)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把图片转换为 ST7789 可流式绘制的 .rle / .rgb565 文件")
+    parser.add_argument('source')
+    parser.add_argument('output', help="输出文件，扩展名 .rle 为游程编码，否则为未压缩的 .rgb565")
+    parser.add_argument('--width', type=int, default=PANEL_WIDTH)
+    parser.add_argument('--height', type=int, default=PANEL_HEIGHT)
+    parser.add_argument('--fit', choices=('cover', 'contain'), default='cover')
+    parser.add_argument('--no-rotate', action='store_true', help="不自动旋转")
+    parser.add_argument('--no-invert', action='store_true', help="屏幕不是反色显示时使用")
+    args = parser.parse_args()
+
+    rgb = load_image(args.source, args.width, args.height, not args.no_rotate, args.fit)
+    pixels = [rgb_to_565(r, g, b, not args.no_invert) for r, g, b in rgb]
+    if args.output.endswith('.rle'):
+        size = write_rle(args.output, args.width, args.height, pixels)
+    else:
+        size = write_rgb565(args.output, args.width, args.height, pixels)
+    raw = args.width * args.height * 2
+    print("{}: {}x{}, {} 字节 (未压缩 {} 字节, {:.0%})".format(
+        args.output, args.width, args.height, size, raw, size / raw))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,12 @@ import time
 import ustruct as struct
 from machine import Pin, SPI
 
-from framebuf import FrameBuffer, MONO_HLSB # 导入 FrameBuffer 和 MONO_HLSB 模式
+from rgb565 import MonoExpander, FillLines, fill565 # 单色位图 -> RGB565 查找表展开 / 纯色填充
+from font_atlas import FontAtlas, FALLBACK_CHAR # 预缩放的内置字体图集
+from flash_font import FlashFont # 存放在 flash 中的宽字符 (中文) 点阵字体
+from backbuffer import BackBuffer, Palette # 可选的内存后备缓冲区
+from async_flush import AsyncFlusher # 可选的后台发送线程
+from glyph_cache import GlyphCache # 已展开为 RGB565 的字形 LRU 缓存
 
 class ST7789:
     # 命令常量
@@ -26,6 +31,8 @@ class ST7789:
     PTLAR = 0x30
     COLMOD = 0x3A
     MADCTL = 0x36
+    VSCRDEF = 0x33 # 垂直滚动区域定义
+    VSCSAD = 0x37  # 垂直滚动起始地址
     
     # 颜色定义 (RGB565)
     WHITE = 0x0000
@@ -36,11 +43,13 @@ class ST7789:
     GREEN = 0xF81F
     BLUE = 0xFFE0
     BLACK = 0xFFFF
+    PALETTE = (BLACK, WHITE, YELLOW, CYAN, MAGENTA, RED, GREEN, BLUE) # 调色板缓冲区的预置颜色
     # 精简版字体数据（仅包含数字和大小写字母）
     # 空格 (ASCII 32)
     
     
-    def __init__(self, spi, width, height, reset=None, dc=None, cs=None, backlight=None, rotation=0):
+    def __init__(self, spi, width, height, reset=None, dc=None, cs=None, backlight=None, rotation=0,
+                 glyph_cache_bytes=16 * 1024):
         """
         初始化ST7789显示屏
         参数:
@@ -52,6 +61,7 @@ class ST7789:
             cs: 片选引脚
             backlight: 背光控制引脚
             rotation: 屏幕旋转方向 (0-3)
+            glyph_cache_bytes: render_text 的字形缓存上限 (字节)，每个 8x16 字形占 256 字节，0 表示不缓存
         """
         self.spi = spi
         self.width = width
@@ -61,12 +71,35 @@ class ST7789:
         self.cs_pin = cs
         self.bl_pin = backlight
         self.rotation = rotation % 4
+        self._expander = MonoExpander()
+        self.font = FontAtlas.default()
+        self.font.glyphs(1, 2) # 预先生成 UI 使用的 8x16 字形
+        self.wide_font = None # 非 ASCII 字符使用的 FlashFont，None 表示显示为 '?'
+        self.glyph_cache = GlyphCache(glyph_cache_bytes)
+        self._fill_lines = FillLines()
+        self._chunk = None # 流式读取图像文件时复用的缓冲区
+        self.scroll_area = None # 硬件滚动区域 (顶部固定行数, 滚动行数, 底部固定行数)
+        self.scroll_start = 0   # 当前滚动起始行 (相对滚动区域顶部)
+        self._back = None # 后备缓冲区，None 表示直接写屏
+        self._async = None # 后台发送线程，None 表示同步发送
+
+        # 预分配的命令/参数/像素缓冲区，避免每次调用都分配内存
+        self._cmd_buf = bytearray(1)
+        self._arg_buf = bytearray(4)
+        self._pix_buf = bytearray(2)
+        self._cs_active = False # 当前是否处于片选事务中
+        self._dc_state = None   # DC 引脚当前电平，None 表示未知
+        self._win_x = None      # 最近一次 CASET 的 (起, 止)
+        self._win_y = None      # 最近一次 RASET 的 (起, 止)
+        self.spi_stats = None
+        self.reset_spi_stats()
         
         # 初始化GPIO
         if self.reset_pin:
             self.reset_pin.init(Pin.OUT, value=1)
         if self.dc_pin:
             self.dc_pin.init(Pin.OUT, value=0)
+            self._dc_state = 0
         if self.cs_pin:
             self.cs_pin.init(Pin.OUT, value=1)
         if self.bl_pin:
@@ -115,155 +148,703 @@ class ST7789:
         else:
             return 0xA0
     
+    def _begin(self):
+        """拉低片选，开始一次 SPI 事务 (已在事务中则不重复)"""
+        if not self._cs_active:
+            if self.cs_pin:
+                self.cs_pin(0)
+            self._cs_active = True
+            self.spi_stats['transactions'] += 1
+
+    def _end(self):
+        """释放片选，结束当前 SPI 事务"""
+        if self._cs_active:
+            if self.cs_pin:
+                self.cs_pin(1)
+            self._cs_active = False
+        if self._async:
+            self._async.commit() # 把未满的 strip 也交给后台线程
+
+    def _set_dc(self, value):
+        if self._dc_state != value:
+            if self.dc_pin:
+                self.dc_pin(value)
+            self._dc_state = value
+
+    def _send_command(self, command):
+        """在当前事务中发送一个命令字节 (复用预分配缓冲区)"""
+        self._set_dc(0)
+        self._cmd_buf[0] = command
+        self.spi.write(self._cmd_buf)
+        stats = self.spi_stats
+        stats['commands'] += 1
+        stats['bytes'] += 1
+        if command == self.SWRESET:
+            self._win_x = self._win_y = None # 复位后窗口寄存器恢复默认值
+
+    def _send_data(self, data):
+        """在当前事务中发送数据"""
+        self._set_dc(1)
+        self.spi.write(data)
+        stats = self.spi_stats
+        stats['data_writes'] += 1
+        stats['bytes'] += len(data)
+
     def _write_command(self, command, data=None):
-        """写入命令到显示屏"""
-        if self.dc_pin:
-            self.dc_pin(0)
-        if self.cs_pin:
-            self.cs_pin(0)
-        
-        self.spi.write(bytearray([command]))
-        
-        if self.cs_pin:
-            self.cs_pin(1)
-        
+        """写入命令 (及其参数) 到显示屏，命令和参数在同一次片选事务中发送"""
+        self._begin()
+        self._send_command(command)
         if data is not None:
-            self._write_data(data)
-    
+            self._send_data(data)
+        self._end()
+
     def _write_data(self, data):
-        """写入数据到显示屏"""
-        if self.dc_pin:
-            self.dc_pin(1)
-        if self.cs_pin:
-            self.cs_pin(0)
-        
-        self.spi.write(data)
-        
-        if self.cs_pin:
-            self.cs_pin(1)
-    
+        """
+        写入数据到显示屏。
+        如果 set_window 打开的事务尚未结束，数据直接接在 RAMWR 后面发送，不再切换片选。
+        """
+        self._begin()
+        self._send_data(data)
+
     def set_window(self, x0, y0, x1, y1):
-        """设置显示窗口"""
+        """
+        设置显示窗口并发送 RAMWR，之后的 _write_data 在同一事务中写入像素。
+        与上一次窗口相同的 CASET/RASET 会被跳过。
+        """
         # 根据旋转调整坐标
         if self.rotation in (1, 3):
             x0, y0 = y0, x0
             x1, y1 = y1, x1
-        
-        self._write_command(self.CASET, struct.pack(">HH", x0, x1))
-        self._write_command(self.RASET, struct.pack(">HH", y0, y1))
-        self._write_command(self.RAMWR)
-    
+
+        self._end()
+        self._begin()
+        args = self._arg_buf
+        if self._win_x != (x0, x1):
+            self._send_command(self.CASET)
+            struct.pack_into(">HH", args, 0, x0, x1)
+            self._send_data(args)
+            self._win_x = (x0, x1)
+        else:
+            self.spi_stats['window_skips'] += 1
+        if self._win_y != (y0, y1):
+            self._send_command(self.RASET)
+            struct.pack_into(">HH", args, 0, y0, y1)
+            self._send_data(args)
+            self._win_y = (y0, y1)
+        else:
+            self.spi_stats['window_skips'] += 1
+        self._send_command(self.RAMWR)
+
+    def reset_spi_stats(self):
+        """
+        清零 SPI 计数器并返回清零前的值。
+        在一次绘制调用前后各调用一次即可得到该调用的事务数、命令数和字节数。
+        """
+        old = self.spi_stats
+        self.spi_stats = {
+            'transactions': 0,  # 片选事务数
+            'commands': 0,      # 命令字节数
+            'data_writes': 0,   # 数据 spi.write 调用次数
+            'bytes': 0,         # 总发送字节数
+            'window_skips': 0,  # 因窗口未变而省略的 CASET/RASET 次数
+        }
+        return old
+
     def pixel(self, x, y, color):
         """绘制单个像素"""
+        if self._back:
+            self._back.pixel(x, y, color)
+            return
         if 0 <= x < self.width and 0 <= y < self.height:
             self.set_window(x, y, x, y)
-            self._write_data(struct.pack(">H", color))
-    
+            pix = self._pix_buf
+            pix[0] = (color >> 8) & 0xFF
+            pix[1] = color & 0xFF
+            self._write_data(pix)
+            self._end()
+
     def fill(self, color):
-        """填充整个屏幕"""
+        """填充整个屏幕 (同时取消硬件滚动，使屏幕坐标与显存行重新对齐)"""
+        if self.scroll_area:
+            self.scroll_reset()
         self.fill_rect(0, 0, self.width, self.height, color)
     
     def fill_rect(self, x, y, width, height, color):
-        """填充矩形区域"""
-        x_end = min(x + width - 1, self.width - 1)
-        y_end = min(y + height - 1, self.height - 1)
-        
-        self.set_window(x, y, x_end, y_end)
-        
-        # 准备颜色数据
-        pixel_data = struct.pack(">H", color)
-        pixels = width * height
-        chunk_size = 512  # 每次发送的像素数
-        
-        # 分块发送数据以避免内存不足
-        for _ in range(0, pixels, chunk_size):
-            self._write_data(pixel_data * min(chunk_size, pixels))
-            pixels -= chunk_size
-    def text(self, text_string, x, y, text_color, bg_color=None, font_height=16):
-            """
-            在指定位置显示一行文本，仅支持英文/ASCII字符。
-            一次性绘制到内存缓冲区，再传输到屏幕。
-            Args:
-                text_string (str): 要显示的文本 (仅限ASCII)。
-                x (int): 起始 x 坐标。
-                y (int): 起始 y 坐标。
-                text_color (int): 文字颜色 (RGB565)。
-                bg_color (int, optional): 背景颜色 (RGB565)。如果为 None，则背景透明。
-                font_height (int): 字体高度 (framebuf.text 会缩放，建议是 8 的倍数)。
-            """
-            # --- 1. 计算文本区域尺寸 ---
-            # framebuf.text 默认的字体是 8x8。如果 font_height=16，则实际绘制尺寸是 16x16
-            # 我们可以根据 font_height 来估算字符宽度
-            char_width = font_height // 2 if font_height >= 8 else 8 # 假设一个字符宽度是高度的一半，至少8
-            text_pixel_width = len(text_string) * char_width
-
-            # 确保绘制区域在屏幕范围内
-            x_end = min(x + text_pixel_width, self.width)
-            y_end = min(y + font_height, self.height)
-            
-            draw_width = x_end - x
-            draw_height = y_end - y
-
-            if draw_width <= 0 or draw_height <= 0: # 区域无效
+        """填充矩形区域 (先裁剪到屏幕范围，只发送可见像素)"""
+        if self._back:
+            self._back.fill_rect(x, y, width, height, color)
+            return
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + width, self.width)
+        y1 = min(y + height, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        self.set_window(x0, y0, x1 - 1, y1 - 1)
+        self._stream_color(color, (x1 - x0) * (y1 - y0))
+        self._end()
+
+    def _stream_color(self, color, count):
+        """在已打开的窗口中连续发送 count 个 color 像素，复用该颜色的预填充行缓冲区"""
+        line = self._fill_lines.get(color)
+        chunk = self._fill_lines.pixels
+        while count >= chunk:
+            self._write_data(line)
+            count -= chunk
+        if count:
+            self._write_data(line[:count * 2])
+
+    def hline(self, x, y, width, color):
+        """绘制水平线"""
+        self.fill_rect(x, y, width, 1, color)
+
+    def vline(self, x, y, height, color):
+        """绘制垂直线"""
+        self.fill_rect(x, y, 1, height, color)
+
+    def rect_outline(self, x, y, width, height, color, thickness=1):
+        """
+        绘制矩形边框 (四条边各一次填充，不重复发送任何像素)。
+        边框宽度达到宽或高的一半时边框覆盖整个矩形，只填充一次。
+        """
+        if width <= 0 or height <= 0 or thickness <= 0:
+            return
+        t = thickness
+        if 2 * t >= width or 2 * t >= height:
+            self.fill_rect(x, y, width, height, color)
+            return
+        self.fill_rect(x, y, width, t, color)
+        self.fill_rect(x, y + height - t, width, t, color)
+        inner = height - 2 * t
+        self.fill_rect(x, y + t, t, inner, color)
+        self.fill_rect(x + width - t, y + t, t, inner, color)
+
+    def render_text(self, text_string, text_color, bg_color=None, font_height=16, max_width=None, max_height=None,
+                    scale=None, char_width=None, out=None):
+        """
+        把一行文本渲染为 RGB565 像素块（不发送到屏幕）。
+        ASCII 字形直接取自预缩放的字体图集，不再每次调用 FrameBuffer.text；
+        加载了宽字符字体 (load_wide_font) 时，非 ASCII 字符从 flash 读取点阵，
+        按原始大小绘制在字体宽度的单元格中，顶部对齐。
+        Args:
+            text_string (str): 要渲染的文本 (没有宽字符字体时非 ASCII 字符显示为 '?')。
+            text_color (int): 文字颜色 (RGB565)。
+            bg_color (int, optional): 背景颜色 (RGB565)，为 None 时使用黑色。
+            font_height (int): 字体高度。默认字符宽度为高度的一半，
+                               8x8 字体纵向放大 font_height // 8 倍 (16 -> 8x16)。
+            max_width (int, optional): 最大像素宽度，超出部分裁掉。
+            max_height (int, optional): 最大像素高度，超出部分裁掉。
+            scale (int, optional): 等比放大倍数 (2 -> 16x16, 3 -> 24x24)，指定时忽略 font_height。
+            char_width (int, optional): 字符单元格宽度，默认由字体尺寸决定。
+            out (bytearray, optional): 可复用的输出缓冲区，足够大时直接写入并返回它的 memoryview 切片。
+        Returns:
+            tuple: (buf, width, height)；区域无效时返回 None。
+        """
+        layout = self._text_layout(text_string, font_height, max_width, max_height, scale, char_width)
+        if layout is None:
+            return None
+        draw_width, draw_height, needs_fill = layout[:3]
+        bg = bg_color if bg_color is not None else self.BLACK
+        stride = draw_width * 2
+        size = stride * draw_height
+        if out is not None and len(out) >= size:
+            buf = memoryview(out)[:size]
+        else:
+            buf = bytearray(size)
+        if needs_fill:
+            fill565(buf, 0, size, bg) # 单元格比字形大，先铺背景
+        expand = self._expander.expand
+        cache = self.glyph_cache
+        sx, sy = layout[3:5]
+
+        # 展开后的字形块按 (字符, 颜色, 尺寸) 缓存：命中时每行一次切片拷贝；
+        # 未命中时通过查找表展开 (每个源字节一次切片拷贝 8 个像素)，再存入缓存
+        def put(char, bitmap, bitmap_stride, x0, w, h):
+            key = (char, text_color, bg, sx, sy, w, h)
+            glyph = cache.get(key)
+            if glyph is None:
+                glyph = expand(bitmap, bitmap_stride, w, h, text_color, bg)
+                cache.put(key, glyph, w, h)
+            else:
+                glyph = glyph[0]
+            glyph = memoryview(glyph)
+            span = w * 2
+            d = x0 * 2
+            for s in range(0, span * h, span):
+                buf[d:d + span] = glyph[s:s + span]
+                d += stride
+        self._each_glyph(text_string, layout, put)
+        return buf, draw_width, draw_height
+
+    def draw_text(self, text_string, x, y, text_color, bg_color=None, font_height=16, max_width=None,
+                  max_height=None, scale=None, char_width=None, out=None):
+        """
+        渲染并绘制一行文本，参数与 render_text 相同。
+        启用调色板后备缓冲区时，字形点阵直接写成调色板序号 (BackBuffer.blit_mono)，
+        不经过 RGB565 中间结果；否则等同于 render_text + blit_buffer。
+        Returns:
+            tuple: 绘制区域的 (宽, 高)；没有可绘制的内容时返回 None。
+        """
+        if not self.indexed_buffer():
+            rendered = self.render_text(text_string, text_color, bg_color, font_height, max_width, max_height,
+                                        scale, char_width, out)
+            if rendered is None:
+                return None
+            buf, w, h = rendered
+            self.blit_buffer(buf, x, y, w, h)
+            return w, h
+        layout = self._text_layout(text_string, font_height, max_width, max_height, scale, char_width)
+        if layout is None:
+            return None
+        draw_width, draw_height = layout[:2]
+        bg = bg_color if bg_color is not None else self.BLACK
+        # 先把整行拼成单色位图 (清零的位即背景)，再一次写入调色板缓冲区
+        line_stride = (draw_width + 7) >> 3
+        line = bytearray(line_stride * draw_height)
+
+        def put(char, bitmap, bitmap_stride, x0, w, h):
+            nbytes = (w + 7) >> 3
+            tail = w & 7
+            d = x0 >> 3
+            if not x0 & 7:
+                # 字形与字节对齐 (8 像素宽的字符)：每行一次切片拷贝
+                mask = (0xFF00 >> tail) & 0xFF if tail else 0xFF
+                for r in range(h):
+                    s = r * bitmap_stride
+                    line[d:d + nbytes] = bitmap[s:s + nbytes]
+                    if tail:
+                        line[d + nbytes - 1] &= mask
+                    d += line_stride
                 return
+            shift = 8 - (x0 & 7)
+            keep = ~((1 << (nbytes * 8 - w)) - 1) # 只保留单元格内的 w 个像素
+            count = min(nbytes + 1, line_stride - d)
+            for r in range(h):
+                s = r * bitmap_stride
+                v = (int.from_bytes(bytes(bitmap[s:s + nbytes]), 'big') & keep) << shift
+                packed = v.to_bytes(nbytes + 1, 'big')
+                for i in range(count):
+                    line[d + i] |= packed[i]
+                d += line_stride
+        self._each_glyph(text_string, layout, put)
+        self._back.blit_mono(line, line_stride, x, y, draw_width, draw_height, text_color, bg)
+        return draw_width, draw_height
 
-            # --- 2. 在内存中创建 FrameBuffer 并绘制文本 ---
-            # fb_buf_size: (宽度按8位对齐) * 高度
-            fb_buf_size = (draw_width + 7) // 8 * draw_height
-            fb_buf = bytearray(fb_buf_size)
-            fb = FrameBuffer(fb_buf, draw_width, draw_height, MONO_HLSB)
-            
-            # 填充内存缓冲区：如果背景是透明，就用0填充；如果指定了背景色，也用0填充（因为是单色模式）
-            fb.fill(0) 
-
-            # 绘制文本到内存缓冲区
-            # fb.text(string, x_on_buffer, y_on_buffer, color_on_buffer)
-            # color_on_buffer 1表示前景色（文字），0表示背景色
-            fb.text(text_string, 0, 0, 1) # 文字颜色设为 FrameBuffer 的前景色（1）
-
-            # --- 3. 设置屏幕显示窗口 ---
-            self.set_window(x, y, x_end - 1, y_end - 1)
-
-            # --- 4. 将 FrameBuffer 数据转换为 RGB565 字节流并一次性发送 ---
-            pixel_data_buffer = bytearray(draw_width * draw_height * 2) # 每像素 2 字节 (RGB565)
-            idx = 0
-            for py in range(draw_height):
-                for px in range(draw_width):
-                    # 检查 FrameBuffer 中的像素是否被设置 (文字部分)
-                    is_pixel_set = (fb.pixel(px, py) == 1)
-                    
-                    # 确定最终像素颜色
-                    # 如果是文字像素，用 text_color；否则，如果指定了 bg_color，用 bg_color，否则用屏幕默认的黑
-                    target_color = text_color if is_pixel_set else (bg_color if bg_color is not None else self.BLACK)
-                    
-                    # 将 RGB565 颜色（一个整数）拆分为两个字节
-                    pixel_data_buffer[idx] = (target_color >> 8) & 0xFF # 高字节
-                    pixel_data_buffer[idx+1] = target_color & 0xFF      # 低字节
-                    idx += 2
-            
-            # 一次性发送所有像素数据，这将大大减少 SPI 事务开销
-            self._write_data(pixel_data_buffer)
-
-    def char(self, char,x, y, color, bg_color, font_size=16):
-        # 使用内置的8x8字体 (MicroPython内置字体)
-        from framebuf import FrameBuffer, MONO_HLSB
-        buf = bytearray(font_size * ((font_size + 7) // 8))
-        fbuf = FrameBuffer(buf, font_size, font_size, MONO_HLSB)
-        
-        fbuf.fill(0 if bg_color is not None else 0xFFFF)
-        fbuf.text(char, 0, 0)
-        
-        for yy in range(font_size):
-            for xx in range(font_size):
-                if buf[yy * ((font_size + 7) // 8) + xx // 8] & (1 << (7 - xx % 8)):
-                    self.pixel(x + xx, y + yy, color)
-                elif bg_color is not None:
-                    self.pixel(x + xx, y + yy, bg_color)
+    def _text_layout(self, text_string, font_height, max_width, max_height, scale, char_width):
+        """
+        计算一行文本的尺寸和字形参数 (render_text / draw_text 共用)。
+        Returns:
+            tuple: (宽, 高, 是否需要先铺背景, sx, sy, 字符宽度, 宽字符字体或 None)；区域无效时返回 None。
+        """
+        if scale:
+            sx = sy = scale
+            if char_width is None:
+                char_width = 8 * scale
+            font_height = 8 * scale
+        else:
+            if char_width is None:
+                char_width = font_height // 2 if font_height >= 8 else 8
+            sx = max(1, char_width // 8)
+            sy = max(1, font_height // 8)
+        wide = self.wide_font
+        if wide is not None and len(text_string.encode()) == len(text_string):
+            wide = None # 纯 ASCII，不需要逐字判断
+        if wide is None:
+            draw_width = len(text_string) * char_width
+        else:
+            wide_width = wide.width
+            draw_width = 0
+            for c in text_string:
+                draw_width += wide_width if ord(c) > 127 else char_width
+        if max_width is not None and draw_width > max_width:
+            draw_width = max_width
+        draw_height = font_height
+        if max_height is not None and draw_height > max_height:
+            draw_height = max_height
+        if draw_width <= 0 or draw_height <= 0:
+            return None
+        needs_fill = char_width > 8 * sx or draw_height > 8 * sy or wide is not None
+        return draw_width, draw_height, needs_fill, sx, sy, char_width, wide
+
+    def _each_glyph(self, text_string, layout, put):
+        """按 _text_layout 的结果逐字调用 put(字符, 点阵, 每行字节数, 相对 x, 宽, 高)"""
+        draw_width, draw_height, _, sx, sy, char_width, wide = layout
+        glyph_w = 8 * sx
+        glyph_h = 8 * sy
+        atlas = memoryview(self.font.glyphs(sx, sy))
+        glyph_bytes = sx * glyph_h
+        rows = min(glyph_h, draw_height)
+        x0 = 0
+        for char in text_string:
+            if x0 >= draw_width:
+                break
+            cell = char_width
+            if wide is not None and ord(char) > 127:
+                cell = wide.width
+                bitmap = wide.glyph(char)
+                if bitmap is not None:
+                    put(char, bitmap, wide.row_bytes, x0, min(cell, draw_width - x0), min(wide.height, draw_height))
+                    x0 += cell
+                    continue
+                char = FALLBACK_CHAR # 字库中没有的字：在宽字符单元格中显示 '?'
+            w = min(glyph_w, cell, draw_width - x0)
+            offset = self.font.index(char) * glyph_bytes
+            put(char, atlas[offset:offset + glyph_bytes], sx, x0, w, rows)
+            x0 += cell
+
+    def load_wide_font(self, path, cache_glyphs=64):
+        """
+        加载 flash 中的宽字符字体 (convert_font.py 生成的 .fnt)，之后 render_text/text 可以显示中文。
+        Args:
+            path (str): 字体文件路径。
+            cache_glyphs (int): 内存中缓存的字形数。
+        Returns:
+            FlashFont: 加载的字体。
+        Raises:
+            OSError: 文件不存在。
+            ValueError: 文件格式不正确。
+        """
+        font = FlashFont(path, cache_glyphs)
+        if self.wide_font is not None:
+            self.wide_font.close()
+        self.wide_font = font
+        self.glyph_cache.clear() # 同一字符可能改用宽字符字形
+        return font
+
+    def text(self, text_string, x, y, text_color, bg_color=None, font_height=16, scale=None):
+        """
+        在指定位置显示一行文本 (ASCII；加载了宽字符字体时也可以显示中文)。
+        一次性绘制到内存缓冲区，再传输到屏幕。
+        Args:
+            text_string (str): 要显示的文本。
+            x (int): 起始 x 坐标。
+            y (int): 起始 y 坐标。
+            text_color (int): 文字颜色 (RGB565)。
+            bg_color (int, optional): 背景颜色 (RGB565)。如果为 None，则使用黑色背景。
+            font_height (int): 字体高度 (建议是 8 的倍数，16 即 8x16 的字符)。
+            scale (int, optional): 等比放大倍数，见 render_text。
+        """
+        if x >= self.width or y >= self.height:
+            return
+        # 一次性发送所有像素数据 (一个窗口)，减少 SPI 事务开销；左侧/上方超出屏幕的部分由 blit_buffer 裁掉
+        self.draw_text(text_string, x, y, text_color, bg_color, font_height, self.width - x, self.height - y, scale)
+
+    def blit_buffer(self, buf, x, y, w, h):
+        """
+        把 w*h 的 RGB565 (大端) 像素块绘制到 (x, y)，超出屏幕的部分被裁掉。
+        Args:
+            buf: bytes / bytearray / memoryview，长度至少 w*h*2。
+        """
+        if self._back:
+            self._back.blit(buf, x, y, w, h)
+            return
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        self.set_window(x0, y0, x1 - 1, y1 - 1)
+        stride = w * 2
+        if x0 == x and x1 == x + w:
+            # 行未被裁剪，像素在源缓冲区中是连续的
+            if y0 == y and y1 == y + h and len(buf) == stride * h:
+                self._write_data(buf)
+            else:
+                self._write_data(memoryview(buf)[(y0 - y) * stride:(y1 - y) * stride])
+        else:
+            mv = memoryview(buf)
+            offset = (y0 - y) * stride + (x0 - x) * 2
+            span = (x1 - x0) * 2
+            for _ in range(y1 - y0):
+                self._write_data(mv[offset:offset + span])
+                offset += stride
+        self._end()
+
+    def char(self, char, x, y, color, bg_color, font_size=16):
+        """
+        在 font_size x font_size 的单元格中绘制一个字符 (内置 8x8 字体)。
+        bg_color 不为 None 时整个单元格作为一个像素块发送；
+        为 None 时背景透明，只按行发送文字像素的连续段。
+        """
+        if bg_color is not None:
+            # 字形占单元格顶部 8 行，其余行填背景色，整个单元格一次发送
+            cell = bytearray(font_size * font_size * 2)
+            rows = min(8, font_size)
+            self.render_text(char, color, bg_color, font_size, max_height=rows, scale=1, char_width=font_size,
+                             out=cell)
+            glyph_bytes = rows * font_size * 2
+            if glyph_bytes < len(cell):
+                fill565(cell, glyph_bytes, len(cell) - glyph_bytes, bg_color)
+            self.blit_buffer(cell, x, y, font_size, font_size)
+            return
+        glyph = self.font.glyphs(1, 1)
+        base = self.font.index(char) * 8
+        size = min(8, font_size) # 裁剪到单元格内
+        for yy in range(size):
+            bits = glyph[base + yy]
+            run_start = -1
+            for xx in range(size + 1):
+                is_set = xx < size and bits & (0x80 >> xx)
+                if is_set and run_start < 0:
+                    run_start = xx
+                elif not is_set and run_start >= 0:
+                    self.fill_rect(x + run_start, y + yy, xx - run_start, 1, color)
+                    run_start = -1
+
+    def draw_sprite(self, path, x, y, chunk_size=1024):
+        """
+        从闪存中的 .rgb565 文件流式绘制图像，内存占用只有一个 chunk_size 大小的缓冲区。
+        文件格式: 4 字节文件头 (宽, 高，均为大端 uint16)，随后是按行存储的大端 RGB565 像素。
+        Args:
+            path (str): 图像文件路径。
+            x, y (int): 左上角坐标，超出屏幕的部分被裁掉。
+            chunk_size (int): 每次读取的字节数。
+        Returns:
+            tuple: 图像的 (宽, 高)。
+        """
+        with open(path, 'rb') as f:
+            header = f.read(4)
+            w, h = struct.unpack(">HH", header)
+            stride = w * 2
+            visible = (0 <= x and 0 <= y and x + w <= self.width and y + h <= self.height)
+            if visible and not self._back:
+                # 完全可见：一个窗口，按块连续发送
+                buf = self._chunk_buffer(chunk_size)
+                self.set_window(x, y, x + w - 1, y + h - 1)
+                remaining = stride * h
+                while remaining > 0:
+                    n = f.readinto(buf[:min(chunk_size, remaining)])
+                    if not n:
+                        break
+                    self._write_data(buf[:n])
+                    remaining -= n
+                self._end()
+            else:
+                # 需要裁剪或写入后备缓冲区：按整行分块交给 blit_buffer；
+                # 一行比 chunk_size 还宽时每行再按列分段，缓冲区不超过 chunk_size
+                if stride <= chunk_size:
+                    rows, span = chunk_size // stride, w
+                else:
+                    rows, span = 1, max(1, chunk_size // 2)
+                buf = self._chunk_buffer(rows * span * 2)
+                row = 0
+                while row < h:
+                    n = min(rows, h - row)
+                    col = 0
+                    while col < w:
+                        cw = min(span, w - col)
+                        size = n * cw * 2
+                        got = f.readinto(buf[:size])
+                        if got < size:
+                            return w, h
+                        self.blit_buffer(buf[:got], x + col, y + row, cw, n)
+                        col += cw
+                    row += n
+        return w, h
+
+    def draw_rle(self, path, x, y, chunk_size=1024):
+        """
+        从闪存中的 .rle 文件流式绘制游程编码的图像 (由 convert_image.py 生成)。
+        读取和解码各用一个约 chunk_size 字节的缓冲区，内存占用与图像大小无关。
+        文件格式: 6 字节文件头 (b'RL', 宽, 高，均为大端 uint16)，随后是跨行连续的数据包：
+        控制字节最高位为 1 表示 (低 7 位 + 1) 个相同像素，后跟 2 字节颜色；
+        最高位为 0 表示 (低 7 位 + 1) 个原样像素，后跟这些像素的 RGB565 数据。
+        Args:
+            path (str): 图像文件路径。
+            x, y (int): 左上角坐标，超出屏幕的部分被裁掉。
+            chunk_size (int): 每次读取的字节数 (至少 257，即一个最长的原样数据包)。
+        Returns:
+            tuple: 图像的 (宽, 高)。
+        Raises:
+            OSError: 文件不存在。
+            ValueError: 不是 RLE 文件或文件被截断 (截断前的部分已经绘制)。
+        """
+        chunk_size = max(chunk_size, 257)
+        with open(path, 'rb') as f:
+            header = f.read(6)
+            if len(header) != 6 or header[:2] != b'RL':
+                raise ValueError("不是 RLE 图像文件")
+            w, h = struct.unpack(">HH", header[2:])
+            stride = w * 2
+            band_size = max(1, chunk_size // stride) * stride # 解码输出按整行分块
+            buf = self._chunk_buffer(chunk_size + band_size)
+            src = buf[:chunk_size]
+            out = buf[chunk_size:chunk_size + band_size]
+            direct = (0 <= x and 0 <= y and x + w <= self.width and y + h <= self.height
+                      and not self._back)
+            if direct:
+                self.set_window(x, y, x + w - 1, y + h - 1) # 完全可见：一个窗口连续发送
+            remaining = stride * h # 尚未解码的输出字节数
+            have = pos = 0 # src 中的有效字节数 / 当前读取位置
+            fill = 0 # out 中已解码的字节数
+            row = 0 # 已绘制的行数 (裁剪路径)
+            while remaining > 0:
+                if have - pos < 3 or (not src[pos] & 0x80 and have - pos < 3 + src[pos] * 2):
+                    # 数据包可能跨越读取块：把剩余字节移到开头再读
+                    left = have - pos
+                    src[:left] = src[pos:have]
+                    have = left + f.readinto(src[left:])
+                    pos = 0
+                    if have == left:
+                        break # 文件被截断，结束窗口后报错
+                c = src[pos]
+                n = ((c & 0x7F) + 1) * 2
+                if c & 0x80:
+                    color = (src[pos + 1] << 8) | src[pos + 2]
+                    pos += 3
+                else:
+                    pos += 1
+                n = min(n, remaining)
+                remaining -= n
+                while n:
+                    k = min(n, band_size - fill)
+                    if c & 0x80:
+                        fill565(out, fill, k, color)
+                    else:
+                        out[fill:fill + k] = src[pos:pos + k]
+                        pos += k
+                    fill += k
+                    n -= k
+                    if fill == band_size or remaining == 0:
+                        if direct:
+                            self._write_data(out[:fill])
+                        else:
+                            lines = fill // stride
+                            self.blit_buffer(out[:fill], x, y + row, w, lines)
+                            row += lines
+                        fill = 0
+            if direct:
+                self._end()
+            if remaining > 0:
+                raise ValueError("RLE 图像文件被截断")
+        return w, h
+
+    def _chunk_buffer(self, size):
+        """返回至少 size 字节的可复用读取缓冲区 (memoryview)"""
+        if self._chunk is None or len(self._chunk) < size:
+            self._chunk = memoryview(bytearray(size))
+        return self._chunk
+
+    def define_scroll_area(self, top_fixed, scroll_height, bottom_fixed=None):
+        """
+        定义硬件垂直滚动区域 (仅支持竖屏 rotation=0)。
+        Args:
+            top_fixed (int): 顶部不滚动的行数。
+            scroll_height (int): 滚动区域的行数。
+            bottom_fixed (int, optional): 底部不滚动的行数，默认为剩余行数。
+        """
+        if self.rotation != 0:
+            raise ValueError("硬件滚动只支持 rotation=0")
+        if bottom_fixed is None:
+            bottom_fixed = self.height - top_fixed - scroll_height
+        if top_fixed < 0 or scroll_height <= 0 or bottom_fixed < 0 or \
+                top_fixed + scroll_height + bottom_fixed != self.height:
+            raise ValueError("滚动区域超出屏幕范围")
+        self.show() # 先把缓冲区中的内容发送出去
+        self._write_command(self.VSCRDEF, struct.pack(">HHH", top_fixed, scroll_height, bottom_fixed))
+        self.scroll_area = (top_fixed, scroll_height, bottom_fixed)
+        self.scroll_to(0)
+
+    def scroll_to(self, line):
+        """
+        把滚动区域的第 line 行 (显存行，相对滚动区域顶部) 显示在区域最上方。
+        只发送一条 VSCSAD 命令，不重绘任何像素。
+        """
+        top, height, _ = self.scroll_area
+        self.scroll_start = line % height
+        self.show() # 滚动前确保新内容已经写入显存
+        struct.pack_into(">H", self._pix_buf, 0, top + self.scroll_start)
+        self._write_command(self.VSCSAD, self._pix_buf)
+
+    def scroll_row(self, y):
+        """把屏幕上看到的第 y 行换算为应写入的显存行 (未启用滚动时原样返回)"""
+        if not self.scroll_area:
+            return y
+        top, height, _ = self.scroll_area
+        if top <= y < top + height:
+            return top + (y - top + self.scroll_start) % height
+        return y
+
+    def scroll_reset(self):
+        """取消硬件滚动：整个屏幕作为一个滚动区域并把起始地址归零"""
+        self.scroll_area = None
+        self.scroll_start = 0
+        self.show()
+        self._write_command(self.VSCRDEF, struct.pack(">HHH", 0, self.height, 0))
+        self._write_command(self.VSCSAD, struct.pack(">H", 0))
+
+    def enable_back_buffer(self, band_height=None, max_bands=None, clear_color=None, indexed=False):
+        """
+        启用后备缓冲区：之后的绘制只写入 RAM，调用 show() 时合并脏矩形一次性发送。
+        Args:
+            band_height (int, optional): 分带高度；None 表示整帧缓冲 (240x320 需 150 KB)。
+            max_bands (int, optional): 最多驻留的分带数，内存不足时使用。
+            clear_color (int, optional): 启用时的清屏颜色，默认黑色。
+            indexed (bool): 使用 4 位调色板缓冲区 (整帧 38 KB，没有 PSRAM 也能整帧合成)。
+                            调色板预置类中的 8 种颜色，最多 16 种，超出的颜色用最接近的颜色代替。
+        """
+        color = self.BLACK if clear_color is None else clear_color
+        self._back = None
+        self.fill(color) # 先让屏幕与缓冲区的初始内容一致
+        palette = Palette(self.PALETTE) if indexed else None
+        self._back = BackBuffer(self, self.width, self.height, band_height, max_bands, color, palette)
+
+    def indexed_buffer(self):
+        """是否启用了 4 位调色板后备缓冲区"""
+        return self._back is not None and self._back.palette is not None
+
+    def disable_back_buffer(self):
+        """发送剩余的脏矩形并关闭后备缓冲区"""
+        if self._back:
+            self._back.flush()
+            self._back = None
+
+    def enable_async_flush(self, strip_bytes=4096, strips=2):
+        """
+        启用后台发送：SPI 写入和 DC/CS 电平变化按顺序进入队列，由 _thread 工作线程发送，
+        绘制代码填充一条 strip 的同时另一条正在传输。
+        Args:
+            strip_bytes (int): 每条 strip 缓冲区的字节数。
+            strips (int): strip 数量 (2 为双缓冲)。
+        """
+        if self._async:
+            return
+        self._end()
+        flusher = AsyncFlusher(self.spi, strip_bytes, strips)
+        self._sync_io = (self.spi, self.dc_pin, self.cs_pin)
+        self.spi = flusher
+        self.dc_pin = flusher.pin(self.dc_pin)
+        self.cs_pin = flusher.pin(self.cs_pin)
+        self._async = flusher
+
+    def disable_async_flush(self):
+        """等待队列发送完毕，停止工作线程并恢复同步发送"""
+        if not self._async:
+            return
+        self._end()
+        self._async.stop()
+        self.spi, self.dc_pin, self.cs_pin = self._sync_io
+        self._async = None
+
+    def wait_idle(self):
+        """等待后台线程发送完所有已提交的数据 (未启用后台发送时立即返回)"""
+        if self._async:
+            self._end()
+            self._async.wait_idle()
+
+    def async_stats(self):
+        """返回后台发送的队列深度和统计数据，未启用时返回 None"""
+        if not self._async:
+            return None
+        stats = dict(self._async.stats)
+        stats['depth'] = self._async.queue_depth()
+        return stats
 
-        
     def show(self):
-        """更新显示 (兼容性方法)"""
-        pass  # ST7789不需要显式刷新
+        """更新显示：启用后备缓冲区时发送所有脏矩形，否则无需操作"""
+        if self._back:
+            self._back.flush()
     
     def backlight(self, value):
         """控制背光"""
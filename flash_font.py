@@ -0,0 +1,161 @@
+# flash_font.py
+# 存放在 flash 文件系统中的点阵字体 (如中文 16x16)：字形按需 seek + readinto 读取，
+# 内存中只保留页表、一页索引和最近使用的少量字形，占用与字库大小无关。
+#
+# 文件格式 (大端，由 convert_font.py 从 BDF 字体生成)：
+#   文件头   '>4sBBH'  b'FNT1', 字形宽, 字形高, 字形数 N
+#   页表     257 x '>H' 按码位高字节分页，第 p 页的字形序号为 [page[p], page[p+1])
+#   索引     N 字节    每个字形码位的低字节，页内升序
+#   字形     N 个      MONO_HLSB 点阵，每行 (宽 + 7) // 8 字节，顺序与索引一致
+# 只支持基本多文种平面 (码位 < 0x10000)。
+
+import struct
+from array import array
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ucollections import OrderedDict
+
+MAGIC = b'FNT1'
+HEADER = '>4sBBH'
+HEADER_SIZE = 8
+PAGE_COUNT = 256
+
+
+class FlashFont:
+    """
+    按码位查找字形：先用常驻内存的页表确定所在页，再一次 readinto 读入该页的索引 (最多 256 字节)
+    并二分查找，最后一次 readinto 读入字形点阵。未命中缓存时每个字形最多两次 seek + readinto。
+    """
+
+    def __init__(self, path, cache_glyphs=64):
+        """
+        Args:
+            path (str): 字体文件路径。
+            cache_glyphs (int): 内存中缓存的字形数 (16x16 的字形每个 32 字节)。
+        Raises:
+            OSError: 文件不存在。
+            ValueError: 文件格式不正确。
+        """
+        self._file = open(path, 'rb')
+        header = self._file.read(HEADER_SIZE)
+        if len(header) != HEADER_SIZE:
+            self._file.close()
+            raise ValueError("字体文件格式不正确")
+        magic, self.width, self.height, self.count = struct.unpack(HEADER, header)
+        if magic != MAGIC:
+            self._file.close()
+            raise ValueError("字体文件格式不正确")
+        self.row_bytes = (self.width + 7) // 8
+        self.glyph_bytes = self.row_bytes * self.height
+        self._pages = array('H', struct.unpack('>%dH' % (PAGE_COUNT + 1),
+                                               self._file.read((PAGE_COUNT + 1) * 2)))
+        self._index_offset = HEADER_SIZE + (PAGE_COUNT + 1) * 2
+        self._glyph_offset = self._index_offset + self.count
+
+        self._index_buf = bytearray(256)
+        self._index_page = -1 # _index_buf 中当前是哪一页的索引
+        self._glyph_buf = bytearray(self.glyph_bytes)
+        self.cache_glyphs = cache_glyphs
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.reads = 0 # readinto 次数
+
+    def _find(self, code):
+        """返回码位对应的字形序号，字库中没有时返回 -1"""
+        if code > 0xFFFF:
+            return -1
+        page = code >> 8
+        start = self._pages[page]
+        n = self._pages[page + 1] - start
+        if n <= 0:
+            return -1
+        buf = self._index_buf
+        if self._index_page != page:
+            self._file.seek(self._index_offset + start)
+            self._file.readinto(memoryview(buf)[:n])
+            self.reads += 1
+            self._index_page = page
+        low = code & 0xFF
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if buf[mid] < low:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < n and buf[lo] == low:
+            return start + lo
+        return -1
+
+    def glyph(self, char):
+        """
+        返回字符的点阵 (bytes，MONO_HLSB，每行 row_bytes 字节)；字库中没有时返回 None。
+        """
+        code = ord(char)
+        cache = self._cache
+        if code in cache:
+            bitmap = cache.pop(code)
+            cache[code] = bitmap # 移动到最近使用的位置
+            self.hits += 1
+            return bitmap
+        self.misses += 1
+        index = self._find(code)
+        if index < 0:
+            bitmap = None
+        else:
+            self._file.seek(self._glyph_offset + index * self.glyph_bytes)
+            self._file.readinto(self._glyph_buf)
+            self.reads += 1
+            bitmap = bytes(self._glyph_buf)
+        if len(cache) >= self.cache_glyphs:
+            del cache[next(iter(cache))]
+        cache[code] = bitmap # 缺字也缓存，避免重复查找
+        return bitmap
+
+    def has(self, char):
+        """字库中是否有这个字符"""
+        return self._find(ord(char)) >= 0
+
+    def close(self):
+        self._file.close()
+
+    def stats(self):
+        """返回缓存命中/未命中、readinto 次数和当前缓存的字形数。"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'reads': self.reads,
+            'cached': len(self._cache),
+            'glyphs': self.count,
+        }
+
+
+def write_font(path, width, height, glyphs):
+    """
+    写出 FNT1 字体文件 (在电脑上由 convert_font.py 调用)。
+    Args:
+        glyphs (dict): 码位 -> MONO_HLSB 点阵 (bytes，每行 (width + 7) // 8 字节)。
+    Returns:
+        int: 文件大小 (字节)。
+    """
+    glyph_bytes = (width + 7) // 8 * height
+    codes = sorted(c for c in glyphs if c <= 0xFFFF)
+    pages = [0] * (PAGE_COUNT + 1)
+    for code in codes:
+        pages[(code >> 8) + 1] += 1
+    for p in range(PAGE_COUNT):
+        pages[p + 1] += pages[p]
+    data = bytearray(struct.pack(HEADER, MAGIC, width, height, len(codes)))
+    data += struct.pack('>%dH' % (PAGE_COUNT + 1), *pages)
+    data += bytes(code & 0xFF for code in codes)
+    for code in codes:
+        bitmap = bytes(glyphs[code])
+        if len(bitmap) != glyph_bytes:
+            raise ValueError("字形 U+%04X 的点阵长度不正确" % code)
+        data += bitmap
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
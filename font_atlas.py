@@ -0,0 +1,99 @@
+# font_atlas.py
+# 内置 8x8 字体的预缩放字形图集：每种缩放比例只生成一次，紧凑地存放在一个 bytearray 中。
+
+FIRST_CHAR = 32   # ' '
+LAST_CHAR = 126   # '~'
+GLYPH_COUNT = LAST_CHAR - FIRST_CHAR + 1
+FALLBACK_CHAR = '?'
+FONT_FILE = 'font8x8.bin' # 离线导出的 1x 字体，没有 framebuf 时使用
+
+_default = None
+
+
+class FontAtlas:
+    """
+    字形按 MONO_HLSB 行存放 (最高位为最左像素)。
+    缩放比例 (sx, sy) 的图集中，每个字形宽 8*sx、高 8*sy，每行 sx 字节，
+    第 g 个字形位于偏移 g * sx * 8 * sy 处。
+    """
+
+    def __init__(self, base):
+        """
+        Args:
+            base: 1x 字形数据，GLYPH_COUNT 个字形，每个 8 字节 (8 行)。
+        """
+        if len(base) != GLYPH_COUNT * 8:
+            raise ValueError("字体数据长度不正确")
+        self._atlases = {(1, 1): bytes(base)}
+
+    @classmethod
+    def from_framebuf(cls):
+        """用 framebuf 内置字体逐个渲染字符，生成 1x 图集 (设备上在导入时执行一次)"""
+        from framebuf import FrameBuffer, MONO_HLSB
+        base = bytearray(GLYPH_COUNT * 8)
+        cell = bytearray(8)
+        fb = FrameBuffer(cell, 8, 8, MONO_HLSB)
+        for i in range(GLYPH_COUNT):
+            fb.fill(0)
+            fb.text(chr(FIRST_CHAR + i), 0, 0, 1)
+            base[i * 8:i * 8 + 8] = cell
+        return cls(base)
+
+    @classmethod
+    def default(cls):
+        """返回共享的内置字体图集：优先用 framebuf 生成，否则加载 FONT_FILE"""
+        global _default
+        if _default is None:
+            try:
+                _default = cls.from_framebuf()
+            except ImportError:
+                _default = cls.load(FONT_FILE)
+        return _default
+
+    @classmethod
+    def load(cls, path):
+        """从离线导出的 1x 字体文件加载 (760 字节)"""
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def save(self, path):
+        """导出 1x 字体数据，供没有 framebuf 的环境 (如电脑上的仿真) 使用"""
+        with open(path, 'wb') as f:
+            f.write(self._atlases[(1, 1)])
+
+    def glyphs(self, sx=1, sy=1):
+        """返回缩放比例 (sx, sy) 的整张图集，首次调用时生成"""
+        key = (sx, sy)
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            atlas = self._build(sx, sy)
+            self._atlases[key] = atlas
+        return atlas
+
+    def index(self, char):
+        """返回字符在图集中的序号，不支持的字符使用 '?'"""
+        code = ord(char)
+        if code < FIRST_CHAR or code > LAST_CHAR:
+            code = ord(FALLBACK_CHAR)
+        return code - FIRST_CHAR
+
+    def _build(self, sx, sy):
+        base = self._atlases[(1, 1)]
+        # 每个源字节横向放大 sx 倍后的 sx 个字节
+        widen = []
+        for b in range(256):
+            bits = 0
+            for i in range(8):
+                if b & (0x80 >> i):
+                    bits |= ((1 << sx) - 1) << ((7 - i) * sx)
+            widen.append(bytes((bits >> (8 * (sx - 1 - k))) & 0xFF for k in range(sx)))
+        glyph_bytes = sx * 8 * sy
+        atlas = bytearray(GLYPH_COUNT * glyph_bytes)
+        pos = 0
+        for g in range(GLYPH_COUNT):
+            for r in range(8):
+                row = widen[base[g * 8 + r]]
+                for _ in range(sy):
+                    atlas[pos:pos + sx] = row
+                    pos += sx
+        return bytes(atlas)
@@ -40,6 +40,7 @@ class AuctionGame:
         self.INITIAL_CASH = 100
         self.ITEMS_PER_PLAYER = 2
         self.TOTAL_ROUNDS = 2
+        self.AI_THINK_MS = 500  # AI "thinking" time before each bid (non-blocking)
         
         # Players
         self.players = [
@@ -59,12 +60,15 @@ class AuctionGame:
         self.message = ""
         self.passes = 0
         self.waiting_for_confirm = False  # 新增：用于确认状态
+        self.ai_think_until = None  # ticks_ms deadline of the current AI turn
+        self.thinking_spinner = None
     
     def start_game(self):
         """Called by main.py to start/reset the game"""
         self.current_game_state = self.STATE_INIT
         self._reset_game()
-        self._update_display()
+        self.ui.set_renderer(self._update_display)
+        self.ui.invalidate()
         
     def _reset_game(self):
         """Reset all game state"""
@@ -99,6 +103,7 @@ class AuctionGame:
         self.message = ""
         self.passes = 0
         self.waiting_for_confirm = False
+        self.ai_think_until = None
     
     def _total_assets(self, player):
         """Calculate player's total assets"""
@@ -106,8 +111,13 @@ class AuctionGame:
     
     def _update_display(self):
         """Update display based on current game state"""
-        self.ui.clear_screen()
-        
+        ai_turn = (self.current_game_state == self.STATE_AUCTION and
+                   self.players[self.current_bidder_idx]["is_ai"])
+        if self.thinking_spinner and not ai_turn:
+            # Erase the spinner before the lines around it are redrawn
+            self.thinking_spinner.stop()
+            self.thinking_spinner = None
+
         if self.current_game_state == self.STATE_INIT:
             self.ui.show_message_box(
                 ["Auction Game", 
@@ -178,10 +188,15 @@ class AuctionGame:
             else:
                 lines.append("")
                 lines.append("Up: +1  Down: -1")
-                lines.append("Left: +5 Right: -5")
+                lines.append("Right: +5  Left: -5")
+                lines.append("Hold to speed up")
                 lines.append("Press: Confirm Bid")
             
             self.ui.show_message_box(lines, title=title)
+            if ai_turn and not (self.thinking_spinner and self.thinking_spinner.running):
+                pos = self.ui.box_text_end("AI thinking...")
+                if pos:
+                    self.thinking_spinner = self.ui.spinner(pos[0] + self.ui.char_width_eng, pos[1])
             
         elif self.current_game_state == self.STATE_BID_CONFIRM:
             bidder = self.players[self.current_bidder_idx]
@@ -211,7 +226,7 @@ class AuctionGame:
             lines.append("")
             lines.append("Press to continue")
             
-            self.ui.show_message_box(lines, title=title)
+            self.ui.show_log(lines, title=title)
             
         elif self.current_game_state == self.STATE_GAME_OVER:
             title = "Game Over"
@@ -275,7 +290,7 @@ class AuctionGame:
         if self.current_game_state == self.STATE_INIT:
             if self.joystick.check_for_single_click():
                 self.current_game_state = self.STATE_PLAYER_SELECT
-                self._update_display()
+                self.ui.invalidate()
                 
         elif self.current_game_state == self.STATE_PLAYER_SELECT:
             # Handle item selection
@@ -287,18 +302,18 @@ class AuctionGame:
             
             if direction == 'up':
                 self.selected_item_idx = (self.selected_item_idx - 1) % item_count
-                self._update_display()
+                self.ui.invalidate()
             elif direction == 'down':
                 self.selected_item_idx = (self.selected_item_idx + 1) % item_count
-                self._update_display()
+                self.ui.invalidate()
             elif clicked and item_count > 0:
                 # 进入物品确认状态
                 self.current_game_state = self.STATE_ITEM_CONFIRM
-                self._update_display()
+                self.ui.invalidate()
             elif clicked and item_count == 0:
                 # Player has no items, skip turn
                 self._next_player()
-                self._update_display()
+                self.ui.invalidate()
                 
         elif self.current_game_state == self.STATE_ITEM_CONFIRM:
             # 确认或取消选择物品
@@ -314,18 +329,24 @@ class AuctionGame:
                 self.passes = 0
                 self.current_bidder_idx = (self.current_player_idx + 1) % len(self.players)
                 self.current_game_state = self.STATE_AUCTION
-                self._update_display()
+                self.ui.invalidate()
             elif direction in ('left', 'right'):
                 # 取消选择，返回物品选择
                 self.current_game_state = self.STATE_PLAYER_SELECT
-                self._update_display()
+                self.ui.invalidate()
                 
         elif self.current_game_state == self.STATE_AUCTION:
             player = self.players[self.current_bidder_idx]
             
             if player["is_ai"]:
-                # AI turn - make bid decision
-                time.sleep(0.5)  # Simulate thinking
+                # AI turn - "think" for AI_THINK_MS without blocking the main loop
+                now = time.ticks_ms()
+                if self.ai_think_until is None:
+                    self.ai_think_until = time.ticks_add(now, self.AI_THINK_MS)
+                    return None
+                if time.ticks_diff(now, self.ai_think_until) < 0:
+                    return None
+                self.ai_think_until = None
                 new_bid = self._ai_bid(self.current_bidder_idx)
                 
                 if new_bid > self.current_bid:
@@ -337,28 +358,28 @@ class AuctionGame:
                 
                 # Move to next bidder
                 self.current_bidder_idx = (self.current_bidder_idx + 1) % len(self.players)
-                self._update_display()
+                self.ui.invalidate()
             else:
-                # Human player turn
-                direction = self.joystick.get_direction(allow_repeat=False)
+                # Human player turn - hold the stick to repeat with a growing step
+                direction, step = self.joystick.get_direction_step()
                 clicked = self.joystick.check_for_single_click()
                 
                 if direction == 'up':
-                    self.current_bid = min(self.current_bid + 1, player["cash"])
-                    self._update_display()
+                    self.current_bid = min(self.current_bid + step, player["cash"])
+                    self.ui.invalidate()
                 elif direction == 'down':
-                    self.current_bid = max(self.current_bid - 1, 0)
-                    self._update_display()
+                    self.current_bid = max(self.current_bid - step, 0)
+                    self.ui.invalidate()
                 elif direction == 'right':
-                    self.current_bid = min(self.current_bid + 5, player["cash"])
-                    self._update_display()
+                    self.current_bid = min(self.current_bid + 5 * step, player["cash"])
+                    self.ui.invalidate()
                 elif direction == 'left':
-                    self.current_bid = max(self.current_bid - 5, 0)
-                    self._update_display()
+                    self.current_bid = max(self.current_bid - 5 * step, 0)
+                    self.ui.invalidate()
                 elif clicked:
                     # 进入出价确认状态
                     self.current_game_state = self.STATE_BID_CONFIRM
-                    self._update_display()
+                    self.ui.invalidate()
             
             # Check auction end conditions (for AI turns)
             if player["is_ai"] and self.passes >= len(self.players) - 1:
@@ -380,11 +401,11 @@ class AuctionGame:
                 # Move to next bidder
                 self.current_bidder_idx = (self.current_bidder_idx + 1) % len(self.players)
                 self.current_game_state = self.STATE_AUCTION
-                self._update_display()
+                self.ui.invalidate()
             elif direction in ('left', 'right'):
                 # 取消出价，返回拍卖界面
                 self.current_game_state = self.STATE_AUCTION
-                self._update_display()
+                self.ui.invalidate()
             
             # Check auction end conditions
             if self.passes >= len(self.players) - 1:
@@ -398,7 +419,7 @@ class AuctionGame:
                 if self.current_game_state != self.STATE_GAME_OVER:
                     self.current_game_state = self.STATE_PLAYER_SELECT
                 
-                self._update_display()
+                self.ui.invalidate()
                 
         elif self.current_game_state == self.STATE_GAME_OVER:
             if self.joystick.check_for_single_click():
@@ -421,5 +442,5 @@ class AuctionGame:
             self.players[self.current_player_idx]["items"].append(self.auction_item)
         
         self.current_game_state = self.STATE_ROUND_RESULT
-        self._update_display()
+        self.ui.invalidate()
 
@@ -36,6 +36,10 @@ class GamePointsShowdown:
         self.current_bet_selection = 0
         self.max_bet = self.INITIAL_POINTS
         
+    def _bet_menu_region(self):
+        """下注界面中标题和下注金额所在的区域 (x, y, w, h)，下方是分数和说明"""
+        return (0, 10, self.ui.width, 2 * (self.ui.char_height + self.ui.line_spacing * 2))
+
     def start_game(self):
         """由 main.py 调用，开始或重置游戏"""
         self.current_game_state = self.STATE_INIT
@@ -45,12 +49,11 @@ class GamePointsShowdown:
         self.machine_score = 0
         self.current_round = 0
         self.player_last_bet = 3
-        self._update_display()
+        self.ui.set_renderer(self._update_display)
+        self.ui.invalidate()
         
     def _update_display(self):
         """根据当前游戏状态更新显示"""
-        self.ui.clear_screen()
-        
         title = f"Points Showdown - Round {self.current_round + 1}/{self.TOTAL_ROUNDS}"
         info_lines = [
             f"Your points: {self.player_points}",
@@ -76,19 +79,25 @@ class GamePointsShowdown:
                 start_y=10
             )
             
+            # 只有下注金额变化时 (invalidate 了下注区域)，下面的分数和说明不需要重绘
+            x, y, w, h = self._bet_menu_region()
+            y_offset = y + h
+            if not self.ui.region_dirty(0, y_offset, self.ui.width, self.ui.height - y_offset):
+                return
+
             # 显示说明和当前状态
-            y_offset = 10 + (1 + 1) * (self.ui.char_height + self.ui.line_spacing * 2)
             for line in info_lines:
                 self.ui.display_text_line(line, 5, y_offset, self.ui.text_color)
                 y_offset += self.ui.char_height + self.ui.line_spacing
                 
             # 下注说明
             help_lines = [
-                "Up/Down:+-1",
-                "Left/Right:+-5",
+                "Up/Down: +1/-1",
+                "Right/Left: +5/-5",
+                "Hold to speed up",
                 "Press to confirm"
                 ]
-            line_height = 10  # 调整行高，取决于你的字体大小
+            line_height = self.ui.char_height + self.ui.line_spacing  # 与上面的说明行相同的行高
             current_y = y_offset
             for line in help_lines:
                 self.ui.display_text_line(line, 5, current_y, self.ui.text_color)
@@ -104,7 +113,7 @@ class GamePointsShowdown:
                 "---",
                 "Press to continue..."
             ]
-            self.ui.show_message_box(result_lines, title=title)
+            self.ui.show_log(result_lines, title=title)
             
         elif self.current_game_state == self.STATE_SHOW_RESULT:
             # 显示完整回合结果
@@ -118,7 +127,7 @@ class GamePointsShowdown:
                 "---",
                 "Press to continue..."
             ]
-            self.ui.show_message_box(result_lines, title="Round Over")
+            self.ui.show_log(result_lines, title="Round Over")
             
         elif self.current_game_state == self.STATE_GAME_OVER:
             # 游戏结束显示
@@ -139,22 +148,22 @@ class GamePointsShowdown:
             self.ui.show_message_box(final_lines, title="Game Over")
     
     def _handle_player_bet_input(self):
-        """处理玩家下注输入"""
-        direction = self.joystick.get_direction(allow_repeat=False)
+        """处理玩家下注输入 (按住摇杆加速增减，画面每帧只重绘一次)"""
+        direction, step = self.joystick.get_direction_step()
         clicked = self.joystick.check_for_single_click()
         
         if direction == 'up':
-            self.current_bet_selection = min(self.current_bet_selection + 1, self.max_bet)
-            self._update_display()
+            self.current_bet_selection = min(self.current_bet_selection + step, self.max_bet)
+            self.ui.invalidate(self._bet_menu_region())
         elif direction == 'down':
-            self.current_bet_selection = max(self.current_bet_selection - 1, 0)
-            self._update_display()
+            self.current_bet_selection = max(self.current_bet_selection - step, 0)
+            self.ui.invalidate(self._bet_menu_region())
         elif direction == 'right':
-            self.current_bet_selection = min(self.current_bet_selection + 5, self.max_bet)
-            self._update_display()
+            self.current_bet_selection = min(self.current_bet_selection + 5 * step, self.max_bet)
+            self.ui.invalidate(self._bet_menu_region())
         elif direction == 'left':
-            self.current_bet_selection = max(self.current_bet_selection - 5, 0)
-            self._update_display()
+            self.current_bet_selection = max(self.current_bet_selection - 5 * step, 0)
+            self.ui.invalidate(self._bet_menu_region())
             
         if clicked:
             self.player_bet = self.current_bet_selection
@@ -170,7 +179,7 @@ class GamePointsShowdown:
                 self.current_game_state = self.STATE_PLAYER_BET
                 self.max_bet = self.player_points
                 self.current_bet_selection = min(5, self.max_bet)
-                self._update_display()
+                self.ui.invalidate()
                 
         elif self.current_game_state == self.STATE_PLAYER_BET:
             if self._handle_player_bet_input():
@@ -197,7 +206,7 @@ class GamePointsShowdown:
                 
                 self.current_round += 1
                 self.current_game_state = self.STATE_MACHINE_BET
-                self._update_display()
+                self.ui.invalidate()
                 
         elif self.current_game_state == self.STATE_MACHINE_BET:
             if self.joystick.check_for_single_click():
@@ -205,14 +214,14 @@ class GamePointsShowdown:
                     self.current_game_state = self.STATE_GAME_OVER
                 else:
                     self.current_game_state = self.STATE_SHOW_RESULT
-                self._update_display()
+                self.ui.invalidate()
                 
         elif self.current_game_state == self.STATE_SHOW_RESULT:
             if self.joystick.check_for_single_click():
                 self.current_game_state = self.STATE_PLAYER_BET
                 self.max_bet = self.player_points
                 self.current_bet_selection = min(5, self.max_bet)
-                self._update_display()
+                self.ui.invalidate()
                 
         elif self.current_game_state == self.STATE_GAME_OVER:
             if self.joystick.check_for_single_click():
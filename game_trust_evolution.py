@@ -6,15 +6,18 @@ import random
 ACTIONS = ['C', 'D']  # C=信任，D=背叛
 STATES = [(a, b) for a in ACTIONS for b in ACTIONS] # 所有可能的前一轮状态 (你的选择, 电脑的选择)
 
-# 经典策略 (与原版相同)
+# 经典策略 (与原版相同)；混乱者每局随机生成，见 chaos_strategy()
 classic_strategies = {
     '小天使': {s: 'C' for s in STATES},
     '老阴逼': {s: 'D' for s in STATES},
     '复读机': {('C', 'C'): 'C', ('C', 'D'): 'D', ('D', 'C'): 'C', ('D', 'D'): 'D'},
     '复仇者': {('C', 'C'): 'C', ('C', 'D'): 'D', ('D', 'C'): 'D', ('D', 'D'): 'D'},
-    '混乱者': {s: random.choice(ACTIONS) for s in STATES},
 }
 
+def chaos_strategy():
+    # 混乱者：每个状态随机选择。在开局时生成 (随机数种子设置之后)，录制的对局回放时才能得到同样的策略
+    return {s: random.choice(ACTIONS) for s in STATES}
+
 # 游戏参数
 TOTAL_ROUNDS = 10
 
@@ -60,10 +63,10 @@ class QLearningAgent:
             policy[state] = random.choice(best_actions)
         return policy
 
-def analyze_policy(agent_policy):
-    # (与原版相同)
+def analyze_policy(agent_policy, strategies=None):
+    # (与原版相同)；strategies 默认为 classic_strategies
     similarity = {}
-    for name, policy in classic_strategies.items():
+    for name, policy in (strategies or classic_strategies).items():
         match = sum(agent_policy.get(s, '') == policy[s] for s in STATES) # 使用 .get 避免 KeyError
         similarity[name] = match
     if not similarity: return "未知", {}
@@ -90,6 +93,7 @@ class GameTrustEvolution:
         self.ui = ui_manager
         self.joystick = joystick
         self.agent = QLearningAgent(actions=ACTIONS)
+        self.strategies = classic_strategies # 用于分析电脑策略，start_game() 中加入混乱者
 
         self.rounds_played = 0
         self.player_score = 0
@@ -120,12 +124,15 @@ class GameTrustEvolution:
         self.last_player_action = 'C'
         self.last_computer_action = 'C'
         self.agent = QLearningAgent(actions=ACTIONS) # 重置 AI 代理
+        self.strategies = dict(classic_strategies)
+        self.strategies['混乱者'] = chaos_strategy()
         self.current_game_state = self.STATE_INIT
         self.player_current_selection = 0 # 默认选信任
         self.this_round_comp_choice = None
         self.this_round_player_choice = None
-        # 初始化显示
-        self._update_display()
+        # 初始化显示：由 ui.frame_tick() 在下一帧调用 _update_display
+        self.ui.set_renderer(self._update_display)
+        self.ui.invalidate()
 
     def _get_player_choice_from_joystick(self):
         """通过摇杆获取玩家选择。"""
@@ -134,10 +141,10 @@ class GameTrustEvolution:
 
         if direction == 'up' or direction == 'left':
             self.player_current_selection = 0 # 信任
-            self._update_display() # 更新菜单高亮
+            self.ui.invalidate() # 更新菜单高亮
         elif direction == 'down' or direction == 'right':
             self.player_current_selection = 1 # 背叛
-            self._update_display()
+            self.ui.invalidate()
 
         if clicked:
             return ACTIONS[self.player_current_selection]
@@ -145,7 +152,6 @@ class GameTrustEvolution:
 
     def _update_display(self):
         """根据当前游戏状态更新 LED 显示。"""
-        self.ui.clear_screen()
         title = f"ROUND {self.rounds_played + 1}/{TOTAL_ROUNDS} "
         info_lines = [
             f"Your points: {self.player_score}",
@@ -187,7 +193,7 @@ class GameTrustEvolution:
                 "---",
                 "press to countinue..."
             ]
-            self.ui.show_message_box(result_lines, title=title)
+            self.ui.show_log(result_lines, title=title)
 
         elif self.current_game_state == self.STATE_GAME_OVER:
             final_lines = [
@@ -198,7 +204,7 @@ class GameTrustEvolution:
             else: final_lines.append("Draw!")
 
             agent_policy = self.agent.get_policy()
-            best_match, _ = analyze_policy(agent_policy)
+            best_match, _ = analyze_policy(agent_policy, self.strategies)
             final_lines.append(f"The current round of the computer strategy is close to: {best_match}")
             final_lines.append("---")
             final_lines.append("press to return to the main menu")
@@ -214,12 +220,12 @@ class GameTrustEvolution:
         if self.current_game_state == self.STATE_INIT:
             # 一般初始化完成后直接进入下一个状态
             self.current_game_state = self.STATE_PLAYER_CHOICE
-            self._update_display()
+            self.ui.invalidate()
 
         elif self.current_game_state == self.STATE_PLAYER_CHOICE:
             if self.rounds_played >= TOTAL_ROUNDS - 1: # 先检查是否已完成所有轮次
                 self.current_game_state = self.STATE_GAME_OVER
-                self._update_display()
+                self.ui.invalidate()
                 return None # 等待玩家在GAME_OVER状态按键
 
             player_action = self._get_player_choice_from_joystick()
@@ -248,7 +254,7 @@ class GameTrustEvolution:
 
             self.rounds_played += 1
             self.current_game_state = self.STATE_SHOW_ROUND_RESULT
-            self._update_display()
+            self.ui.invalidate()
 
         elif self.current_game_state == self.STATE_SHOW_ROUND_RESULT:
             if self.joystick.check_for_single_click(): # 等待玩家按键继续
@@ -256,7 +262,7 @@ class GameTrustEvolution:
                     self.current_game_state = self.STATE_GAME_OVER
                 else:
                     self.current_game_state = self.STATE_PLAYER_CHOICE # 开始下一轮选择
-                self._update_display()
+                self.ui.invalidate()
 
         elif self.current_game_state == self.STATE_GAME_OVER:
             if self.joystick.check_for_single_click(): # 等待玩家按键返回主菜单
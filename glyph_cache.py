@@ -0,0 +1,68 @@
+# glyph_cache.py
+# 已展开为 RGB565 的字形块 LRU 缓存，按占用字节数限制容量。
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ucollections import OrderedDict
+
+
+class GlyphCache:
+    """
+    以 (字符, 前景色, 背景色, 字形尺寸) 为键缓存 RGB565 字形块，由 ST7789.render_text 使用。
+    命中时字形逐行切片拷贝到行缓冲区，不再经过查找表逐字节展开。
+    """
+
+    def __init__(self, max_bytes=16 * 1024):
+        """
+        Args:
+            max_bytes (int): 缓存占用的像素数据上限 (字节)。8x16 的字形每个 256 字节。
+        """
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """返回 (buf, width, height)；未命中返回 None。"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        # 重新插入，移动到最近使用的位置
+        del self._entries[key]
+        self._entries[key] = entry
+        self.hits += 1
+        return entry
+
+    def put(self, key, buf, width, height):
+        """加入一个字形块，必要时淘汰最久未使用的条目。超过上限的单个块不缓存。"""
+        size = len(buf)
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes_used -= len(old[0])
+        while self.bytes_used + size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self.bytes_used -= len(self._entries.pop(oldest)[0])
+            self.evictions += 1
+        self._entries[key] = (buf, width, height)
+        self.bytes_used += size
+
+    def clear(self):
+        self._entries = OrderedDict()
+        self.bytes_used = 0
+
+    def stats(self):
+        """返回命中/未命中/淘汰计数和当前占用。"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.bytes_used,
+            'max_bytes': self.max_bytes,
+        }
@@ -0,0 +1,238 @@
+# input_events.py
+# 输入事件的定长环形缓冲区，基于 Pin.irq + Timer 防抖的按键，以及定时器驱动的摇杆采样。
+# 事件在中断/定时器回调中产生，主循环随时取出：一帧绘制得再久，输入也不会丢失。
+
+import time
+from array import array
+from machine import Pin, Timer
+
+# 事件类型
+PRESS = 1    # 按下 (防抖后)
+RELEASE = 2  # 松开 (防抖后)
+CLICK = 3    # 单击：按下到松开不超过 click_threshold_ms
+
+# 摇杆方向事件 (StickSampler)
+CENTER = 10
+UP = 11
+DOWN = 12
+LEFT = 13
+RIGHT = 14
+DIRECTION_NAMES = {CENTER: 'center', UP: 'up', DOWN: 'down', LEFT: 'left', RIGHT: 'right'}
+
+
+class EventRing:
+    """
+    定长环形缓冲区，保存 (事件类型, ticks_ms 时间戳)。
+    单生产者/单消费者：push() 只在中断/定时器回调中调用并且只修改 _tail，
+    pop()/pop_kind()/clear() 只在主循环中调用并且只修改 _head，事件数由两者推算。
+    回调在 pop() 执行到一半时插入也不会覆盖未读的事件，不需要关中断。
+    push() 不分配内存；写满时丢弃新事件并计入 dropped (生产者不能移动 _head)。
+    """
+
+    def __init__(self, size=16):
+        """
+        Args:
+            size (int): 最多保存的事件数。
+        """
+        self.size = size
+        self._slots = size + 1 # 留一个空位区分满和空
+        self._kinds = bytearray(self._slots)
+        self._times = array('l', [0] * self._slots)
+        self._head = 0 # 下一个读取位置 (只由消费者修改)
+        self._tail = 0 # 下一个写入位置 (只由生产者修改)
+        self.dropped = 0 # 因缓冲区已满被丢弃的事件数
+
+    def push(self, kind, t):
+        """加入一个事件 (中断回调中调用)"""
+        tail = self._tail
+        nxt = tail + 1
+        if nxt == self._slots:
+            nxt = 0
+        if nxt == self._head:
+            self.dropped += 1
+            return
+        self._kinds[tail] = kind
+        self._times[tail] = t
+        self._tail = nxt # 先写数据再发布
+
+    def pop(self):
+        """
+        取出最早的事件。
+        Returns:
+            tuple: (事件类型, 时间戳)；没有事件时返回 None。
+        """
+        i = self._head
+        if i == self._tail:
+            return None
+        event = (self._kinds[i], self._times[i]) # 先读出数据再释放槽位
+        i += 1
+        self._head = 0 if i == self._slots else i
+        return event
+
+    def pop_kind(self, kind):
+        """
+        取出第一个指定类型的事件，之前的其他事件一并丢弃。
+        Returns:
+            int: 事件的时间戳；没有该类型的事件时返回 None (缓冲区被清空)。
+        """
+        while True:
+            event = self.pop()
+            if event is None:
+                return None
+            if event[0] == kind:
+                return event[1]
+
+    def clear(self):
+        """丢弃所有未读事件 (主循环中调用)"""
+        self._head = self._tail
+
+    def __len__(self):
+        return (self._tail - self._head) % self._slots
+
+
+class DebouncedButton:
+    """
+    中断驱动的按键：每个边沿 (重新) 启动一次单次定时器，电平稳定 debounce_ms 后定时器回调
+    读取引脚并产生 PRESS / RELEASE / CLICK 事件，时间戳取这组抖动中第一个边沿的时间。
+    """
+
+    def __init__(self, pin, timer, events, debounce_ms=50, click_threshold_ms=300, active_low=True):
+        """
+        Args:
+            pin (Pin): 已配置为输入的按键引脚。
+            timer (Timer): 防抖用的定时器 (独占)。
+            events (EventRing): 事件输出的缓冲区。
+            debounce_ms (int): 电平需要保持稳定的时间 (毫秒)。
+            click_threshold_ms (int): 单击的最长按下时间 (毫秒)，更长的按压只产生 PRESS / RELEASE。
+            active_low (bool): 按下为低电平 (上拉接法)。
+        """
+        self.pin = pin
+        self.timer = timer
+        self.events = events
+        self.debounce_ms = debounce_ms
+        self.click_threshold_ms = click_threshold_ms
+        self._pressed_level = 0 if active_low else 1
+        self._stable = pin.value()
+        self._armed = False
+        self._edge_time = 0
+        self._down_time = 0
+        # 预先绑定回调，中断里不再创建绑定方法对象
+        self._settle_cb = self._settle
+        pin.irq(handler=self._edge, trigger=Pin.IRQ_FALLING | Pin.IRQ_RISING)
+
+    def _edge(self, pin):
+        """引脚中断：记录第一个边沿的时间，推迟到电平稳定后再判断"""
+        if not self._armed:
+            self._armed = True
+            self._edge_time = time.ticks_ms()
+        self.timer.init(mode=Timer.ONE_SHOT, period=self.debounce_ms, callback=self._settle_cb)
+
+    def _settle(self, timer):
+        """定时器回调：电平已稳定，与上一个稳定电平不同时产生事件"""
+        self._armed = False
+        value = self.pin.value()
+        if value == self._stable:
+            return # 抖动后回到了原来的电平
+        self._stable = value
+        t = self._edge_time
+        if value == self._pressed_level:
+            self._down_time = t
+            self.events.push(PRESS, t)
+        else:
+            self.events.push(RELEASE, t)
+            if time.ticks_diff(t, self._down_time) < self.click_threshold_ms:
+                self.events.push(CLICK, t)
+
+    def is_down(self):
+        """防抖后的按键状态"""
+        return self._stable == self._pressed_level
+
+    def deinit(self):
+        self.pin.irq(handler=None)
+        self.timer.deinit()
+
+
+class StickSampler:
+    """
+    在周期定时器回调中对摇杆两个轴过采样 (每次 oversample 个读数取平均)，再做一阶 IIR 低通：
+        filtered += (sample - filtered) >> filter_shift
+    方向判断带回差：偏离中心超过 threshold 才进入某个方向，回落到 threshold - hysteresis 以内才离开，
+    阈值附近的抖动不会来回切换。方向变化时把 (方向, 时间) 写入事件缓冲区，
+    主循环读取 direction 或取出事件都是 O(1)，不再读 ADC。
+    """
+
+    def __init__(self, adc_x, adc_y, timer, events, x_center=2048, y_center=2048, threshold=800,
+                 hysteresis=150, rate_hz=200, oversample=4, filter_shift=2):
+        """
+        Args:
+            adc_x, adc_y (ADC): 两个轴的 ADC。
+            timer (Timer): 采样用的定时器 (独占)。
+            events (EventRing): 方向变化事件的输出缓冲区。
+            hysteresis (int): 离开方向时的回差 (ADC 计数)。
+            rate_hz (int): 采样频率。
+            oversample (int): 每次采样每个轴读取的次数。
+            filter_shift (int): IIR 系数 1 / 2**filter_shift，越大越平滑、响应越慢。
+        """
+        self.adc_x = adc_x
+        self.adc_y = adc_y
+        self.timer = timer
+        self.events = events
+        self.hysteresis = hysteresis
+        self.oversample = oversample
+        self.filter_shift = filter_shift
+        self.set_calibration(x_center, y_center, threshold)
+        self.x = x_center # 滤波后的读数
+        self.y = y_center
+        self.direction = CENTER
+        self.changed_at = time.ticks_ms() # 最近一次方向变化的时间
+        self.samples = 0
+        self._sample_cb = self._sample
+        timer.init(mode=Timer.PERIODIC, period=max(1, 1000 // rate_hz), callback=self._sample_cb)
+
+    def set_calibration(self, x_center, y_center, threshold):
+        """更新中心值和阈值 (校准后调用)"""
+        self.x_center = x_center
+        self.y_center = y_center
+        self.threshold = threshold
+
+    def _sample(self, timer):
+        """定时器回调：过采样、滤波，方向变化时产生事件"""
+        n = self.oversample
+        read_x = self.adc_x.read
+        read_y = self.adc_y.read
+        sx = sy = 0
+        for _ in range(n):
+            sx += read_x()
+            sy += read_y()
+        shift = self.filter_shift
+        self.x += (sx // n - self.x) >> shift
+        self.y += (sy // n - self.y) >> shift
+        self.samples += 1
+        direction = self._classify()
+        if direction != self.direction:
+            self.direction = direction
+            self.changed_at = time.ticks_ms()
+            self.events.push(direction, self.changed_at)
+
+    def _classify(self):
+        dx = self.x - self.x_center
+        dy = self.y - self.y_center
+        # 保持当前方向，直到回落到回差以内
+        hold = self.threshold - self.hysteresis
+        current = self.direction
+        if (current == RIGHT and dx > hold) or (current == LEFT and dx < -hold) or \
+                (current == DOWN and dy > hold) or (current == UP and dy < -hold):
+            return current
+        threshold = self.threshold
+        if dx > threshold:
+            return RIGHT
+        if dx < -threshold:
+            return LEFT
+        if dy > threshold: # Y 轴值越大是向下
+            return DOWN
+        if dy < -threshold:
+            return UP
+        return CENTER
+
+    def deinit(self):
+        self.timer.deinit()
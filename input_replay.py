@@ -0,0 +1,290 @@
+# input_replay.py
+# 输入录制与确定性回放：InputRecorder 包装 Joystick，把游戏实际收到的方向/单击按主循环迭代 (tick)
+# 记录到紧凑的二进制文件；InputReplay 提供相同的接口，把记录按原来的 tick 和时间重新喂给
+# main.main_loop 和各游戏的 game_loop_tick。录制时随机数种子写入文件头，回放时使用同一个种子，
+# 同样的输入得到同样的画面。replay_session() 在电脑上用仿真面板无人值守地跑完整局游戏并统计耗时。
+#
+# 文件格式：文件头 '>4sI' (b'INP1', 随机数种子)，之后是字节码流：
+#   0x00-0x7F        本 tick 结束，时钟前进 n 毫秒
+#   0x80 + '>H'      本 tick 结束，时钟前进的毫秒数 (>= 128)
+#   0x90 | d         get_direction 返回方向 d
+#   0xA0 | d, step   get_direction_step 返回 (方向 d, 步长)
+#   0xB0             check_for_single_click 返回 True
+# d 为方向码 1-4 (上/下/左/右)；返回 'center' / False 的调用不记录。
+
+import struct
+import time
+
+MAGIC = b'INP1'
+HEADER = '>4sI'
+HEADER_SIZE = 8
+
+_OP_LONG_TICK = 0x80
+_OP_DIRECTION = 0x90
+_OP_STEP = 0xA0
+_OP_CLICK = 0xB0
+
+_DIRECTIONS = ('center', 'up', 'down', 'left', 'right')
+_DIRECTION_CODES = {'up': 1, 'down': 2, 'left': 3, 'right': 4}
+
+# 待回放事件的种类
+_DIRECTION = 0
+_STEP = 1
+_CLICK = 2
+
+
+def seed_rng(seed):
+    """给游戏使用的随机数发生器 (random / urandom) 设置种子"""
+    for name in ('random', 'urandom'):
+        try:
+            module = __import__(name)
+        except ImportError:
+            continue
+        if hasattr(module, 'seed'):
+            module.seed(seed)
+
+
+class InputRecorder:
+    """
+    包装一个 Joystick，透明地转发所有调用，并记录 get_direction / get_direction_step /
+    check_for_single_click 的非空结果。主循环每次迭代结束时调用 next_tick()。
+    数据先放在内存缓冲区，超过 flush_bytes 时追加写入文件，断电最多丢失最后一小段。
+    """
+
+    def __init__(self, joystick, path, seed=None, flush_bytes=256):
+        """
+        Args:
+            joystick: 被录制的 Joystick。
+            path (str): 录制文件路径 (覆盖已有文件)。
+            seed (int, optional): 随机数种子，默认取当前 ticks_ms。录制开始时立即生效。
+            flush_bytes (int): 缓冲区达到多少字节时写入文件。
+        """
+        self.joystick = joystick
+        self.path = path
+        self.seed = seed if seed is not None else time.ticks_ms() & 0x7FFFFFFF
+        self.flush_bytes = flush_bytes
+        self.ticks = 0
+        self.events = 0
+        self._buf = bytearray()
+        self._last_tick = time.ticks_ms()
+        with open(path, 'wb') as f:
+            f.write(struct.pack(HEADER, MAGIC, self.seed))
+        seed_rng(self.seed)
+
+    def __getattr__(self, name):
+        # 其余属性和方法 (校准、按钮状态等) 直接使用被包装的 Joystick
+        return getattr(self.joystick, name)
+
+    def get_direction(self, allow_repeat=False):
+        direction = self.joystick.get_direction(allow_repeat)
+        if direction != 'center':
+            self._buf.append(_OP_DIRECTION | _DIRECTION_CODES[direction])
+            self.events += 1
+        return direction
+
+    def get_direction_step(self, schedule=None):
+        direction, step = self.joystick.get_direction_step(schedule)
+        if direction != 'center':
+            self._buf.append(_OP_STEP | _DIRECTION_CODES[direction])
+            self._buf.append(min(step, 255))
+            self.events += 1
+        return direction, step
+
+    def check_for_single_click(self):
+        clicked = self.joystick.check_for_single_click()
+        if clicked:
+            self._buf.append(_OP_CLICK)
+            self.events += 1
+        return clicked
+
+    def next_tick(self):
+        """结束一个主循环迭代，记录这次迭代经过的时间"""
+        self.joystick.next_tick()
+        now = time.ticks_ms()
+        dt = min(max(time.ticks_diff(now, self._last_tick), 0), 0xFFFF)
+        self._last_tick = now
+        if dt < _OP_LONG_TICK:
+            self._buf.append(dt)
+        else:
+            self._buf.append(_OP_LONG_TICK)
+            self._buf.extend(struct.pack('>H', dt))
+        self.ticks += 1
+        if len(self._buf) >= self.flush_bytes:
+            self.flush()
+
+    def flush(self):
+        """把缓冲区追加写入文件"""
+        if self._buf:
+            with open(self.path, 'ab') as f:
+                f.write(self._buf)
+            self._buf = bytearray()
+
+
+class InputReplay:
+    """
+    与 Joystick 接口相同的回放器。录制在第 n 个 tick 的事件从第 n 个 tick 起可以被取出
+    (与真实摇杆的事件缓冲区一样，暂时没人读取的输入会保留到下一次读取)。
+    next_tick() 按录制的时间推进时钟，全部回放完后调用 on_end。
+    """
+
+    def __init__(self, path, advance_clock=None, on_end=None):
+        """
+        Args:
+            path (str): 录制文件。
+            advance_clock (callable, optional): advance_clock(ms) 推进时钟，电脑上为 SimClock.advance。
+            on_end (callable, optional): 回放完最后一个 tick 后调用 (如让 main_loop 退出)。
+        Raises:
+            ValueError: 文件格式不正确。
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, self.seed = struct.unpack(HEADER, data[:HEADER_SIZE])
+        if magic != MAGIC:
+            raise ValueError("不是输入录制文件")
+        self._data = data
+        self._pos = HEADER_SIZE
+        self.advance_clock = advance_clock
+        self.on_end = on_end
+        self.ticks = 0
+        self.finished = False
+        self.calibrated = True
+        self._pending = ([], [], []) # 按种类排队的待取出事件
+        seed_rng(self.seed)
+        self._tick_ms = self._read_tick() # 当前 tick 的时长，None 表示录制已结束
+
+    def _read_tick(self):
+        """读入当前 tick 的事件，返回这个 tick 的时长 (毫秒)；数据结束时返回 None"""
+        data = self._data
+        pos = self._pos
+        while pos < len(data):
+            op = data[pos]
+            pos += 1
+            if op < _OP_LONG_TICK:
+                self._pos = pos
+                return op
+            if op == _OP_LONG_TICK:
+                self._pos = pos + 2
+                return struct.unpack('>H', data[pos:pos + 2])[0]
+            kind = op & 0xF0
+            if kind == _OP_DIRECTION:
+                self._pending[_DIRECTION].append(_DIRECTIONS[op & 0x0F])
+            elif kind == _OP_STEP:
+                self._pending[_STEP].append((_DIRECTIONS[op & 0x0F], data[pos]))
+                pos += 1
+            elif op == _OP_CLICK:
+                self._pending[_CLICK].append(True)
+            else:
+                raise ValueError("录制文件损坏: 0x%02X" % op)
+        self._pos = pos
+        return None
+
+    def next_tick(self):
+        if self.finished:
+            return
+        dt = self._tick_ms
+        self.ticks += 1
+        if dt is None:
+            self.finished = True
+            if self.on_end:
+                self.on_end()
+            return
+        if self.advance_clock and dt:
+            self.advance_clock(dt)
+        self._tick_ms = self._read_tick()
+
+    def get_direction(self, allow_repeat=False):
+        pending = self._pending[_DIRECTION]
+        return pending.pop(0) if pending else 'center'
+
+    def get_direction_step(self, schedule=None):
+        pending = self._pending[_STEP]
+        return pending.pop(0) if pending else ('center', 0)
+
+    def check_for_single_click(self):
+        pending = self._pending[_CLICK]
+        return bool(pending and pending.pop(0))
+
+    def is_button_down(self):
+        return False
+
+    def recalibrate_step(self, path=None):
+        return False
+
+
+def prepare_sim_main(joystick, on_tick=None):
+    """
+    在电脑上按 main.py 的配置 (屏幕尺寸、方向、字形缓存、后备缓冲区、后台发送、字体) 创建仿真面板和 UI，
+    把 joystick 设为 main 的输入设备并回到主菜单，之后调用 main.main_loop() 即可运行。
+    录制检查和 replay_session 共用，两边的画面才可以逐帧比较。
+    Args:
+        joystick: Joystick / InputRecorder / InputReplay。
+        on_tick (callable, optional): 每个 tick 结束时调用 on_tick(tick 序号, panel)，此时画面已发送完毕。
+    Returns:
+        tuple: (ST7789 实例, SimPanel 实例)。
+    """
+    from sim_display import make_display
+    import main
+    st7789, panel = make_display(main.SCREEN_WIDTH, main.SCREEN_HEIGHT, main.SCREEN_ROTATION, main.SPI_BAUDRATE,
+                                 glyph_cache_bytes=main.SCREEN_GLYPH_CACHE_BYTES)
+    main.st7789_dev = st7789
+    main.ui = main.setup_screen(st7789)
+    main.joystick_dev = joystick
+    main.current_state = main.STATE_MAIN_MENU
+    main.main_menu_selected_idx = 0
+    main.game_te_instance = main.game_ps_instance = main.game_auction_instance = None
+    main.running = True
+    main.ui.draw_menu(main.main_menu_items, 0, title="gambling bot")
+    if on_tick:
+        next_tick = joystick.next_tick
+
+        def next_tick_with_hook():
+            st7789.wait_idle()
+            on_tick(joystick.ticks, panel)
+            next_tick()
+        joystick.next_tick = next_tick_with_hook
+    return st7789, panel
+
+
+def replay_session(path, frames_dir=None, frame_every=1, on_tick=None):
+    """
+    在电脑上用仿真面板回放一段录制的会话：从主菜单开始运行 main.main_loop，直到录制结束。
+    Args:
+        path (str): 录制文件。
+        frames_dir (str, optional): 指定时每 frame_every 个 tick 导出一张 PNG 画面。
+        on_tick (callable, optional): 每个 tick 结束时调用 on_tick(tick 序号, panel)，见 prepare_sim_main。
+    Returns:
+        dict: tick 数、重绘帧数、本机耗时、SPI 字节数和估算的线上时间。
+    """
+    from sim_display import SimClock
+    import main
+    SimClock.install(0)
+
+    def stop():
+        main.running = False
+
+    def tick_hook(ticks, panel):
+        if frames_dir and ticks % frame_every == 0:
+            panel.save_png("{}/{:06d}.png".format(frames_dir, ticks))
+        if on_tick:
+            on_tick(ticks, panel)
+
+    replay = InputReplay(path, SimClock.advance, stop)
+    st7789, panel = prepare_sim_main(replay, tick_hook if frames_dir or on_tick else None)
+
+    panel.reset_stats()
+    start = time.perf_counter()
+    try:
+        main.main_loop()
+        st7789.wait_idle()
+    finally:
+        st7789.disable_async_flush()
+    elapsed = time.perf_counter() - start
+    return {
+        'ticks': replay.ticks,
+        'frames': main.ui.frame_stats['frames'],
+        'host_ms': elapsed * 1000,
+        'bytes': panel.stats['bytes'],
+        'wire_ms': panel.wire_ms(),
+        'est_ms': panel.latency_ms(),
+        'frame': panel.frame(),
+    }
@@ -1,11 +1,39 @@
 # joystick_driver.py
-from machine import Pin, ADC
+from machine import Pin, ADC, Timer
 import time
 
+try:
+    import json
+except ImportError:
+    import ujson as json
+
+from input_events import EventRing, DebouncedButton, StickSampler, CLICK, CENTER, DIRECTION_NAMES
+
+CALIBRATION_FILE = 'joystick_cal.json'
+
 class Joystick:
+    # 增量校准：摇杆静止时每 CAL_INTERVAL_MS 读取一次，凑满 CAL_SAMPLES 个读数为一轮
+    CAL_SAMPLES = 64
+    CAL_INTERVAL_MS = 10
+    CAL_SAVE_DELTA = 8  # 中心值变化超过这么多计数才写回 flash，避免频繁写入
+    NOISE_MARGIN = 4    # 阈值至少为静止噪声带的这么多倍
+
+    # 按住加速重复的默认时间表：(按住多少毫秒之后, 重复间隔毫秒, 每次的步长)。
+    # 拨动时立即返回一次第一项的步长，之后按住时间越长，重复越快、步长越大；
+    # 按住不放约 0.7 秒累计 50。
+    REPEAT_SCHEDULE = (
+        (0, 150, 1),
+        (150, 50, 1),
+        (300, 50, 2),
+        (450, 50, 5),
+        (650, 50, 10),
+    )
+
     def __init__(self, x_pin_num, y_pin_num, button_pin_num,
                  x_center=2048, y_center=2048, threshold=800,
-                 debounce_ms=50, click_threshold_ms=300): # click_threshold_ms 用于区分长按和短按（如果需要）
+                 debounce_ms=50, click_threshold_ms=300, # click_threshold_ms 用于区分长按和短按（如果需要）
+                 button_timer_id=None, button_queue_size=16,
+                 sampler_timer_id=None, sample_rate_hz=200, direction_queue_size=16):
         """
         初始化摇杆驱动。
         Args:
@@ -17,6 +45,13 @@ class Joystick:
             threshold (int): 触发方向判断的阈值。
             debounce_ms (int): 按钮防抖时间 (毫秒)。
             click_threshold_ms (int): 单击事件的最大持续时间 (毫秒)。
+            button_timer_id (int, optional): 指定时按钮改为中断驱动，用这个硬件定时器防抖，
+                                             按键事件存入 button_events，主循环轮询得再慢也不会漏掉单击。
+            button_queue_size (int): 按键事件缓冲区能保存的事件数。
+            sampler_timer_id (int, optional): 指定时由这个硬件定时器在后台过采样并滤波两个轴 (StickSampler)，
+                                              get_direction 只读取算好的状态，不再读 ADC。
+            sample_rate_hz (int): 后台采样频率。
+            direction_queue_size (int): 方向变化事件缓冲区能保存的事件数。
         """
         self.adc_x = ADC(Pin(x_pin_num))
         self.adc_y = ADC(Pin(y_pin_num))
@@ -31,6 +66,12 @@ class Joystick:
         self.x_center = x_center
         self.y_center = y_center
         self.threshold = threshold
+        self.base_threshold = threshold # 噪声很小时使用的阈值
+        self.noise = 0 # 静止时读数偏离中心的最大值 (噪声带)
+        self.calibrated = False
+        self._saved_center = None # 上次保存到文件的中心值
+        self._cal_reset()
+        self._cal_last = time.ticks_ms()
 
         # 按钮状态管理
         self.debounce_ms = debounce_ms
@@ -40,10 +81,30 @@ class Joystick:
         self._button_pressed_since_last_check = False # 用于 is_button_clicked_once
         self._button_down_start_time = 0 # 按钮按下的起始时间
 
+        # 中断驱动的按钮 (可选)：事件由 Pin.irq + Timer 防抖后写入环形缓冲区
+        self.button_events = None
+        self._irq_button = None
+        if button_timer_id is not None:
+            self.button_events = EventRing(button_queue_size)
+            self._irq_button = DebouncedButton(self.button, Timer(button_timer_id), self.button_events,
+                                               debounce_ms, click_threshold_ms)
+
         # 方向状态管理 (用于避免重复触发方向事件)
         self._last_direction = 'center'
         self._last_direction_time = time.ticks_ms()
         self.direction_repeat_delay_ms = 150 # 相同方向重复触发的最小延迟
+        self.repeat_schedule = self.REPEAT_SCHEDULE
+        self._hold_direction = 'center' # get_direction_step 正在重复的方向
+        self._hold_start = 0
+        self._next_repeat = 0
+
+        # 定时器驱动的后台采样 (可选)：方向变化事件写入 direction_events
+        self.direction_events = None
+        self._sampler = None
+        if sampler_timer_id is not None:
+            self.direction_events = EventRing(direction_queue_size)
+            self._sampler = StickSampler(self.adc_x, self.adc_y, Timer(sampler_timer_id), self.direction_events,
+                                         x_center, y_center, threshold, rate_hz=sample_rate_hz)
 
     def get_raw_values(self):
         """返回摇杆 X 和 Y 轴的原始 ADC 读数。"""
@@ -52,24 +113,20 @@ class Joystick:
     def get_direction(self, allow_repeat=False):
         """
         获取当前摇杆的方向。
+        后台采样时，allow_repeat=False 按顺序取出方向变化事件 (两次快速拨动返回两次方向)，
+        allow_repeat=True 读取滤波后的当前方向。
         Args:
             allow_repeat (bool): 是否允许在摇杆保持在某个方向时重复返回该方向。
                                 如果为 False，则只有方向改变时才返回新方向，否则返回 'center'。
         Returns:
             str: 'up', 'down', 'left', 'right', 'center'。
         """
-        x_val = self.adc_x.read()
-        y_val = self.adc_y.read()
-        current_direction = 'center'
-
-        if x_val > self.x_center + self.threshold:
-            current_direction = 'right'
-        elif x_val < self.x_center - self.threshold:
-            current_direction = 'left'
-        elif y_val > self.y_center + self.threshold: # 注意：ADC值越大通常对应摇杆向下拨动（或根据接线）
-            current_direction = 'down' # 假设 Y 轴值越大是向下
-        elif y_val < self.y_center - self.threshold:
-            current_direction = 'up'   # 假设 Y 轴值越小是向上
+        if self._sampler is not None:
+            if not allow_repeat:
+                return self._pop_direction()
+            current_direction = DIRECTION_NAMES[self._sampler.direction]
+        else:
+            current_direction = self._read_direction()
 
         current_time = time.ticks_ms()
         if allow_repeat:
@@ -92,12 +149,84 @@ class Joystick:
             else:
                 return 'center' # 方向未变，返回 'center' 表示无新方向事件
 
+    def get_direction_step(self, schedule=None):
+        """
+        按住加速重复：拨动时立即返回一次方向，按住不放时按时间表重复返回，步长随按住时间增大。
+        适合输入较大的数值 (下注、出价)，配合 ui.invalidate() 每帧只重绘一次。
+        Args:
+            schedule (tuple, optional): (按住毫秒数, 重复间隔毫秒, 步长) 的序列，按住毫秒数升序，
+                                        默认 self.repeat_schedule。
+        Returns:
+            tuple: (方向, 步长)；本次没有触发时返回 ('center', 0)。
+        """
+        schedule = schedule or self.repeat_schedule
+        now = time.ticks_ms()
+        if self._sampler is not None:
+            # 先处理队列中的拨动事件，两次轮询之间的快速拨动也各算一次
+            event = self._pop_direction()
+            if event != 'center':
+                return self._start_hold(event, now, schedule)
+            direction = DIRECTION_NAMES[self._sampler.direction]
+        else:
+            direction = self._read_direction()
+
+        if direction == 'center':
+            self._hold_direction = 'center'
+            return 'center', 0
+        if direction != self._hold_direction:
+            return self._start_hold(direction, now, schedule)
+        if time.ticks_diff(now, self._next_repeat) < 0:
+            return 'center', 0
+        held = time.ticks_diff(now, self._hold_start)
+        entry = schedule[0]
+        for item in schedule:
+            if held < item[0]:
+                break
+            entry = item
+        self._next_repeat = time.ticks_add(now, entry[1])
+        return direction, entry[2]
+
+    def _start_hold(self, direction, now, schedule):
+        self._hold_direction = direction
+        self._hold_start = now
+        self._next_repeat = time.ticks_add(now, schedule[0][1])
+        return direction, schedule[0][2]
+
+    def _read_direction(self):
+        """直接读取一次 ADC 判断方向 (没有后台采样时使用)"""
+        x_val = self.adc_x.read()
+        y_val = self.adc_y.read()
+        current_direction = 'center'
+
+        if x_val > self.x_center + self.threshold:
+            current_direction = 'right'
+        elif x_val < self.x_center - self.threshold:
+            current_direction = 'left'
+        elif y_val > self.y_center + self.threshold: # 注意：ADC值越大通常对应摇杆向下拨动（或根据接线）
+            current_direction = 'down' # 假设 Y 轴值越大是向下
+        elif y_val < self.y_center - self.threshold:
+            current_direction = 'up'   # 假设 Y 轴值越小是向上
+        return current_direction
+
+    def _pop_direction(self):
+        """取出下一个离开中心的方向事件，没有时返回 'center'"""
+        events = self.direction_events
+        while True:
+            event = events.pop()
+            if event is None:
+                return 'center'
+            if event[0] != CENTER:
+                self._last_direction = DIRECTION_NAMES[event[0]]
+                return self._last_direction
+
     def is_button_down(self):
         """
         检查按钮当前是否被按下（经过防抖处理）。
         Returns:
             bool: True 如果按钮被按下，False 如果按钮未被按下。
         """
+        if self._irq_button:
+            return self._irq_button.is_down()
         current_time = time.ticks_ms()
         raw_button_state = self.button.value() # 0 表示按下, 1 表示松开
 
@@ -155,7 +284,10 @@ class Joystick:
         """
         更推荐的单击检测方法。
         在主循环中调用此方法。如果返回 True，则发生了一次单击。
+        中断驱动时从 button_events 取出一个单击 (之前的按下/松开事件一并丢弃)，每次调用最多消耗一个单击。
         """
+        if self.button_events is not None:
+            return self.button_events.pop_kind(CLICK) is not None
         clicked = False
         current_value = self.button.value() # 直接读取引脚值
         current_time = time.ticks_ms()
@@ -204,13 +336,112 @@ class Joystick:
             time.sleep_ms(10) # 短暂延迟
 
         if samples > 0:
-            self.x_center = x_sum // samples
-            self.y_center = y_sum // samples
+            self._apply_calibration(x_sum // samples, y_sum // samples, self.noise)
             print(f"校准完成: X 中心 = {self.x_center}, Y 中心 = {self.y_center}")
         else:
             print("校准失败，没有采集到样本。")
 
 
+    # --- 校准数据的保存与增量校准 ---
+    def load_calibration(self, path=CALIBRATION_FILE):
+        """
+        读取保存的校准数据 (中心值和噪声带)。
+        Returns:
+            bool: 是否读取成功；文件不存在或内容无效时返回 False，保持当前设置。
+        """
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            x_center, y_center, noise = int(data['x_center']), int(data['y_center']), int(data['noise'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        self._apply_calibration(x_center, y_center, noise)
+        self._saved_center = (x_center, y_center)
+        return True
+
+    def save_calibration(self, path=CALIBRATION_FILE):
+        """把当前的中心值和噪声带写入文件，返回是否成功"""
+        try:
+            with open(path, 'w') as f:
+                json.dump({'x_center': self.x_center, 'y_center': self.y_center, 'noise': self.noise}, f)
+        except OSError:
+            return False
+        self._saved_center = (self.x_center, self.y_center)
+        return True
+
+    def _apply_calibration(self, x_center, y_center, noise):
+        self.x_center = x_center
+        self.y_center = y_center
+        self.noise = noise
+        self.threshold = max(self.base_threshold, noise * self.NOISE_MARGIN)
+        self.calibrated = True
+        if self._sampler:
+            self._sampler.set_calibration(x_center, y_center, self.threshold)
+
+    def _cal_reset(self):
+        self._cal_count = 0
+        self._cal_x_sum = 0
+        self._cal_y_sum = 0
+        self._cal_min_x = self._cal_min_y = 4095
+        self._cal_max_x = self._cal_max_y = 0
+
+    def recalibrate_step(self, path=CALIBRATION_FILE):
+        """
+        增量校准的一步，在主循环空闲时 (如停留在菜单) 反复调用，每次最多读取一次 ADC，不阻塞。
+        摇杆静止时累积读数，凑满一轮后更新中心值和噪声带；摇杆被拨动或按钮按下时丢弃这一轮。
+        中心值明显变化 (或还没有保存过) 时写入校准文件。
+        Returns:
+            bool: 本次是否完成一轮并更新了校准值。
+        """
+        now = time.ticks_ms()
+        if time.ticks_diff(now, self._cal_last) < self.CAL_INTERVAL_MS:
+            return False
+        self._cal_last = now
+        if self._sampler is not None:
+            # 后台采样时直接用滤波后的读数，不和定时器回调同时读 ADC
+            x, y = self._sampler.x, self._sampler.y
+        else:
+            x, y = self.get_raw_values()
+        # 轮询模式下 is_button_down() 会改写单击检测共用的防抖时间戳，这里只读引脚
+        if self._irq_button:
+            pressed = self._irq_button.is_down()
+        else:
+            pressed = self.button.value() == 0
+        limit = self.base_threshold // 2
+        if abs(x - self.x_center) > limit or abs(y - self.y_center) > limit or pressed:
+            self._cal_reset() # 有人在操作摇杆
+            return False
+        self._cal_count += 1
+        self._cal_x_sum += x
+        self._cal_y_sum += y
+        self._cal_min_x = min(self._cal_min_x, x)
+        self._cal_max_x = max(self._cal_max_x, x)
+        self._cal_min_y = min(self._cal_min_y, y)
+        self._cal_max_y = max(self._cal_max_y, y)
+        if self._cal_count < self.CAL_SAMPLES:
+            return False
+
+        x_center = self._cal_x_sum // self._cal_count
+        y_center = self._cal_y_sum // self._cal_count
+        noise = max(self._cal_max_x - self._cal_min_x, self._cal_max_y - self._cal_min_y) // 2 + 1
+        self._cal_reset()
+        if noise * self.NOISE_MARGIN > self.base_threshold * 2:
+            return False # 读数跨度太大，摇杆多半没有静止
+        self._apply_calibration(x_center, y_center, noise)
+        saved = self._saved_center
+        if saved is None or abs(saved[0] - x_center) > self.CAL_SAVE_DELTA or \
+                abs(saved[1] - y_center) > self.CAL_SAVE_DELTA:
+            self.save_calibration(path)
+        return True
+
+    def next_tick(self):
+        """
+        主循环每次迭代结束时调用。真实摇杆不需要做什么；
+        input_replay 的录制器/回放器用它把输入对齐到主循环的迭代。
+        """
+        pass
+
+
 # --- 如何在 main.py 中使用 (示例) ---
 if __name__ == '__main__':
     # 假设引脚连接
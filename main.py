@@ -11,6 +11,7 @@ try:
     from game_trust_evolution import GameTrustEvolution
     from game_points_showdown import GamePointsShowdown
     from game_auction import AuctionGame
+    from input_replay import InputRecorder
 except ImportError as e:
     print(f"!!! 关键模块导入失败: {e} !!!")
     print("请检查模块文件是否存在于 ESP32 上，并且文件名正确。")
@@ -68,6 +69,18 @@ ST7789_BL_PIN_NUM = 13
 SCREEN_WIDTH = 240
 SCREEN_HEIGHT = 320
 SCREEN_ROTATION = 0 # 0, 1, 2, or 3
+# 后备缓冲区：绘制先写入 RAM，每帧只发送合并后的脏矩形
+SCREEN_BACK_BUFFER = False
+SCREEN_BUFFER_BAND_HEIGHT = None # None 表示整帧缓冲 (150 KB，需要 PSRAM)；内存紧张时设为如 40
+SCREEN_BUFFER_MAX_BANDS = None   # 最多驻留的分带数，None 表示不限制
+SCREEN_GLYPH_CACHE_BYTES = 16 * 1024 # 已展开字形的缓存上限 (字节)，每个 8x16 字形 256 字节，0 表示不缓存
+SCREEN_BUFFER_INDEXED = False    # 4 位调色板缓冲区 (整帧 38 KB，不需要 PSRAM)，最多 16 种颜色
+# 后台发送线程：SPI 传输在 _thread 工作线程中进行，不阻塞主循环
+SCREEN_ASYNC_FLUSH = False
+# 游戏界面重绘的帧率上限：同一帧内多次 ui.invalidate() 只重绘一次
+SCREEN_MAX_FPS = 25
+# 中文点阵字体 (convert_font.py 生成)，文件不存在时只显示 ASCII
+UI_FONT_FILE = 'cjk16.fnt'
 
 # Joystick 引脚配置
 JOYSTICK_X_PIN_NUM = 16     # 占位符 (来自崔的代码)
@@ -77,8 +90,31 @@ JOYSTICK_BTN_PIN_NUM = 18   # 占位符 (来自崔的代码)
 JOYSTICK_X_CENTER = 2048 # 占位符
 JOYSTICK_Y_CENTER = 2048 # 占位符
 JOYSTICK_THRESHOLD = 800 # 占位符
+JOYSTICK_BUTTON_TIMER_ID = 0 # 按钮防抖用的硬件定时器 (中断驱动，不会漏掉单击)；None 表示轮询
+JOYSTICK_CALIBRATION_FILE = 'joystick_cal.json' # 摇杆校准数据 (中心值和噪声带)，开机直接读取
+JOYSTICK_SAMPLER_TIMER_ID = 1 # 后台过采样摇杆 ADC 的硬件定时器；None 表示每次 get_direction 直接读 ADC
+INPUT_RECORD_FILE = None # 例如 'session.inp'：录制本次会话的输入，可在电脑上用 input_replay.replay_session 回放
 
 # --- 初始化函数 ---
+def setup_screen(display):
+    """
+    按上面的屏幕配置启用后备缓冲区、后台发送线程，创建 UIManager 并加载中文字体。
+    input_replay.replay_session 在仿真面板上也调用它，回放的画面与设备上使用相同的配置。
+    Returns:
+        UIManager: UI 管理器。
+    """
+    if SCREEN_BACK_BUFFER:
+        display.enable_back_buffer(SCREEN_BUFFER_BAND_HEIGHT, SCREEN_BUFFER_MAX_BANDS,
+                                   indexed=SCREEN_BUFFER_INDEXED)
+        print("- 屏幕后备缓冲区已启用。")
+    if SCREEN_ASYNC_FLUSH:
+        display.enable_async_flush()
+        print("- 屏幕后台发送线程已启用。")
+    ui_manager = UIManager(display, max_fps=SCREEN_MAX_FPS)
+    if ui_manager.load_font(UI_FONT_FILE):
+        print("- 中文字体已加载。")
+    return ui_manager
+
 def initialize_hardware():
     global spi_bus, st7789_dev, ui, joystick_dev
     print("正在初始化硬件...")
@@ -105,14 +141,15 @@ def initialize_hardware():
             cs=None,
             reset=rst_pin,
             backlight=bl_pin,
-            rotation=SCREEN_ROTATION
+            rotation=SCREEN_ROTATION,
+            glyph_cache_bytes=SCREEN_GLYPH_CACHE_BYTES
         )
         print("- ST7789 屏幕驱动初始化完成。")
         if bl_pin:
             st7789_dev.backlight(1) # 打开背光
 
-        # 3. 初始化 UI 管理器
-        ui = UIManager(st7789_dev) # 假设 UIManager 构造函数只需要屏幕驱动实例
+        # 3. 启用后备缓冲区/后台发送，初始化 UI 管理器
+        ui = setup_screen(st7789_dev)
         print("- UI 管理器初始化完成。")
 
         # 4. 初始化摇杆驱动
@@ -122,14 +159,20 @@ def initialize_hardware():
             JOYSTICK_BTN_PIN_NUM,
             x_center=JOYSTICK_X_CENTER, # 可以传入预设值
             y_center=JOYSTICK_Y_CENTER,
-            threshold=JOYSTICK_THRESHOLD
+            threshold=JOYSTICK_THRESHOLD,
+            button_timer_id=JOYSTICK_BUTTON_TIMER_ID,
+            sampler_timer_id=JOYSTICK_SAMPLER_TIMER_ID
         )
         # ui.show_message_box(["准备校准摇杆", "请勿触摸", "按键开始"], title="校准提示")
         # while not joystick_dev.check_for_single_click(): time.sleep_ms(20) # 等待按键开始校准
         # ui.clear_screen()
         # ui.display_text_line("校准中...", 10, SCREEN_HEIGHT // 2, ui.text_color)
-        joystick_dev.calibrate(calibration_time_s=2) # 运行摇杆校准
-        print("- 摇杆驱动初始化并校准完成。")
+        # 不再开机阻塞校准 2 秒：读取保存的校准数据，之后在菜单空闲时增量校准 (recalibrate_step)
+        if joystick_dev.load_calibration(JOYSTICK_CALIBRATION_FILE):
+            print(f"- 摇杆驱动初始化完成，已加载校准数据: X 中心 = {joystick_dev.x_center}, "
+                  f"Y 中心 = {joystick_dev.y_center}, 噪声 = {joystick_dev.noise}")
+        else:
+            print("- 摇杆驱动初始化完成，没有校准数据，将在空闲时自动校准。")
 
         print("硬件初始化成功！")
         return True
@@ -139,6 +182,7 @@ def initialize_hardware():
         if st7789_dev: # 即使UI管理器没成功，底层驱动可能可以画点东西
             try:
                 st7789_dev.fill(st7789_dev.RED) # 用红色填充屏幕表示错误
+                st7789_dev.show()
                 # 尝试用framebuf显示简单文本，如果UIManager失败了
                 # from framebuf import FrameBuffer, MONO_HLSB
                 # buf = bytearray(8 * (len(str(e)) // 8 +1)) # 粗略计算
@@ -177,10 +221,13 @@ def handle_main_menu_input():
         game_te_instance = None
         game_ps_instance = None
         game_auction_instance = None
+    else:
+        # 菜单空闲：顺便做一步增量校准 (摇杆静止时才采样，最多一次 ADC 读取)
+        joystick_dev.recalibrate_step(JOYSTICK_CALIBRATION_FILE)
 
 # --- 主循环 ---
 def main_loop():
-    global current_state, running
+    global current_state, running, joystick_dev
     global game_te_instance, game_ps_instance, game_auction_instance, main_menu_selected_idx
 
     while running:
@@ -189,11 +236,20 @@ def main_loop():
             if initialize_hardware():
                 current_state = STATE_WELCOME_SCREEN
                 ui.show_welcome_screen() # 显示欢迎界面
+                ui.present()
+                if ui.splash_ms is not None:
+                    print(f"启动图绘制耗时: {ui.splash_ms} ms")
                 # 等待片刻或按键继续
                 start_time = time.ticks_ms()
                 while time.ticks_diff(time.ticks_ms(), start_time) < 2000: # 显示2秒
                     if joystick_dev.check_for_single_click(): break # 按键可跳过
+                    if not joystick_dev.calibrated:
+                        joystick_dev.recalibrate_step(JOYSTICK_CALIBRATION_FILE) # 首次开机：利用欢迎界面的时间校准
+                    ui.frame_tick() # 推进加载进度条
                     time.sleep_ms(20)
+                if INPUT_RECORD_FILE:
+                    # 从主菜单开始录制，回放时也从主菜单开始
+                    joystick_dev = InputRecorder(joystick_dev, INPUT_RECORD_FILE)
                 current_state = STATE_MAIN_MENU
                 ui.draw_menu(main_menu_items, main_menu_selected_idx, title="gambling bot")
             else:
@@ -218,6 +274,7 @@ def main_loop():
                 game_status = game_te_instance.game_loop_tick()
                 if game_status == "GAME_ENDED_TE":
                     current_state = STATE_MAIN_MENU
+                    ui.set_renderer(None) # 游戏结束，停止按帧重绘游戏界面
                     ui.draw_menu(main_menu_items, main_menu_selected_idx, title="gambling bot")
                     game_te_instance = None # 清理实例
 
@@ -232,6 +289,7 @@ def main_loop():
                 game_status = game_ps_instance.game_loop_tick()
                 if game_status == "GAME_ENDED_PS":
                     current_state = STATE_MAIN_MENU
+                    ui.set_renderer(None) # 游戏结束，停止按帧重绘游戏界面
                     ui.draw_menu(main_menu_items, main_menu_selected_idx, title="gambling bot")
                     game_ps_instance = None
 
@@ -246,6 +304,7 @@ def main_loop():
                 game_status = game_auction_instance.game_loop_tick()
                 if game_status == "GAME_ENDED_AUCTION":
                     current_state = STATE_MAIN_MENU
+                    ui.set_renderer(None) # 游戏结束，停止按帧重绘游戏界面
                     ui.draw_menu(main_menu_items, main_menu_selected_idx, title="gambling bot")
                     game_auction_instance = None
 
@@ -254,12 +313,23 @@ def main_loop():
             if ui: # 确保ui已初始化
                 ui.clear_screen()
                 ui.show_message_box(["Thank you!", "Turning off the bot..."], title="Good bye")
+                ui.present()
             print("机器人正在关闭...")
-            time.sleep(2) # 给用户时间看屏幕
+            time.sleep_ms(2000) # 给用户时间看屏幕
+
+        # 执行本帧合并后的重绘 (游戏通过 ui.invalidate() 请求)，再统一推送到屏幕
+        if ui:
+            ui.frame_tick()
+
+        if joystick_dev:
+            joystick_dev.next_tick() # 录制/回放按主循环迭代对齐输入
 
         # 主循环延时，控制帧率，避免CPU满载
         time.sleep_ms(30) # 约 33 FPS，可以根据需要调整
 
+    if INPUT_RECORD_FILE and joystick_dev:
+        joystick_dev.flush() # 写入录制缓冲区中剩余的数据
+
 # --- 程序入口 ---
 if __name__ == "__main__":
     try:
@@ -279,6 +349,7 @@ if __name__ == "__main__":
         elif st7789_dev: # 如果只有底层驱动
              try:
                 st7789_dev.fill(st7789_dev.RED)
+                st7789_dev.show()
              except:
                 pass
     finally:
@@ -287,6 +358,8 @@ if __name__ == "__main__":
             try:
                 st7789_dev.backlight(0) # 关闭背光
                 st7789_dev.fill(st7789_dev.BLACK) # 清屏
+                st7789_dev.show()
+                st7789_dev.disable_async_flush() # 等待后台线程发送完毕
             except:
                 pass
         print("程序已退出。")
@@ -0,0 +1,142 @@
+# rgb565.py
+# 单色位图 (MONO_HLSB) 到 RGB565 字节流的批量展开引擎，以及纯色填充用的行缓冲区。
+# 纯 Python 实现，不依赖 machine/framebuf，可在主机上直接运行和测速。
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ucollections import OrderedDict
+
+
+class MonoExpander:
+    """
+    按行把 MONO_HLSB 缓冲区展开为 RGB565 (大端) 字节流。
+    每个 (前景色, 背景色) 组合预先生成一张 256 项查找表：
+    一个源字节 (8 个像素) 直接对应 16 个输出字节，展开时一次切片拷贝完成 8 个像素。
+    """
+
+    def __init__(self, max_tables=4):
+        """
+        Args:
+            max_tables (int): 最多缓存的颜色组合数 (每张表 4 KB)。
+        """
+        self.max_tables = max_tables
+        self._tables = OrderedDict()
+
+    def table(self, fg, bg):
+        """返回 (fg, bg) 对应的查找表 (bytearray, 256*16 字节)，必要时生成并淘汰最久未用的表。"""
+        key = (fg, bg)
+        lut = self._tables.get(key)
+        if lut is not None:
+            # 重新插入，移动到最近使用的位置
+            del self._tables[key]
+            self._tables[key] = lut
+            return lut
+
+        # 先生成 16 项半字节表 (4 像素 = 8 字节)，再拼成完整字节表
+        fg_hi, fg_lo = (fg >> 8) & 0xFF, fg & 0xFF
+        bg_hi, bg_lo = (bg >> 8) & 0xFF, bg & 0xFF
+        nibbles = []
+        for n in range(16):
+            part = bytearray(8)
+            for bit in range(4):
+                if n & (0x08 >> bit):
+                    part[bit * 2] = fg_hi
+                    part[bit * 2 + 1] = fg_lo
+                else:
+                    part[bit * 2] = bg_hi
+                    part[bit * 2 + 1] = bg_lo
+            nibbles.append(part)
+
+        lut = bytearray(256 * 16)
+        for b in range(256):
+            base = b << 4
+            lut[base:base + 8] = nibbles[b >> 4]
+            lut[base + 8:base + 16] = nibbles[b & 0x0F]
+
+        if len(self._tables) >= self.max_tables:
+            del self._tables[next(iter(self._tables))]
+        self._tables[key] = lut
+        return lut
+
+    def expand(self, src, src_stride, width, height, fg, bg, dst=None, dst_stride=None, dst_offset=0):
+        """
+        把 MONO_HLSB 位图展开为 RGB565。
+        Args:
+            src: 源位图 (bytes/bytearray/memoryview)，每行 src_stride 字节，最高位为最左像素。
+            width, height (int): 要展开的像素区域尺寸。
+            fg, bg (int): 置位/清零像素对应的 RGB565 颜色。
+            dst (bytearray, optional): 输出缓冲区，为 None 时新建 width*height*2 字节。
+            dst_stride (int, optional): 输出每行字节数，默认 width*2。
+            dst_offset (int): 输出起始偏移 (字节)。
+        Returns:
+            bytearray: 输出缓冲区。
+        """
+        if dst_stride is None:
+            dst_stride = width * 2
+        if dst is None:
+            dst = bytearray(dst_offset + dst_stride * height)
+        lut = memoryview(self.table(fg, bg))
+        out = memoryview(dst)
+        full = width >> 3
+        rem_bytes = (width & 7) * 2
+
+        for row in range(height):
+            s = row * src_stride
+            d = dst_offset + row * dst_stride
+            for i in range(s, s + full):
+                b = src[i] << 4
+                out[d:d + 16] = lut[b:b + 16]
+                d += 16
+            if rem_bytes:
+                b = src[s + full] << 4
+                out[d:d + rem_bytes] = lut[b:b + rem_bytes]
+        return dst
+
+
+def fill565(buf, start, span, color):
+    """
+    用同一颜色填满 buf[start:start+span] (span 为字节数，按 2 字节一个像素)。
+    先写一个像素，再倍增拷贝，循环次数只有 log2(像素数)。
+    """
+    mv = memoryview(buf)
+    mv[start] = (color >> 8) & 0xFF
+    mv[start + 1] = color & 0xFF
+    filled = 2
+    while filled < span:
+        n = min(filled, span - filled)
+        mv[start + filled:start + filled + n] = mv[start:start + n]
+        filled += n
+
+
+class FillLines:
+    """
+    每种颜色一条预先填好的像素行缓冲区，用于纯色填充时反复发送，避免每块数据都重新分配。
+    """
+
+    def __init__(self, pixels=512, max_colors=4):
+        """
+        Args:
+            pixels (int): 每条缓冲区的像素数 (每次 spi.write 的最大块)。
+            max_colors (int): 最多缓存的颜色数。
+        """
+        self.pixels = pixels
+        self.max_colors = max_colors
+        self._lines = OrderedDict()
+
+    def get(self, color):
+        """返回填满 color 的 memoryview (pixels*2 字节)。"""
+        line = self._lines.get(color)
+        if line is not None:
+            del self._lines[color]
+            self._lines[color] = line
+            return line
+        if len(self._lines) >= self.max_colors:
+            # 复用最久未使用的缓冲区，而不是重新分配
+            oldest = next(iter(self._lines))
+            line = self._lines.pop(oldest)
+        else:
+            line = memoryview(bytearray(self.pixels * 2))
+        fill565(line, 0, len(line), color)
+        self._lines[color] = line
+        return line
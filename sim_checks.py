@@ -0,0 +1,246 @@
+# sim_checks.py
+# 输入相关的主机检查：用 sim_display 的 SimPin / SimTimer / SimClock 按脚本驱动中断代码，
+# 以及录制一局脚本输入再回放、逐帧比较画面。结果不符时抛出 AssertionError。只在电脑上运行 (无需上传):
+#     python sim_checks.py
+import os
+import sys
+import tempfile
+import zlib
+
+from sim_display import SimClock, SimPin, SimTimer, install_host_shims
+
+install_host_shims()
+
+from input_events import EventRing, DebouncedButton, PRESS, RELEASE, CLICK # noqa: E402
+
+
+def _push_at_line(ring, n, kind, t):
+    """
+    在 ring.pop() 执行到第 n 行之前调用一次 ring.push(kind, t)，模拟 pop() 执行到一半时插入的软中断。
+    Returns:
+        bool: 是否真的插入了 (n 超出 pop() 执行的行数时为 False)。
+    """
+    state = {'line': 0, 'fired': False}
+
+    def local(frame, event, arg):
+        if event == 'line':
+            if state['line'] == n and not state['fired']:
+                state['fired'] = True
+                sys.settrace(None)
+                ring.push(kind, t)
+                sys.settrace(tracer)
+            state['line'] += 1
+        return local
+
+    def tracer(frame, event, arg):
+        if frame.f_code is EventRing.pop.__code__:
+            return local
+        return None
+
+    sys.settrace(tracer)
+    try:
+        ring.pop()
+    finally:
+        sys.settrace(None)
+    return state['fired']
+
+
+def _drain(ring):
+    events = []
+    while True:
+        event = ring.pop()
+        events.append(event)
+        if event is None:
+            return events
+
+
+def check_ring_interleaved_push():
+    """
+    在 pop() 的每一行之前各插入一次 push()，之后剩下的事件都必须按顺序取出，不能丢失或读出空槽；
+    再检查写满和回绕。
+    """
+    n = 0
+    while True:
+        ring = EventRing(4)
+        ring.push(PRESS, 1)
+        ring.push(RELEASE, 2)
+        if not _push_at_line(ring, n, CLICK, 3):
+            break
+        events = _drain(ring)
+        assert events == [(RELEASE, 2), (CLICK, 3), None], (n, events)
+        assert ring.dropped == 0 and len(ring) == 0
+        n += 1
+
+    # 写满时丢弃新事件，已有的事件保持不变
+    ring = EventRing(2)
+    for t in range(3):
+        ring.push(PRESS, t)
+    assert ring.dropped == 1 and len(ring) == 2
+    assert _drain(ring) == [(PRESS, 0), (PRESS, 1), None]
+    # 回绕后仍然按顺序取出
+    for t in range(5):
+        ring.push(RELEASE, t)
+        assert ring.pop() == (RELEASE, t)
+    assert len(ring) == 0
+    print("EventRing: 中断插入、写满、回绕 OK")
+
+
+def check_button_script(debounce_ms=50, click_threshold_ms=300):
+    """
+    按脚本驱动 DebouncedButton：按下和松开带抖动的短按、长按、纯抖动 (没有稳定到新电平)，
+    检查产生的事件序列和时间戳 (取每组抖动的第一个边沿)。
+    """
+    SimClock.install(1000)
+    SimTimer._active = []
+    pin = SimPin(0, SimPin.IN, SimPin.PULL_UP)
+    events = EventRing(16)
+    button = DebouncedButton(pin, SimTimer(0), events, debounce_ms, click_threshold_ms)
+
+    # 短按：按下时抖动 3 ms，保持 120 ms，松开时抖动 2 ms
+    pin.drive((0, 1), (1, 1), (0, 120), (1, 1), (0, 1), (1, 100))
+    # 长按：按下保持 600 ms
+    pin.drive((0, 600), (1, 100))
+    # 干扰：低电平毛刺在防抖时间内回到高电平，不产生事件
+    pin.drive((0, 10), (1, 100))
+    button.deinit()
+
+    expected = [
+        (PRESS, 1000), (RELEASE, 1122), (CLICK, 1122),
+        (PRESS, 1224), (RELEASE, 1824),
+        None,
+    ]
+    got = _drain(events)
+    assert got == expected, got
+    assert events.dropped == 0 and not button.is_down()
+    print("DebouncedButton: 抖动、单击、长按、毛刺 OK")
+
+
+class _ScriptedStick:
+    """
+    按脚本提供输入的摇杆 (接口与 Joystick 相同)：每个 tick 取 script(tick) 返回的事件，
+    当前界面没有读取的事件在 tick 结束时丢弃；每个 tick 时钟前进 tick_ms。
+    """
+    calibrated = True
+
+    def __init__(self, script, tick_ms=20):
+        """
+        Args:
+            script (callable): script(tick) 返回 [('dir', 方向) | ('step', (方向, 步长)) | ('click', True), ...]。
+        """
+        self.script = script
+        self.tick_ms = tick_ms
+        self.ticks = 0
+        self._load()
+
+    def _load(self):
+        self._pending = {'dir': [], 'step': [], 'click': []}
+        for kind, value in self.script(self.ticks):
+            self._pending[kind].append(value)
+
+    def next_tick(self):
+        SimClock.advance(self.tick_ms)
+        self.ticks += 1
+        self._load()
+
+    def get_direction(self, allow_repeat=False):
+        pending = self._pending['dir']
+        return pending.pop(0) if pending else 'center'
+
+    def get_direction_step(self, schedule=None):
+        pending = self._pending['step']
+        return pending.pop(0) if pending else ('center', 0)
+
+    def check_for_single_click(self):
+        pending = self._pending['click']
+        return bool(pending and pending.pop(0))
+
+    def is_button_down(self):
+        return False
+
+    def recalibrate_step(self, path=None):
+        return False
+
+
+def _session_script():
+    """
+    依次玩三个游戏的输入脚本：在主菜单中向下移动到下一个游戏并单击进入；
+    游戏中每 6 个 tick 单击一次，中间穿插方向和下注步进。
+    """
+    import main
+    directions = ('up', 'down', 'left', 'right')
+    game = [0, False] # 要进入的游戏序号, 上一个 tick 是否在主菜单
+
+    def script(tick):
+        events = []
+        in_menu = main.current_state == main.STATE_MAIN_MENU
+        if in_menu:
+            if not game[1] and tick:
+                game[0] += 1 # 刚从游戏回到主菜单
+            if game[0] > 3 or tick % 3:
+                pass
+            elif main.main_menu_selected_idx < game[0] - 1:
+                events.append(('dir', 'down'))
+            else:
+                events.append(('click', True))
+        else:
+            if tick % 6 == 0:
+                events.append(('click', True))
+            elif tick % 6 == 3:
+                events.append(('dir', directions[tick // 6 % 4]))
+            if tick % 11 == 5:
+                events.append(('step', (directions[tick // 11 % 4], 1 + tick % 5)))
+        game[1] = in_menu
+        return events
+    return script
+
+
+def check_record_replay(max_ticks=3000, seed=1234):
+    """
+    用 InputRecorder 录制一段脚本输入驱动的会话 (按 main.py 的配置运行 main.main_loop，
+    依次玩完三个游戏)，再用 replay_session 回放，每个 tick 的画面必须与录制时逐像素一致。
+    """
+    import main
+    from input_replay import InputRecorder, prepare_sim_main, replay_session
+
+    recorded = []
+    replayed = []
+    states = set()
+    fd, path = tempfile.mkstemp(suffix='.inp')
+    os.close(fd)
+    try:
+        SimClock.install(0)
+        recorder = InputRecorder(_ScriptedStick(_session_script()), path, seed)
+
+        def record_tick(tick, panel):
+            recorded.append(zlib.crc32(panel.frame()))
+            states.add(main.current_state)
+            if tick + 1 >= max_ticks or (main.STATE_GAME_AUCTION_RUNNING in states and
+                                         main.current_state == main.STATE_MAIN_MENU):
+                main.running = False # 三个游戏都玩过并回到了主菜单
+        st7789, _ = prepare_sim_main(recorder, record_tick)
+        try:
+            main.main_loop()
+        finally:
+            st7789.disable_async_flush()
+        recorder.flush()
+
+        result = replay_session(path, on_tick=lambda tick, panel: replayed.append(zlib.crc32(panel.frame())))
+    finally:
+        os.remove(path)
+    for state in (main.STATE_GAME_TE_RUNNING, main.STATE_GAME_PS_RUNNING, main.STATE_GAME_AUCTION_RUNNING):
+        assert state in states, "脚本没有进入所有游戏: {}".format(sorted(states))
+    mismatch = next((i for i, (a, b) in enumerate(zip(recorded, replayed)) if a != b), None)
+    assert mismatch is None, "回放画面在第 {} 个 tick 与录制不一致".format(mismatch)
+    assert len(replayed) >= len(recorded), "回放只有 {} 个 tick，录制了 {} 个".format(len(replayed), len(recorded))
+    print("录制/回放: {} 个 tick, {} 个不同画面, {} 帧重绘, 逐帧一致".format(
+        len(recorded), len(set(recorded)), result['frames']))
+
+
+def main():
+    check_ring_interleaved_push()
+    check_button_script()
+    check_record_replay()
+
+
+if __name__ == '__main__':
+    main()
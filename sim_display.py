@@ -0,0 +1,537 @@
+# sim_display.py
+# 电脑上的 ST7789 仿真后端：用模拟的 SPI/Pin 代替硬件，把 CASET/RASET/RAMWR/MADCTL 等命令
+# 解码到内存中的 240x320 RGB565 图像，可导出 PPM/PNG 画面；同时统计命令数、字节数、
+# 片选事务数，并按 SPI 波特率估算线上传输时间。只依赖标准库，有 NumPy 时可取出 ndarray。
+#
+#     from sim_display import make_display
+#     st7789, panel = make_display()
+#     st7789.fill_rect(10, 10, 50, 20, st7789.RED)
+#     print(panel.stats, panel.wire_ms())
+#     panel.save_png('frame.png')
+import sys
+import struct
+import time
+import types
+import zlib
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SPI_BAUDRATE = 40000000 # 与 main.py 的默认配置一致
+
+# ST7789 命令
+_SWRESET = 0x01
+_INVOFF = 0x20
+_INVON = 0x21
+_CASET = 0x2A
+_RASET = 0x2B
+_RAMWR = 0x2C
+_VSCRDEF = 0x33
+_MADCTL = 0x36
+_VSCSAD = 0x37
+
+_COMMAND_NAMES = {
+    0x01: 'SWRESET', 0x11: 'SLPOUT', 0x13: 'NORON', 0x20: 'INVOFF', 0x21: 'INVON',
+    0x28: 'DISPOFF', 0x29: 'DISPON', 0x2A: 'CASET', 0x2B: 'RASET', 0x2C: 'RAMWR',
+    0x33: 'VSCRDEF', 0x36: 'MADCTL', 0x37: 'VSCSAD', 0x3A: 'COLMOD',
+}
+
+_SWAP_BYTES = sys.byteorder == 'little' # RGB565 在总线上是大端
+
+
+class SimPin:
+    """模拟 machine.Pin：保存电平，电平变化时调用 on_change(value) 和 irq() 注册的中断回调"""
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, id=None, mode=-1, pull=None, value=None, on_change=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self._value = value if value is not None else (1 if pull == self.PULL_UP else 0)
+        self.on_change = on_change
+        self.handler = None
+        self.trigger = None
+
+    def init(self, mode=-1, pull=None, value=None):
+        if mode != -1:
+            self.mode = mode
+        if pull is not None:
+            self.pull = pull
+        if value is not None:
+            self(value)
+
+    def __call__(self, value=None):
+        if value is None:
+            return self._value
+        value = 1 if value else 0
+        if value != self._value:
+            self._value = value
+            if self.on_change:
+                self.on_change(value)
+            if self.handler and self.trigger & (self.IRQ_RISING if value else self.IRQ_FALLING):
+                self.handler(self)
+
+    def value(self, value=None):
+        return self(value)
+
+    def on(self):
+        self(1)
+
+    def off(self):
+        self(0)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING):
+        self.handler = handler
+        self.trigger = trigger
+
+    def drive(self, *edges):
+        """
+        按脚本产生边沿，模拟外部电路驱动输入引脚：每项为电平，或 (电平, 之后前进的毫秒数)。
+        前进时间需要测试代码提供可控的 time.ticks_ms (见 SimClock)，并会运行到期的 SimTimer。
+        """
+        for edge in edges:
+            value, ms = edge if isinstance(edge, tuple) else (edge, 0)
+            self(value)
+            if ms:
+                SimClock.advance(ms)
+
+
+class SimClock:
+    """
+    可控的毫秒时钟：install() 之后 time.ticks_ms 返回 SimClock.now，advance() 前进时间并运行到期的定时器。
+    用于在电脑上按脚本测试中断和定时器驱动的输入代码。
+    """
+    now = 0
+
+    @classmethod
+    def install(cls, start=0):
+        install_host_shims()
+        cls.now = start
+        time.ticks_ms = lambda: cls.now
+
+    @classmethod
+    def advance(cls, ms):
+        """逐毫秒前进，使定时器按正确的先后顺序触发"""
+        for _ in range(ms):
+            cls.now += 1
+            SimTimer.run_due(cls.now)
+
+
+class SimTimer:
+    """模拟 machine.Timer：到期时间按 time.ticks_ms 计算，由 run_due() (或 SimClock.advance) 触发回调"""
+    ONE_SHOT = 0
+    PERIODIC = 1
+    _active = []
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self.callback = None
+        self.deadline = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, period=-1, callback=None, freq=None):
+        if freq:
+            period = 1000 // freq
+        self.mode = mode
+        self.period = max(1, period)
+        self.callback = callback
+        self.deadline = time.ticks_ms() + self.period
+        if self not in SimTimer._active:
+            SimTimer._active.append(self)
+
+    def deinit(self):
+        self.deadline = None
+        if self in SimTimer._active:
+            SimTimer._active.remove(self)
+
+    @classmethod
+    def run_due(cls, now=None):
+        """触发所有到期的定时器回调，返回触发次数"""
+        if now is None:
+            now = time.ticks_ms()
+        fired = 0
+        for timer in list(cls._active):
+            while timer.deadline is not None and now >= timer.deadline:
+                if timer.mode == cls.PERIODIC:
+                    timer.deadline += timer.period
+                else:
+                    timer.deinit()
+                fired += 1
+                if timer.callback:
+                    timer.callback(timer)
+        return fired
+
+
+class SimSPI:
+    """
+    模拟 machine.SPI：write() 交给面板解码。
+    latency=True 时 write() 按波特率真正等待 len(buf) * 8 / baudrate 秒 (释放 GIL)，
+    用来在电脑上测试后台发送线程与绘制的重叠。
+    """
+
+    def __init__(self, id=1, baudrate=SPI_BAUDRATE, polarity=0, phase=0, sck=None, mosi=None, miso=None,
+                 panel=None, latency=False):
+        self.id = id
+        self.baudrate = baudrate
+        self.panel = panel
+        self.latency = latency
+
+    def init(self, baudrate=None, **kwargs):
+        if baudrate is not None:
+            self.baudrate = baudrate
+
+    def deinit(self):
+        pass
+
+    def write(self, buf):
+        if self.panel:
+            self.panel._write(buf)
+        if self.latency:
+            time.sleep(len(buf) * 8 / self.baudrate)
+
+
+class SimADC:
+    """模拟 machine.ADC：读数由测试代码写入 self.raw"""
+    ATTN_0DB = 0
+    ATTN_11DB = 3
+    WIDTH_12BIT = 3
+
+    def __init__(self, pin, atten=None):
+        self.pin = pin
+        self.raw = 2048
+
+    def atten(self, value):
+        pass
+
+    def width(self, value):
+        pass
+
+    def read(self):
+        return self.raw
+
+    def read_u16(self):
+        return self.raw << 4
+
+
+class SimPanel:
+    """
+    ST7789 面板模型。显存按物理方向保存为 240x320 (行优先) 的 RGB565 数组，
+    MADCTL 的 MV/MX/MY 位用于把窗口地址映射到物理像素。
+    """
+
+    def __init__(self, width=240, height=320, baudrate=SPI_BAUDRATE, inverted=True,
+                 write_overhead_us=10, cs_overhead_us=2, spi_latency=False):
+        """
+        Args:
+            width, height (int): 面板物理分辨率。
+            baudrate (int): SPI 时钟，用于估算线上时间。
+            inverted (bool): 面板是否反色显示 (本项目的屏幕是反色的，驱动里 WHITE = 0x0000)。
+                             只影响导出的图片，INVON/INVOFF 命令会切换它。
+            write_overhead_us (float): 每次 spi.write 调用的固定开销估计 (微秒)。
+            cs_overhead_us (float): 每次片选事务的固定开销估计 (微秒)。
+            spi_latency (bool): spi.write 是否按波特率真正等待 (见 SimSPI)。
+        """
+        self.width = width
+        self.height = height
+        self.inverted = inverted
+        self.write_overhead_us = write_overhead_us
+        self.cs_overhead_us = cs_overhead_us
+        self.spi = SimSPI(baudrate=baudrate, panel=self, latency=spi_latency)
+        self.dc = SimPin('dc')
+        self.cs = SimPin('cs', value=1, on_change=self._cs_changed)
+        self.reset = SimPin('reset', value=1, on_change=self._reset_changed)
+        self.backlight = SimPin('backlight')
+        self.gram = array('H', bytes(width * height * 2))
+        self.stats = None
+        self.reset_stats()
+        self._power_on()
+
+    def _power_on(self):
+        self.madctl = 0
+        self.columns = (0, self.width - 1)
+        self.rows = (0, self.height - 1)
+        self.scroll_area = None # (顶部固定行数, 滚动行数, 底部固定行数)
+        self.scroll_start = 0
+        self._command = None
+        self._args = bytearray()
+        self._ptr = 0
+        self._odd = None # RAMWR 数据在两次 write 之间被拆开的半个像素
+
+    def reset_stats(self):
+        """清零统计并返回清零前的值"""
+        old = self.stats
+        self.stats = {
+            'transactions': 0,   # 片选事务数 (CS 下降沿)
+            'writes': 0,         # spi.write 调用次数
+            'commands': 0,       # 命令字节数
+            'bytes': 0,          # 总字节数
+            'pixel_bytes': 0,    # RAMWR 之后的像素字节数
+            'by_command': {},    # 各命令的次数
+        }
+        return old
+
+    def wire_ms(self, stats=None):
+        """按 SPI 波特率计算纯数据传输时间 (毫秒)"""
+        stats = stats or self.stats
+        return stats['bytes'] * 8 * 1000 / self.spi.baudrate
+
+    def latency_ms(self, stats=None):
+        """线上时间加上每次 spi.write 和每个片选事务的固定开销 (毫秒)"""
+        stats = stats or self.stats
+        overhead_us = stats['writes'] * self.write_overhead_us + stats['transactions'] * self.cs_overhead_us
+        return self.wire_ms(stats) + overhead_us / 1000
+
+    # --- 总线解码 ---
+    def _cs_changed(self, value):
+        if value == 0:
+            self.stats['transactions'] += 1
+
+    def _reset_changed(self, value):
+        if value == 0:
+            self._power_on()
+
+    def _write(self, buf):
+        data = memoryview(buf)
+        stats = self.stats
+        stats['writes'] += 1
+        stats['bytes'] += len(data)
+        if self.cs() != 0:
+            return # 未选中，面板忽略总线数据
+        if self.dc() == 0:
+            for command in bytes(data):
+                self._begin_command(command)
+        elif self._command == _RAMWR:
+            stats['pixel_bytes'] += len(data)
+            self._write_pixels(data)
+        elif self._command is not None:
+            self._args.extend(data)
+            self._apply_args()
+
+    def _begin_command(self, command):
+        stats = self.stats
+        stats['commands'] += 1
+        name = _COMMAND_NAMES.get(command, hex(command))
+        stats['by_command'][name] = stats['by_command'].get(name, 0) + 1
+        self._command = command
+        self._args = bytearray()
+        if command == _RAMWR:
+            self._ptr = 0
+            self._odd = None
+        elif command == _SWRESET:
+            self._power_on()
+        elif command == _INVON:
+            self.inverted = True
+        elif command == _INVOFF:
+            self.inverted = False
+
+    def _apply_args(self):
+        command = self._command
+        args = self._args
+        if command == _CASET and len(args) >= 4:
+            self.columns = struct.unpack('>HH', args[:4])
+        elif command == _RASET and len(args) >= 4:
+            self.rows = struct.unpack('>HH', args[:4])
+        elif command == _MADCTL and args:
+            self.madctl = args[0]
+        elif command == _VSCRDEF and len(args) >= 6:
+            self.scroll_area = struct.unpack('>HHH', args[:6])
+        elif command == _VSCSAD and len(args) >= 2:
+            self.scroll_start = struct.unpack('>H', args[:2])[0]
+
+    def _write_pixels(self, data):
+        if self._odd is not None:
+            data = bytes((self._odd,)) + bytes(data)
+            self._odd = None
+        if len(data) & 1:
+            self._odd = data[-1]
+            data = data[:-1]
+        if not data:
+            return
+        pixels = array('H', bytes(data))
+        if _SWAP_BYTES:
+            pixels.byteswap()
+        x0, x1 = self.columns
+        y0, y1 = self.rows
+        win_w = x1 - x0 + 1
+        win_h = y1 - y0 + 1
+        if win_w <= 0 or win_h <= 0:
+            return
+        total = win_w * win_h
+        direct = (self.madctl & 0xE0) == 0
+        pos = 0
+        count = len(pixels)
+        while pos < count:
+            p = self._ptr % total # 写满窗口后从窗口起点重新开始
+            row, col = divmod(p, win_w)
+            run = min(win_w - col, count - pos)
+            if direct:
+                y = y0 + row
+                x = x0 + col
+                if y < self.height and x < self.width:
+                    start = y * self.width + x
+                    n = min(run, self.width - x)
+                    self.gram[start:start + n] = pixels[pos:pos + n]
+            else:
+                for i in range(run):
+                    self._put(x0 + col + i, y0 + row, pixels[pos + i])
+            self._ptr += run
+            pos += run
+
+    def _put(self, col, row, value):
+        """按 MADCTL 把逻辑地址 (列, 行) 写到物理像素"""
+        madctl = self.madctl
+        if madctl & 0x20: # MV: 行列交换
+            col, row = row, col
+        if madctl & 0x40: # MX: 列地址镜像
+            col = self.width - 1 - col
+        if madctl & 0x80: # MY: 行地址镜像
+            row = self.height - 1 - row
+        if 0 <= col < self.width and 0 <= row < self.height:
+            self.gram[row * self.width + col] = value
+
+    # --- 读取画面 ---
+    def visible_row(self, y):
+        """第 y 行屏幕显示的是哪一行显存 (考虑硬件垂直滚动)"""
+        if self.scroll_area:
+            top, area, _ = self.scroll_area
+            if top <= y < top + area:
+                return top + (y - top + self.scroll_start - top) % area
+        return y
+
+    def pixel(self, x, y):
+        """屏幕上 (x, y) 处的 RGB565 值 (物理方向，已考虑滚动)"""
+        return self.gram[self.visible_row(y) * self.width + x]
+
+    def frame(self):
+        """返回当前屏幕画面 (已考虑滚动) 的 RGB565 array，行优先"""
+        if not self.scroll_area:
+            return array('H', self.gram)
+        out = array('H')
+        w = self.width
+        for y in range(self.height):
+            start = self.visible_row(y) * w
+            out.extend(self.gram[start:start + w])
+        return out
+
+    def to_numpy(self):
+        """返回 (height, width) 的 uint16 ndarray (需要 NumPy)"""
+        if numpy is None:
+            raise ImportError("需要 NumPy")
+        return numpy.array(self.frame(), dtype=numpy.uint16).reshape(self.height, self.width)
+
+    def rgb888(self):
+        """把画面转换为 RGB888 字节串 (按面板是否反色处理)"""
+        lut = []
+        for hi in range(256): # 按高字节查表，避免逐像素拆位
+            lut.append(((hi & 0xF8) | (hi >> 5), ((hi & 0x07) << 5)))
+        out = bytearray(self.width * self.height * 3)
+        i = 0
+        invert = 0xFFFF if self.inverted else 0
+        for value in self.frame():
+            value ^= invert
+            r, g_hi = lut[value >> 8]
+            g = g_hi | ((value >> 3) & 0x1C)
+            g |= g >> 6
+            b = (value & 0x1F) << 3
+            out[i] = r
+            out[i + 1] = g
+            out[i + 2] = b | (b >> 5)
+            i += 3
+        return out
+
+    def save_ppm(self, path):
+        """导出为 PPM (P6) 图片"""
+        with open(path, 'wb') as f:
+            f.write(b'P6\n%d %d\n255\n' % (self.width, self.height))
+            f.write(self.rgb888())
+
+    def save_png(self, path):
+        """导出为 PNG 图片 (只用 zlib，不需要 Pillow)"""
+        rgb = self.rgb888()
+        stride = self.width * 3
+        raw = bytearray()
+        for y in range(self.height):
+            raw.append(0) # 每行的过滤类型: None
+            raw.extend(rgb[y * stride:(y + 1) * stride])
+
+        def chunk(kind, body):
+            crc = zlib.crc32(kind + body) & 0xFFFFFFFF
+            return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', crc)
+
+        header = struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0)
+        with open(path, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+            f.write(chunk(b'IHDR', header))
+            f.write(chunk(b'IDAT', zlib.compress(bytes(raw), 6)))
+            f.write(chunk(b'IEND', b''))
+
+
+def _placeholder_font():
+    """没有 framebuf 也没有导出字体时使用的方框字形 (空格为空白)，字节数与真实字体相同"""
+    from font_atlas import GLYPH_COUNT
+    box = bytes((0x00, 0x7E, 0x42, 0x42, 0x42, 0x42, 0x7E, 0x00))
+    return bytes(8) + box * (GLYPH_COUNT - 1)
+
+
+def install_host_shims():
+    """
+    在 CPython 上注册 machine (Pin/SPI/ADC/Timer) / ustruct / urandom 模块和 time.ticks_* 等 MicroPython 函数，
+    使 display_driver、ui_manager 和游戏模块可以直接导入。已存在的模块不会被替换。
+    time.sleep_ms / sleep_us 不真正等待，驱动初始化中的延时不计入基准测试。
+    """
+    if 'machine' not in sys.modules:
+        try:
+            import machine # noqa: F401  (MicroPython 的 unix 版本)
+        except ImportError:
+            machine = types.ModuleType('machine')
+            machine.Pin = SimPin
+            machine.SPI = SimSPI
+            machine.ADC = SimADC
+            machine.Timer = SimTimer
+            sys.modules['machine'] = machine
+    sys.modules.setdefault('ustruct', struct)
+    if 'urandom' not in sys.modules:
+        import random
+        sys.modules['urandom'] = random
+    if not hasattr(time, 'ticks_ms'):
+        time.ticks_ms = lambda: int(time.perf_counter() * 1000)
+        time.ticks_us = lambda: int(time.perf_counter() * 1000000)
+        time.ticks_add = lambda ticks, delta: ticks + delta
+        time.ticks_diff = lambda a, b: a - b
+        time.sleep_ms = lambda ms: None
+        time.sleep_us = lambda us: None
+
+    import font_atlas
+    if font_atlas._default is None:
+        try:
+            font_atlas.FontAtlas.default()
+        except OSError:
+            # 可在设备上执行 FontAtlas.default().save('font8x8.bin') 得到真实字形
+            font_atlas._default = font_atlas.FontAtlas(_placeholder_font())
+
+
+def make_display(width=240, height=320, rotation=0, baudrate=SPI_BAUDRATE, glyph_cache_bytes=16 * 1024,
+                 **panel_options):
+    """
+    创建一块仿真面板和连接在它上面的 ST7789 驱动 (glyph_cache_bytes 传给 ST7789，其余选项传给 SimPanel)。
+    Returns:
+        tuple: (ST7789 实例, SimPanel 实例)；初始化阶段的统计已清零。
+    """
+    install_host_shims()
+    from display_driver import ST7789
+    panel = SimPanel(width, height, baudrate, **panel_options)
+    driver = ST7789(panel.spi, width, height, reset=panel.reset, dc=panel.dc, cs=panel.cs,
+                    backlight=panel.backlight, rotation=rotation, glyph_cache_bytes=glyph_cache_bytes)
+    panel.reset_stats()
+    driver.reset_spi_stats()
+    return driver, panel
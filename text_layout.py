@@ -0,0 +1,133 @@
+# text_layout.py
+# 文本测量与自动换行，以及按 (文本, 最大宽度, 字符宽度) 缓存换行结果的 LRU。
+# ASCII 字符等宽 (char_width)；指定 wide_width 时非 ASCII 字符 (中文等) 按 wide_width 计算，
+# 并且可以在任意两个宽字符之间换行。
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ucollections import OrderedDict
+
+
+def _is_ascii(text):
+    return len(text.encode()) == len(text)
+
+
+def measure_text(text, char_width=8, wide_width=None):
+    """返回单行文本的像素宽度"""
+    if wide_width is None or _is_ascii(text):
+        return len(text) * char_width
+    width = 0
+    for c in text:
+        width += wide_width if ord(c) > 127 else char_width
+    return width
+
+
+def fit_text(text, max_width, char_width=8, wide_width=None):
+    """返回从开头起能完整放进 max_width 像素的字符数"""
+    if wide_width is None or _is_ascii(text):
+        return min(len(text), max_width // char_width)
+    width = 0
+    for i, c in enumerate(text):
+        width += wide_width if ord(c) > 127 else char_width
+        if width > max_width:
+            return i
+    return len(text)
+
+
+def wrap_text(text, max_width, char_width=8, wide_width=None):
+    """
+    按空格分词自动换行，返回各行文字组成的 tuple。
+    放不下的单词独占一行 (绘制时再按宽度截断)；空文本返回空 tuple。
+    含宽字符时每个宽字符单独作为一个可断开的词 (与前后文字之间不加空格)。
+    """
+    if wide_width is None or _is_ascii(text):
+        max_chars = max_width // char_width
+        lines = []
+        current_line = ""
+        for word in text.split(' '):
+            if not current_line:
+                current_line = word
+            elif len(current_line) + 1 + len(word) <= max_chars:
+                current_line = current_line + " " + word
+            else:
+                lines.append(current_line)
+                current_line = word
+        if current_line:
+            lines.append(current_line)
+        return tuple(lines)
+
+    lines = []
+    current_line = ""
+    current_width = 0
+    for word in text.split(' '):
+        spaced = True # 词与前文之间是否有空格
+        start = 0
+        for i in range(len(word) + 1):
+            # 把词切成 ASCII 片段和单个宽字符
+            if i < len(word) and ord(word[i]) <= 127:
+                continue
+            for piece in (word[start:i], word[i:i + 1]):
+                if not piece:
+                    continue
+                width = measure_text(piece, char_width, wide_width)
+                gap = char_width if spaced and current_line else 0
+                if not current_line:
+                    current_line, current_width = piece, width
+                elif current_width + gap + width <= max_width:
+                    current_line += (" " if gap else "") + piece
+                    current_width += gap + width
+                else:
+                    lines.append(current_line)
+                    current_line, current_width = piece, width
+                spaced = False
+            start = i + 1
+    if current_line:
+        lines.append(current_line)
+    return tuple(lines)
+
+
+class LayoutCache:
+    """
+    换行结果的 LRU 缓存。标题、帮助文字等固定字符串只在第一次出现时计算换行，
+    之后每次绘制直接取出缓存的行列表。
+    """
+
+    def __init__(self, max_entries=32):
+        """
+        Args:
+            max_entries (int): 最多缓存的文本数。
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def wrap(self, text, max_width, char_width=8, wide_width=None):
+        """返回 wrap_text 的结果，命中时不再重新分词"""
+        key = (text, max_width, char_width, wide_width)
+        lines = self._entries.get(key)
+        if lines is not None:
+            # 重新插入，移动到最近使用的位置
+            del self._entries[key]
+            self._entries[key] = lines
+            self.hits += 1
+            return lines
+        self.misses += 1
+        lines = wrap_text(text, max_width, char_width, wide_width)
+        if len(self._entries) >= self.max_entries:
+            del self._entries[next(iter(self._entries))]
+        self._entries[key] = lines
+        return lines
+
+    def clear(self):
+        self._entries = OrderedDict()
+
+    def stats(self):
+        """返回命中/未命中计数和当前条目数。"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+        }
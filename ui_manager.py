@@ -1,10 +1,13 @@
 # ui_manager.py (完整版)
-import framebuf
 from machine import SPI, Pin
 import time
 
+from text_layout import LayoutCache, measure_text, fit_text
+from backbuffer import Surface565
+
 class UIManager:
-    def __init__(self, st7789_driver, default_text_color=None, default_bg_color=None, default_highlight_color=None):
+    def __init__(self, st7789_driver, default_text_color=None, default_bg_color=None, default_highlight_color=None,
+                 layout_cache_entries=32, max_fps=25, band_height=20):
         """
         初始化 UI 管理器 (完整适配 ESP32-S3)
         Args:
@@ -12,6 +15,9 @@ class UIManager:
             default_text_color: 默认文字颜色 (RGB565)
             default_bg_color: 默认背景颜色 (RGB565)
             default_highlight_color: 默认高亮颜色 (RGB565)
+            layout_cache_entries: 换行结果缓存的文本数
+            max_fps: invalidate() 触发的重绘每秒最多执行的次数
+            band_height: 整屏对话框分带合成时每条带的高度 (像素)，缓冲区占 宽*高*2 字节
         """
         self.screen = st7789_driver
         self.width = self.screen.width
@@ -25,41 +31,186 @@ class UIManager:
 
         # 字体参数
         self.char_width_eng = 8
+        self.char_width_wide = None # 宽字符 (中文) 宽度，load_font() 之后才有
+        self.splash_ms = None # 上一次绘制启动图的耗时 (毫秒)，见 show_welcome_screen
         self.char_height = 16
         self.line_spacing = 4
 
-        # 局部刷新状态记录
-        self._last_menu_state = {
-            'selected_idx': -1,
-            'items': None,
-            'start_y': 0
+        # 换行结果缓存
+        self.layout_cache = LayoutCache(layout_cache_entries)
+        # 整行文本的渲染缓冲区 (一整屏宽的一行字)
+        self._line_buf = bytearray(self.width * self.char_height * 2)
+        # 整屏对话框的分带合成缓冲区 (首次使用时分配，240x20 约 9.6 KB)
+        self.band_height = band_height
+        self._band = None
+        # 正在运行的动画控件 (Spinner/ProgressBar/BlinkCursor)，由 frame_tick() 推进
+        self._animations = []
+
+        # 当前显示的菜单 (局部刷新用)，None 表示屏幕上没有菜单
+        self._menu = None
+        # 保留的消息框模型：上次 show_message_box 画在屏幕上的各行 (位置、文字、颜色)
+        self._box_model = None
+        self.box_stats = {'redrawn': 0, 'skipped': 0} # 最近一次 show_message_box 重绘/跳过的行数
+
+        # 帧调度：invalidate() 只登记重绘请求，frame_tick() 在帧间隔到达时合并执行一次
+        self.frame_interval_ms = 1000 // max_fps
+        self.frame_region = None # 本帧待重绘的区域 (x0, y0, x1, y1)，不含 x1, y1；None 表示整屏
+        self._renderer = None
+        self._frame_pending = False
+        self._last_frame = None
+        self.frame_stats = {
+            'frames': 0,         # 实际执行的重绘次数
+            'invalidations': 0,  # invalidate() 调用次数
+            'skipped': 0,        # 被合并到同一帧、没有单独执行的重绘请求
+            'deferred': 0,       # 因帧率上限推迟到下一次 frame_tick 的次数
         }
 
+    def present(self):
+        """把本帧的绘制结果推送到屏幕 (启用后备缓冲区时才有实际发送)"""
+        self.screen.show()
+
+    def set_renderer(self, renderer):
+        """
+        设置 invalidate() 之后由 frame_tick() 调用的重绘函数 (通常是游戏的 _update_display)。
+        传入 None 取消，同时丢弃尚未执行的重绘请求。
+        """
+        self._renderer = renderer
+        self._frame_pending = False
+        self.frame_region = None
+
+    def invalidate(self, region=None):
+        """
+        请求重绘。同一帧内的多次请求合并为一次，区域取并集。
+        Args:
+            region (tuple, optional): 变化的区域 (x, y, w, h)，None 表示整屏。
+                                      合并后的区域以 (x0, y0, x1, y1) (不含 x1, y1) 保存在 self.frame_region，
+                                      重绘函数用 region_dirty() 跳过没有变化的部分。
+        """
+        stats = self.frame_stats
+        stats['invalidations'] += 1
+        if region is not None:
+            x, y, w, h = region
+            region = (x, y, x + w, y + h)
+        if self._frame_pending:
+            stats['skipped'] += 1
+            old = self.frame_region
+            if old is None or region is None:
+                region = None
+            else:
+                region = (min(old[0], region[0]), min(old[1], region[1]),
+                          max(old[2], region[2]), max(old[3], region[3]))
+        self.frame_region = region
+        self._frame_pending = True
+
+    def region_dirty(self, x, y, w, h):
+        """重绘函数中判断 (x, y, w, h) 是否与本帧待重绘的区域相交；整屏重绘时总是 True"""
+        r = self.frame_region
+        return r is None or (x < r[2] and r[0] < x + w and y < r[3] and r[1] < y + h)
+
+    def frame_tick(self):
+        """
+        由主循环每次迭代调用一次：有待重绘的请求且距上一帧已超过帧间隔时执行一次重绘，然后推送到屏幕。
+        Returns:
+            bool: 本次是否执行了重绘。
+        """
+        rendered = False
+        if self._frame_pending and self._renderer:
+            now = time.ticks_ms()
+            if self._last_frame is not None and \
+                    time.ticks_diff(now, self._last_frame) < self.frame_interval_ms:
+                self.frame_stats['deferred'] += 1
+            else:
+                self._frame_pending = False # 先清除，重绘函数里再次 invalidate 会留到下一帧
+                self._renderer()
+                self.frame_region = None
+                self._last_frame = now
+                self.frame_stats['frames'] += 1
+                rendered = True
+        self.tick_animations()
+        self.present()
+        return rendered
+
     def clear_screen(self, color=None):
-        """清屏"""
+        """清屏 (屏幕内容全部失效，之后的消息框和菜单都会整屏重绘)"""
+        self._forget_screen()
         self.screen.fill(color if color is not None else self.bg_color)
 
-    def _draw_char_internal(self, char_code, x, y, color, bg_color):
-        """绘制单个字符 (兼容ASCII)"""
-        char = chr(char_code) if isinstance(char_code, int) and char_code < 128 else '?'
-        if bg_color is not None:
-            self.screen.fill_rect(x, y, self.char_width_eng, self.char_height, bg_color)
-        self.screen.text(char, x, y, color)
+    def _forget_screen(self):
+        """丢弃保留的屏幕模型和菜单状态，下一次绘制不再做差异比较；屏幕上的动画随之停止"""
+        self._box_model = None
+        self._menu = None
+        for anim in self._animations:
+            anim.running = False
+        self._animations = []
 
     def display_text_line(self, text, x, y, text_color=None, bg_color=None, max_width=None):
         """
-        绘制单行文本
+        绘制单行文本：整行一次渲染到复用的行缓冲区，用一个窗口发送
+        (启用调色板后备缓冲区时字形直接写入缓冲区)。
+        中文等非 ASCII 字符需要先 load_font()，否则显示为 '?'。
         Args:
-            max_width: 最大宽度（像素），超出部分截断
+            max_width: 最大宽度（像素），放不下的字符整个截掉
+        Returns:
+            int: 文本结束处的 x 坐标
         """
+        text, color, bg = self._line_args(text, text_color, bg_color, max_width)
+        if not text:
+            return x
+        drawn = self.screen.draw_text(text, x, y, color, bg, self.char_height, char_width=self.char_width_eng,
+                                      out=self._line_buf)
+        return x + drawn[0] if drawn else x
+
+    def _line_args(self, text, text_color, bg_color, max_width):
+        """截掉放不下的字符并补上默认颜色，返回 (text, 文字颜色, 背景颜色)"""
         color = text_color if text_color is not None else self.text_color
-        current_x = x
-        for char in text:
-            if max_width is not None and (current_x + self.char_width_eng) > (x + max_width):
-                break
-            self._draw_char_internal(ord(char), current_x, y, color, bg_color)
-            current_x += self.char_width_eng
-        return current_x
+        if max_width is not None:
+            count = fit_text(text, max_width, self.char_width_eng, self.char_width_wide)
+            if count < len(text):
+                text = text[:count]
+        bg = bg_color if bg_color is not None else self.screen.BLACK # 与 screen.text 的默认背景一致
+        return text, color, bg
+
+    def _render_line(self, text, text_color=None, bg_color=None, max_width=None):
+        """
+        把单行文本渲染到行缓冲区 (不发送)。
+        Returns:
+            tuple: (buf, w, h)，buf 指向 self._line_buf，下次渲染前有效；没有可绘制的字符时返回 None。
+        """
+        text, color, bg = self._line_args(text, text_color, bg_color, max_width)
+        if not text:
+            return None
+        return self.screen.render_text(text, color, bg, self.char_height, char_width=self.char_width_eng,
+                                       out=self._line_buf)
+
+    def _text_end(self, text, x, max_width):
+        """display_text_line(text, x, ..., max_width) 绘制结束处的 x 坐标"""
+        return x + self.measure_text(text[:fit_text(text, max_width, self.char_width_eng, self.char_width_wide)])
+
+    def load_font(self, path, cache_glyphs=64):
+        """
+        加载 flash 中的中文点阵字体 (convert_font.py 生成)，之后所有文字接口都可以显示中文。
+        字形按需从文件读取，内存中只缓存最近使用的 cache_glyphs 个。
+        Returns:
+            bool: 是否加载成功 (文件不存在或格式不对时返回 False，继续只显示 ASCII)。
+        """
+        try:
+            font = self.screen.load_wide_font(path, cache_glyphs)
+        except (OSError, ValueError):
+            return False
+        self.char_width_wide = font.width
+        self.layout_cache.clear() # 字符宽度变了，之前的换行结果作废
+        return True
+
+    def measure_text(self, text):
+        """返回单行文本的像素宽度"""
+        return measure_text(text, self.char_width_eng, self.char_width_wide)
+
+    def wrap_text(self, text, max_width):
+        """
+        自动换行，返回各行文字 (tuple)：英文按空格分词，中文可以在任意两个字之间断开。
+        结果按 (文本, 最大宽度, 字符宽度) 缓存，游戏可以在初始化时预先排版固定的文字。
+        """
+        return self.layout_cache.wrap(text, max_width, self.char_width_eng, self.char_width_wide)
 
     def display_text_multiline(self, text, x, y, max_width, text_color=None, bg_color=None, line_height=None):
         """
@@ -70,95 +221,108 @@ class UIManager:
         """
         color = text_color if text_color is not None else self.text_color
         actual_line_height = line_height if line_height is not None else (self.char_height + self.line_spacing)
-        words = text.split(' ')
-        current_line = ""
-        
-        for word in words:
-            test_line = current_line + (" " if current_line else "") + word
-            if len(test_line) * self.char_width_eng <= max_width:
-                current_line = test_line
-            else:
-                # 绘制当前行
-                self.display_text_line(current_line, x, y, color, bg_color, max_width)
-                y += actual_line_height
-                if y + self.char_height > self.height:
-                    return  # 超出屏幕底部
-                current_line = word
-        
-        # 绘制最后一行
-        if current_line:
-            self.display_text_line(current_line, x, y, color, bg_color, max_width)
+        for i, line in enumerate(self.wrap_text(text, max_width)):
+            if i and y + self.char_height > self.height:
+                return  # 超出屏幕底部
+            self.display_text_line(line, x, y, color, bg_color, max_width)
+            y += actual_line_height
 
     def draw_menu(self, items, selected_index, title=None, start_y=10):
-        last_state = self._last_menu_state
-        need_full_refresh = (last_state['items'] != items or
-                             last_state['start_y'] != start_y or
-                             last_state.get('title_text') != title)
-        title_height = 0
-        if title:
-            title_height = self.char_height + self.line_spacing
-        
-        if need_full_refresh:
-            self.clear_screen()
-            current_y = start_y
-            if title:
-                # 绘制标题（带背景色填充）
-                self.screen.fill_rect(0, current_y, self.width, title_height, self.bg_color)
-                self.display_text_multiline(title, 5, current_y, self.width - 10,
-                                            self.highlight_text_color, self.bg_color)
-                current_y += title_height
-                # 绘制所有菜单项
-                for i, item in enumerate(items):
-                    self._draw_menu_item(i, item, start_y, title_height, i == selected_index)
+        """
+        绘制菜单 (基于 MenuWidget)。
+        与上一次的菜单相同时只重绘选中状态变化的两行；项数相同只有文字变化时只重绘变化的可见行；
+        标题、位置或项数变化，或屏幕被其他界面覆盖过时整屏重绘。
+        """
+        menu = self._menu
+        if menu is None or menu.title != title or menu.start_y != start_y or len(menu.items) != len(items):
+            menu = self.open_menu(items, title, start_y, selected_index)
         else:
-            # 局部刷新：只更新变化的菜单项
-            old_idx = last_state['selected_idx']
-            if old_idx != selected_index:
-                self._draw_menu_item(old_idx, items[old_idx], start_y, title_height, False)
-                self._draw_menu_item(selected_index, items[selected_index], start_y, title_height, True)
-                # 更新状态时需要记录标题信息
-                self._last_menu_state = {
-                    'selected_idx': selected_index,
-                    'items': items,
-                    'start_y': start_y,
-                    'title_text': title
-                }
-    def _draw_menu_item(self, index, text, start_y, title_height, is_selected):
-        """绘制单个菜单项（确保不会覆盖标题区域）"""
-        # 计算菜单项位置（考虑标题高度）
-        y_pos = start_y + title_height + index * (self.char_height + self.line_spacing * 2)
-        # 只填充菜单项区域
-        item_height = self.char_height + self.line_spacing
-        self.screen.fill_rect(0, y_pos, self.width, item_height,
-                              self.highlight_bg_color if is_selected else self.bg_color)
-        # 绘制菜单文本
-        text_color = self.highlight_text_color if is_selected else self.text_color
-        self.display_text_line(text, 5, y_pos + self.line_spacing, text_color, None)
+            if menu.items is not items:
+                menu.update_items(items)
+            menu.select(selected_index)
+        return menu
+
+    def open_menu(self, items, title=None, start_y=10, selected_index=0, bottom=None):
+        """
+        清屏并创建一个虚拟化菜单，只绘制视口内的行。
+        项目很多的菜单 (存档、回放列表等) 可以直接持有返回的 MenuWidget，用 select()/move() 移动选中项。
+        Args:
+            bottom (int, optional): 菜单视口的下边界，默认屏幕底部。
+        Returns:
+            MenuWidget
+        """
+        menu = MenuWidget(self, items, title, start_y, bottom)
+        menu.render(selected_index)
+        self._menu = menu
+        return menu
 
     def show_message_box(self, message_lines, title="tip", options=None, selected_option_index=0):
         """
-        消息框（完整实现）
+        消息框（保留模式）。
+        与上一次显示的消息框逐行比较：布局相同时只重绘内容变化的行，
+        行变短时只清除多出来的宽度；布局变化或屏幕被其他界面覆盖过时整屏重绘。
+        整屏重绘在内存中逐条带合成 (背景、按钮和文字)，每条带用一个窗口发送，没有重复发送的像素。
+        Returns:
+            dict: {'redrawn': 重绘的行数, 'skipped': 未变化而跳过的行数}，同时保存在 self.box_stats。
+        """
+        items = self._layout_message_box(message_lines, title, options, selected_option_index)
+        old = self._box_model
+        redrawn = skipped = 0
+        if old is None or len(old) != len(items) or \
+                any(o[0] != n[0] or o[1:3] != n[1:3] for o, n in zip(old, items)):
+            self._compose_screen(items)
+            redrawn = len(items)
+        else:
+            for o, n in zip(old, items):
+                if o == n:
+                    skipped += 1
+                    continue
+                end_x = self._draw_box_item(n)
+                if n[0] == 'text':
+                    old_end = self._text_end(o[3], o[1], o[6])
+                    if end_x < old_end: # 新行更短：清掉旧文字多出来的部分
+                        self.screen.fill_rect(end_x, n[2], old_end - end_x, self.char_height, self.bg_color)
+                redrawn += 1
+        self._box_model = items
+        self.box_stats = {'redrawn': redrawn, 'skipped': skipped}
+        return self.box_stats
+
+    def _layout_message_box(self, message_lines, title, options, selected_option_index):
+        """
+        计算消息框的绘制内容，返回按绘制顺序排列的条目：
+        ('text', x, y, 文字, 颜色, 背景色, 最大宽度) 或
+        ('button', x, y, 宽, 高, 背景色, 文字, 文字x, 文字y, 文字颜色)。
+        自动换行的行各自占一个条目，后面的内容相应下移。
         """
-        self.clear_screen()
         padding = 10
         box_height = self.height - 2 * padding
+        text_width = self.width - 2 * padding
+        line_height = self.char_height + self.line_spacing
         current_y = padding
+        items = []
 
-        # 绘制标题
+        # 标题
         if title:
-            self.display_text_multiline(title, padding, current_y, self.width - 2*padding,
-                                      self.highlight_text_color, self.bg_color)
-            current_y += self.char_height + self.line_spacing * 2
-
-        # 绘制消息正文
-        for line in message_lines:
-            self.display_text_multiline(line, padding, current_y, self.width - 2*padding,
-                                      self.text_color, self.bg_color)
-            current_y += self.char_height + self.line_spacing
+            lines = self.wrap_text(title, text_width)
+            for i, line in enumerate(lines):
+                items.append(('text', padding, current_y + i * line_height, line,
+                              self.highlight_text_color, self.bg_color, text_width))
+            current_y += (max(len(lines), 1) - 1) * line_height + self.char_height + self.line_spacing * 2
+
+        # 消息正文
+        for message in message_lines:
+            lines = self.wrap_text(message, text_width)
+            for line in lines:
+                if current_y + self.char_height > self.height:
+                    break
+                items.append(('text', padding, current_y, line, self.text_color, self.bg_color, text_width))
+                current_y += line_height
+            if not lines:
+                current_y += line_height # 空行
             if current_y > box_height - 20:  # 预留底部按钮空间
                 break
 
-        # 绘制底部按钮
+        # 底部按钮
         if options:
             button_spacing = 5
             button_width = (self.width - 2*padding - (len(options)-1)*button_spacing) // len(options)
@@ -167,19 +331,477 @@ class UIManager:
                 is_selected = (i == selected_option_index)
                 color = self.highlight_text_color if is_selected else self.text_color
                 bg_color = self.highlight_bg_color if is_selected else self.bg_color
-                
-                # 按钮背景
-                self.screen.fill_rect(btn_x, box_height - 25, button_width, 20, bg_color)
-                # 按钮文字（居中）
-                text_x = btn_x + (button_width - len(option)*self.char_width_eng) // 2
-                self.display_text_line(option, text_x, box_height - 20, color, None)
-
-    def show_welcome_screen(self):
-        """欢迎界面"""
+                text_x = btn_x + (button_width - self.measure_text(option)) // 2 # 文字居中
+                items.append(('button', btn_x, box_height - 25, button_width, 20, bg_color,
+                              option, text_x, box_height - 20, color))
+        return items
+
+    def _compose_screen(self, items):
+        """
+        整屏重绘消息框：按 band_height 把屏幕分成横条，每条带先填背景，
+        再把与之相交的按钮和文字画进带缓冲区，最后整条发送。结果与清屏后逐项绘制相同。
+        """
+        self._forget_screen()
+        if self.screen.scroll_area: # 与 screen.fill 一样先取消硬件滚动
+            self.screen.scroll_reset()
+        if self.screen.indexed_buffer():
+            # 调色板后备缓冲区本身就在内存中合成：直接依次绘制 (文字从单色点阵直接写入)，
+            # 不再把 RGB565 的带缓冲区逐像素转换成调色板序号
+            self.screen.fill_rect(0, 0, self.width, self.height, self.bg_color)
+            for item in items:
+                self._draw_box_item(item)
+            return
+        band = self._band
+        if band is None:
+            band = self._band = Surface565(self.width, self.band_height)
+        band_height = band.height
+        char_height = self.char_height
+        for y0 in range(0, self.height, band_height):
+            h = min(band_height, self.height - y0)
+            band.y0 = y0 # 复用同一块缓冲区，移动到本条带的位置
+            band.fill_rect(0, y0, self.width, h, self.bg_color)
+            y1 = y0 + h
+            for item in items:
+                if item[0] == 'text':
+                    _, x, y, text, color, bg_color, max_width = item
+                else:
+                    _, bx, by, bw, bh, bg_color, text, x, y, color = item
+                    if by < y1 and by + bh > y0:
+                        band.fill_rect(bx, by, bw, bh, bg_color)
+                    bg_color = None
+                    max_width = None
+                if y >= y1 or y + char_height <= y0:
+                    continue
+                rendered = self._render_line(text, color, bg_color, max_width)
+                if rendered is not None:
+                    buf, w, th = rendered
+                    band.blit(buf, x, y, w, th)
+            self.screen.blit_buffer(band.buf if h == band_height else memoryview(band.buf)[:self.width * h * 2],
+                                    0, y0, self.width, h)
+
+    def box_text_end(self, text):
+        """
+        在当前显示的消息框中查找内容为 text 的行。
+        Returns:
+            tuple: 该行文字结束处的 (x, y)，可以在其后放置 Spinner 等控件；找不到时返回 None。
+        """
+        for item in self._box_model or ():
+            if item[0] == 'text' and item[3] == text:
+                return self._text_end(text, item[1], item[6]), item[2]
+        return None
+
+    def _draw_box_item(self, item):
+        """绘制一个消息框条目，返回文字结束处的 x 坐标"""
+        if item[0] == 'text':
+            _, x, y, text, color, bg_color, max_width = item
+            return self.display_text_line(text, x, y, color, bg_color, max_width)
+        _, x, y, w, h, bg_color, text, text_x, text_y, color = item
+        self.screen.fill_rect(x, y, w, h, bg_color)
+        return self.display_text_line(text, text_x, text_y, color, None)
+
+    def open_log(self, title=None, line_height=None, bottom_fixed=0):
+        """
+        清屏并打开一个利用硬件滚动的日志区域，标题固定在顶部。
+        硬件滚动只支持竖屏 (rotation=0)，其他方向下 define_scroll_area 抛出 ValueError，
+        不确定屏幕方向时使用 show_log()。
+        Returns:
+            ScrollLog: 用 append(text) 追加行。
+        """
+        self.clear_screen()
+        top = 0
+        if title:
+            top = self.char_height + self.line_spacing * 2
+            self.display_text_line(title, 5, self.line_spacing, self.highlight_text_color, self.bg_color,
+                                   self.width - 10)
+        return ScrollLog(self, top, self.height - top - bottom_fixed, line_height)
+
+    def show_log(self, lines, title=None):
+        """
+        逐行追加显示一组结果 (游戏的回合结果界面)：竖屏时打开 open_log() 并 append 每一行，
+        行数超过区域时最早的行通过硬件滚动移出；横屏不支持硬件滚动，改用 show_message_box。
+        过长的行自动换行。
+        Returns:
+            ScrollLog: 竖屏时返回日志控件，可以继续 append；横屏时返回 None。
+        """
+        if self.screen.rotation != 0:
+            self.show_message_box(lines, title=title)
+            return None
+        log = self.open_log(title)
+        width = self.width - 10
+        for line in lines:
+            for part in self.wrap_text(line, width) or ('',):
+                log.append(part)
+        return log
+
+    def spinner(self, x, y, color=None, bg_color=None, interval_ms=120):
+        """在 (x, y) 创建并启动一个旋转指示器 (一个字符大小)，返回 Spinner"""
+        return self._start_animation(Spinner(self, x, y, color, bg_color, interval_ms))
+
+    def progress_bar(self, x, y, width, height, color=None, bg_color=None, duration_ms=None):
+        """
+        在 (x, y) 创建并启动一个进度条，返回 ProgressBar。
+        指定 duration_ms 时进度按时间自动增长，否则用 ProgressBar.set() 设置。
+        """
+        return self._start_animation(ProgressBar(self, x, y, width, height, color, bg_color, duration_ms))
+
+    def blink_cursor(self, x, y, width=None, height=None, color=None, bg_color=None, period_ms=500):
+        """在 (x, y) 创建并启动一个闪烁光标 (默认一个字符大小)，返回 BlinkCursor"""
+        return self._start_animation(BlinkCursor(self, x, y, width, height, color, bg_color, period_ms))
+
+    def _start_animation(self, anim):
+        anim.draw()
+        self._animations.append(anim)
+        return anim
+
+    def tick_animations(self, now=None):
+        """
+        推进所有动画：只重绘到期的控件自己的像素。frame_tick() 每帧调用一次，
+        阻塞等待的循环 (如欢迎界面) 也可以直接调用。
+        Returns:
+            int: 本次重绘的控件数。
+        """
+        if not self._animations:
+            return 0
+        if now is None:
+            now = time.ticks_ms()
+        drawn = 0
+        for anim in self._animations:
+            if anim.tick(now):
+                drawn += 1
+        self._animations = [anim for anim in self._animations if anim.running]
+        return drawn
+
+    def show_welcome_screen(self, splash_path='splash.rle', loading_ms=2000):
+        """
+        欢迎界面：有启动图 (convert_image.py 生成的 .rle) 时流式绘制它，否则显示文字版本。
+        绘制启动图所用的时间 (解码加传输，毫秒) 记录在 self.splash_ms，没有启动图时为 None。
+        "Loading..." 下方的进度条在 loading_ms 内走满，由 tick_animations() 推进。
+        """
+        self.splash_ms = None
+        if splash_path:
+            start = time.ticks_ms()
+            try:
+                self.screen.draw_rle(splash_path, 0, 0)
+            except (OSError, ValueError):
+                pass # 没有启动图文件，或文件损坏/被截断：改用文字版欢迎界面
+            else:
+                self._forget_screen()
+                self.screen.show()
+                self.splash_ms = time.ticks_diff(time.ticks_ms(), start)
+                y = self.height - self.char_height - 16
+                self.display_text_line("Loading...", 10, y, self.screen.WHITE, None)
+                self.progress_bar(10, y + self.char_height + 4, self.width - 20, 6,
+                                  self.screen.WHITE, None, loading_ms)
+                return
         self.clear_screen(self.screen.BLUE)  # 蓝色背景
         title = "Gambling bot"
-        text_x = (self.width - len(title)*self.char_width_eng) // 2
+        text_x = (self.width - self.measure_text(title)) // 2
         self.display_text_line(title, text_x, self.height//2 - 10, self.screen.YELLOW, None)  # 黄色文字
         self.display_text_line("Loading...", 10, self.height//2 + 10, self.screen.WHITE, None)  # 白色文字
+        self.progress_bar(10, self.height//2 + 10 + self.char_height + 4, self.width - 20, 6,
+                          self.screen.WHITE, self.screen.BLUE, loading_ms)
+
+
+
+
+class MenuWidget:
+    """
+    虚拟化的菜单控件：只绘制视口内可见的菜单项，移动选中项的代价与菜单长度无关。
+    选中项在视口内移动时只重绘新旧两行；移出视口时利用 ST7789 硬件垂直滚动
+    (与 ScrollLog 相同的方式)，只绘制进入视口的行，再补画旧的选中行。
+    """
+
+    def __init__(self, ui, items, title=None, start_y=10, bottom=None):
+        """
+        Args:
+            ui: UIManager 实例。
+            items (list): 菜单项文字。
+            title (str, optional): 标题，显示在菜单上方。
+            start_y (int): 标题 (或第一项) 的纵坐标。
+            bottom (int, optional): 视口下边界，默认屏幕底部。
+        """
+        self.ui = ui
+        self.screen = ui.screen
+        self.items = items
+        self.title = title
+        self.start_y = start_y
+        self.title_height = ui.char_height + ui.line_spacing if title else 0
+        self.top = start_y + self.title_height
+        self.pitch = ui.char_height + ui.line_spacing * 2 # 行距
+        self.item_height = ui.char_height + ui.line_spacing # 每行填充的高度
+        bottom = ui.height if bottom is None else bottom
+        self.rows = max(1, (bottom - self.top) // self.pitch) # 视口能容纳的行数
+        self.first = 0 # 视口第一行对应的菜单项
+        self.selected = -1
+        # 菜单比视口长时使用硬件滚动 (仅竖屏)
+        self.hw_scroll = len(items) > self.rows and self.screen.rotation == 0
+        self.rows_drawn = 0 # 累计绘制的行数
+
+    def render(self, selected_index=0):
+        """清屏并绘制标题和视口内的所有行"""
+        ui = self.ui
+        ui.clear_screen()
+        if self.title:
+            # 绘制标题（带背景色填充）
+            self.screen.fill_rect(0, self.start_y, ui.width, self.title_height, ui.bg_color)
+            ui.display_text_multiline(self.title, 5, self.start_y, ui.width - 10,
+                                      ui.highlight_text_color, ui.bg_color)
+        if self.hw_scroll:
+            self.screen.define_scroll_area(self.top, self.rows * self.pitch)
+        self.selected = self._clamp(selected_index)
+        self.first = max(0, self.selected - self.rows + 1)
+        for i in self._visible():
+            self._draw_row(i)
+
+    def update_items(self, items):
+        """替换菜单项 (项数不变)，只重绘文字变化的可见行"""
+        old = self.items
+        self.items = items
+        for i in self._visible():
+            if old[i] != items[i]:
+                self._draw_row(i)
+
+    def move(self, delta):
+        """选中项移动 delta 行"""
+        self.select(self.selected + delta)
+
+    def select(self, index):
+        """选中第 index 项；需要时滚动视口"""
+        index = self._clamp(index)
+        old = self.selected
+        if index == old:
+            return
+        self.selected = index
+        shift = 0
+        if index < self.first:
+            shift = index - self.first
+        elif index >= self.first + self.rows:
+            shift = index - (self.first + self.rows - 1)
+        if not shift:
+            self._draw_row(old)
+            self._draw_row(index)
+            return
+        self.first += shift
+        if not self.hw_scroll or abs(shift) >= self.rows:
+            # 不能硬件滚动或跳得太远：重绘整个视口
+            if self.hw_scroll:
+                self.screen.scroll_to(0)
+            for i in self._visible():
+                self._draw_row(i)
+            return
+        # 先把进入视口的行画进即将滚出的显存行，再移动滚动起始地址
+        scroll_start = self.screen.scroll_start + shift * self.pitch
+        if shift > 0:
+            entering = range(self.first + self.rows - shift, self.first + self.rows)
+        else:
+            entering = range(self.first, self.first - shift)
+        for i in entering:
+            self._draw_row(i, scroll_start)
+        self.screen.scroll_to(scroll_start)
+        if self.first <= old < self.first + self.rows:
+            self._draw_row(old)
+
+    def _clamp(self, index):
+        return max(0, min(index, len(self.items) - 1))
+
+    def _visible(self):
+        return range(self.first, min(self.first + self.rows, len(self.items)))
+
+    def _draw_row(self, index, scroll_start=None):
+        """绘制第 index 项 (必须在视口内)；scroll_start 为滚动后的起始行，默认当前值"""
+        ui = self.ui
+        y = self.top + (index - self.first) * self.pitch
+        if self.hw_scroll:
+            # 换算为显存行 (滚动偏移总是行距的整数倍，整行不会被拆开)
+            area = self.rows * self.pitch
+            start = self.screen.scroll_start if scroll_start is None else scroll_start
+            y = self.top + (y - self.top + start) % area
+        is_selected = index == self.selected
+        self.screen.fill_rect(0, y, ui.width, self.item_height,
+                              ui.highlight_bg_color if is_selected else ui.bg_color)
+        text_color = ui.highlight_text_color if is_selected else ui.text_color
+        ui.display_text_line(self.items[index], 5, y + ui.line_spacing, text_color, None)
+        self.rows_drawn += 1
+
+
+class ScrollLog:
+    """
+    基于 ST7789 硬件垂直滚动的日志控件。
+    区域写满后，新行写入即将滚出顶部的那一行显存，再移动滚动起始地址，
+    每追加一行只发送一行 (约 20 像素高) 的像素和一条 VSCSAD 命令。
+    """
+
+    def __init__(self, ui, top, height, line_height=None, text_color=None, bg_color=None):
+        """
+        Args:
+            ui: UIManager 实例。
+            top (int): 日志区域顶部的屏幕行 (其上方为固定区域)。
+            height (int): 日志区域高度，会向下取整为行高的整数倍。区域应已填充背景色 (open_log 先清屏)。
+            line_height (int, optional): 行高，默认字符高度加行距。
+        """
+        self.ui = ui
+        self.screen = ui.screen
+        self.line_height = line_height if line_height is not None else ui.char_height + ui.line_spacing
+        self.top = top
+        self.rows = height // self.line_height
+        self.text_color = text_color if text_color is not None else ui.text_color
+        self.bg_color = bg_color if bg_color is not None else ui.bg_color
+        self.count = 0 # 已追加的行数
+        self.screen.define_scroll_area(top, self.rows * self.line_height)
+
+    def append(self, text):
+        """追加一行；区域已满时最早的一行滚出顶部。"""
+        lh = self.line_height
+        if self.count < self.rows:
+            slot = self.count # 未写满：直接写在下一行
+        else:
+            slot = self.count % self.rows # 写满：覆盖最早的一行，再把它滚到底部
+        y = self.top + slot * lh
+        if self.count >= self.rows: # 未写满时该行仍是 open_log 清屏后的背景
+            self.screen.fill_rect(0, y, self.ui.width, lh, self.bg_color)
+        self.ui.display_text_line(text, 5, y + (lh - self.ui.char_height) // 2,
+                                  self.text_color, self.bg_color, self.ui.width - 10)
+        self.count += 1
+        if self.count > self.rows:
+            self.screen.scroll_to((slot + 1) * lh)
+        else:
+            self.screen.show()
+
+    def close(self):
+        """取消硬件滚动"""
+        self.screen.scroll_reset()
+
+
+class Animation:
+    """
+    按 time.ticks_ms() 推进的动画控件基类。tick() 不阻塞：没到下一步时立即返回，
+    到期时按经过的步数前进并只重绘控件自己的区域。
+    """
+
+    def __init__(self, ui, x, y, width, height, color=None, bg_color=None, interval_ms=100):
+        self.ui = ui
+        self.screen = ui.screen
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.color = color if color is not None else ui.text_color
+        self.bg_color = bg_color if bg_color is not None else ui.bg_color
+        self.interval_ms = interval_ms
+        self.running = True
+        self._last = time.ticks_ms()
+
+    def tick(self, now):
+        """到达下一步时前进并重绘，返回是否重绘"""
+        if not self.running:
+            return False
+        steps = time.ticks_diff(now, self._last) // self.interval_ms
+        if steps <= 0:
+            return False
+        self._last = time.ticks_add(self._last, steps * self.interval_ms)
+        self.advance(steps)
+        self.draw()
+        return True
+
+    def advance(self, steps):
+        pass
+
+    def draw(self):
+        pass
+
+    def stop(self, erase=True):
+        """停止动画；erase 为 True 时用背景色擦掉控件区域"""
+        if self.running and erase:
+            self.screen.fill_rect(self.x, self.y, self.width, self.height, self.bg_color)
+        self.running = False
+
+
+class Spinner(Animation):
+    """旋转指示器：在一个字符的位置循环显示 | / - \\"""
+
+    FRAMES = '|/-\\'
+
+    def __init__(self, ui, x, y, color=None, bg_color=None, interval_ms=120):
+        super().__init__(ui, x, y, ui.char_width_eng, ui.char_height, color, bg_color, interval_ms)
+        self.phase = 0
+
+    def advance(self, steps):
+        self.phase = (self.phase + steps) % len(self.FRAMES)
+
+    def draw(self):
+        self.ui.display_text_line(self.FRAMES[self.phase], self.x, self.y, self.color, self.bg_color)
+
+
+class ProgressBar(Animation):
+    """
+    进度条：创建时画一次边框，之后每次只填充 (或擦除) 进度变化的那几列。
+    指定 duration_ms 时进度在这段时间内从 0 走到 1。
+    """
+
+    def __init__(self, ui, x, y, width, height, color=None, bg_color=None, duration_ms=None):
+        super().__init__(ui, x, y, width, height, color, bg_color)
+        self.duration_ms = duration_ms
+        self._start = self._last
+        self.value = 0.0
+        self._filled = 0 # 已填充的像素列数 (边框内)
+        self._framed = False
+
+    def set(self, value):
+        """设置进度 (0~1) 并立即重绘变化的部分"""
+        self.value = min(max(value, 0.0), 1.0)
+        if self.running:
+            self.draw()
+
+    def tick(self, now):
+        """按时间推进：只有填充的列数变化时才重绘"""
+        if not self.running or not self.duration_ms:
+            return False
+        self.value = min(1.0, time.ticks_diff(now, self._start) / self.duration_ms)
+        if self.value >= 1.0:
+            self.running = False # 走满后不再推进，保留在屏幕上
+        if int((self.width - 2) * self.value) == self._filled:
+            return False
+        self.draw()
+        return True
+
+    def draw(self):
+        screen = self.screen
+        x, y, w, h = self.x, self.y, self.width, self.height
+        if not self._framed:
+            screen.fill_rect(x, y, w, h, self.color)
+            screen.fill_rect(x + 1, y + 1, w - 2, h - 2, self.bg_color)
+            self._framed = True
+        inner = w - 2
+        filled = int(inner * self.value)
+        old = self._filled
+        if filled > old:
+            screen.fill_rect(x + 1 + old, y + 1, filled - old, h - 2, self.color)
+        elif filled < old:
+            screen.fill_rect(x + 1 + filled, y + 1, old - filled, h - 2, self.bg_color)
+        self._filled = filled
+
+
+class BlinkCursor(Animation):
+    """闪烁光标：每 period_ms 在前景色和背景色之间切换一次"""
+
+    def __init__(self, ui, x, y, width=None, height=None, color=None, bg_color=None, period_ms=500):
+        super().__init__(ui, x, y, width if width is not None else ui.char_width_eng,
+                         height if height is not None else ui.char_height, color, bg_color, period_ms)
+        self.visible = True
+
+    def advance(self, steps):
+        if steps % 2:
+            self.visible = not self.visible
 
+    def move(self, x, y):
+        """移动光标：擦掉旧位置，在新位置重新开始闪烁"""
+        self.screen.fill_rect(self.x, self.y, self.width, self.height, self.bg_color)
+        self.x = x
+        self.y = y
+        self.visible = True
+        self._last = time.ticks_ms()
+        self.draw()
 
+    def draw(self):
+        self.screen.fill_rect(self.x, self.y, self.width, self.height,
+                              self.color if self.visible else self.bg_color)